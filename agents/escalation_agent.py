@@ -1,10 +1,9 @@
 import os
 import json
 from crewai import Agent
-from openai import OpenAI
 from typing import Dict, Any
 
-def create_escalation_agent() -> Agent:
+def create_escalation_agent(llm=None, verbose: bool = True) -> Agent:
     """Create and configure the Escalation Agent"""
     return Agent(
         role="Escalation Decision Specialist",
@@ -29,6 +28,7 @@ def create_escalation_agent() -> Agent:
         - category: the FAQ category
         - human_agent_suggestion: "general_support", "technical", "billing", or "manager"
         """,
-        verbose=True,
+        llm=llm,
+        verbose=verbose,
         allow_delegation=False
     )
\ No newline at end of file
@@ -1,10 +1,9 @@
 import os
 import json
 from crewai import Agent
-from openai import OpenAI
 from typing import Dict, Any
 
-def create_faq_agent() -> Agent:
+def create_faq_agent(llm=None, verbose: bool = True) -> Agent:
     """Create and configure the FAQ Agent"""
     return Agent(
         role="FAQ Customer Service Agent",
@@ -19,6 +18,7 @@ def create_faq_agent() -> Agent:
         - The category of the question (order_status, returns, shipping, account, billing, or unknown)
         
         Format your response as JSON with these fields: answer, confidence, category""",
-        verbose=True,
+        llm=llm,
+        verbose=verbose,
         allow_delegation=False
     )
\ No newline at end of file
@@ -4,7 +4,7 @@ import datetime
 from crewai import Agent
 from typing import Dict, Any
 
-def create_logging_agent() -> Agent:
+def create_logging_agent(llm=None, verbose: bool = True) -> Agent:
     """Create and configure the Logging Agent"""
     return Agent(
         role="Customer Interaction Data Analyst",
@@ -28,6 +28,7 @@ def create_logging_agent() -> Agent:
         - analytics: summary of key metrics
         - log_location: where the data was stored
         """,
-        verbose=True,
+        llm=llm,
+        verbose=verbose,
         allow_delegation=False
     )
\ No newline at end of file
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Shared OpenAI Client Benchmark
+
+Drives the pooled, rate-limited client (llm/client.py) against the local
+mock OpenAI server, which can inject 429s with Retry-After and latency.
+Reports throughput, latency percentiles, retries, give-ups, throttling
+and how many TCP connections the pool opened.
+
+Usage:
+    python benchmarks/bench_client.py --requests 200 --concurrency 16 --error-rate 0.2
+    python benchmarks/bench_client.py --rpm 600 --requests 50   # watch the token bucket throttle
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import latency_summary, print_latency_table
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled OpenAI client against the mock server")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds on injected 429s")
+    parser.add_argument("--rpm", type=float, default=0, help="Client requests per minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="Client tokens per minute (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    args = parser.parse_args()
+
+    import openai
+    from crew.metrics import get_metrics
+    from llm.client import SharedOpenAIClient
+    from llm.mock_llm import MockOpenAIServer, MockResponder
+
+    server = MockOpenAIServer(responder=MockResponder(args.latency_ms, args.jitter_ms),
+                              error_rate=args.error_rate, retry_after=args.retry_after).start()
+    client = SharedOpenAIClient(api_key="mock-key", base_url=server.base_url, settings={
+        "requests_per_minute": args.rpm,
+        "tokens_per_minute": args.tpm,
+        "max_retries": args.max_retries,
+        "backoff_base_seconds": args.backoff_base,
+        "max_connections": args.concurrency,
+    })
+    messages = [
+        {"role": "system", "content": "You are FAQ Customer Service Agent."},
+        {"role": "user", "content": "Customer Query: Where is my order?"},
+    ]
+
+    def one_request(_):
+        start = time.perf_counter()
+        try:
+            client.complete("gpt-4o-mini", messages, max_tokens=200)
+            return True, time.perf_counter() - start
+        except openai.APIError:
+            return False, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    server.stop()
+
+    counters = get_metrics().snapshot()["counters"]
+
+    def total(name):
+        return sum(item["value"] for item in counters.get(name, []))
+
+    succeeded = [latency for ok, latency in outcomes if ok]
+    print("\n📊 SHARED CLIENT BENCHMARK")
+    print("=" * 64)
+    print(f"HTTP/2: {'yes' if client.http2 else 'no (h2 not installed or disabled)'}  "
+          f"Concurrency: {args.concurrency}  Injected 429 rate: {args.error_rate:.0%}")
+    print(f"Requests: {args.requests}  Succeeded: {len(succeeded)}  Failed: {args.requests - len(succeeded)}")
+    print(f"Elapsed: {elapsed:.2f}s  Throughput: {args.requests / elapsed if elapsed else 0.0:.1f} req/s")
+    print(f"Server saw {server.requests} requests ({server.rate_limited} answered 429) "
+          f"over {server.connections} connection(s)")
+    print(f"Client retries: {total('llm_client_retries_total'):.0f}  "
+          f"Give-ups: {total('llm_client_giveups_total'):.0f}  "
+          f"Retry budget left: {client.retry_budget.balance:.1f}")
+    print_latency_table("Latency (successful requests)", {"complete": latency_summary(succeeded)})
+    print("=" * 64)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Crew Construction Benchmark
+
+Measures what interactive mode used to pay on every query (building the
+LLM client, agents and Crew) against reusing one warm crew, and the same
+comparison for concurrent callers going through a CrewPool. Runs on the
+mock LLM with zero latency, so the numbers are pure setup and framework
+overhead.
+
+Usage:
+    python benchmarks/bench_construction.py --requests 50
+    python benchmarks/bench_construction.py --requests 200 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from bench_utils import latency_summary, load_queries, print_latency_table, quiet
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query crew construction vs warm crew reuse")
+    parser.add_argument("--queries", default="", help="Queries file (default: built-in sample mix)")
+    parser.add_argument("--requests", type=int, default=50, help="Queries per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Callers in the pooled scenarios")
+    args = parser.parse_args()
+
+    os.environ["MOCK_MODE"] = "true"
+    os.environ["MOCK_LATENCY_MS"] = "0"
+    os.environ["MOCK_JITTER_MS"] = "0"
+
+    from crew.crew import create_customer_support_crew
+    from crew.pool import CrewPool
+    from crew.batch import process_queries_async
+
+    queries = load_queries(args.queries)
+    items = [(queries[i % len(queries)], f"bench_user_{i:05d}", "") for i in range(args.requests)]
+
+    def factory():
+        crew = create_customer_support_crew()
+        crew.response_cache = None
+        return crew
+
+    construction, rebuild, warm = [], [], []
+    with quiet():
+        factory()  # import and first-use costs are not part of either scenario
+        for query, user_id, session_id in items:
+            start = time.perf_counter()
+            crew = factory()
+            construction.append(time.perf_counter() - start)
+            crew.process_customer_query(query, user_id, session_id)
+            rebuild.append(time.perf_counter() - start)
+
+        crew = factory()
+        for query, user_id, session_id in items:
+            start = time.perf_counter()
+            crew.process_customer_query(query, user_id, session_id)
+            warm.append(time.perf_counter() - start)
+
+    class FreshCrewPool(CrewPool):
+        """
+        Pool that builds a new crew for every checkout (the old per-query behaviour)
+        """
+
+        def release(self, crew):
+            with self._lock:
+                self._created -= 1
+
+    pooled = {}
+    for name, pool in (("per-query build", FreshCrewPool(args.concurrency, factory)),
+                       ("warm pool", CrewPool(args.concurrency, factory))):
+        with quiet():
+            pool.warm()
+            start = time.perf_counter()
+            asyncio.run(process_queries_async(items, args.concurrency, pool))
+        pooled[name] = time.perf_counter() - start
+
+    print("\n📊 CREW CONSTRUCTION BENCHMARK")
+    print("=" * 64)
+    print_latency_table("Sequential caller", {
+        "construction only": latency_summary(construction),
+        "build + query": latency_summary(rebuild),
+        "warm crew query": latency_summary(warm),
+    })
+    saved = sum(rebuild) - sum(warm)
+    print(f"\nSetup overhead removed: {saved * 1000 / max(len(items), 1):.1f} ms/query "
+          f"({saved / sum(rebuild) * 100 if sum(rebuild) else 0.0:.0f}% of per-query time)")
+    print(f"\nConcurrent callers ({args.concurrency}):")
+    for name, elapsed in pooled.items():
+        print(f"   {name:<18}{elapsed:>8.2f}s  {len(items) / elapsed if elapsed else 0.0:>8.1f} queries/s")
+    print("=" * 64)
+
+if __name__ == "__main__":
+    main()
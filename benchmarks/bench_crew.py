@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Offline Crew Benchmark
+
+Drives CustomerSupportCrew against the deterministic mock LLM at a fixed
+concurrency and reports throughput, end-to-end and per-stage latency
+percentiles and memory. No network access or API key is needed, so the
+numbers isolate the framework's own overhead (crew construction, prompt
+building, parsing) plus the configured mock latency.
+
+Usage:
+    python benchmarks/bench_crew.py --requests 200 --concurrency 8
+    python benchmarks/bench_crew.py --server        # go through the HTTP mock + OpenAI client
+    python benchmarks/bench_crew.py --latency-ms 0  # pure framework overhead
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+
+from bench_utils import latency_summary, load_queries, max_rss_mb, print_latency_table, quiet
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline CustomerSupportCrew benchmark on the mock LLM")
+    parser.add_argument("--queries", default="", help="Queries file (default: built-in sample mix)")
+    parser.add_argument("--requests", type=int, default=100, help="Total queries to process")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock latency per LLM call")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Mock jitter per LLM call")
+    parser.add_argument("--process-type", choices=["sequential", "fused"], default="sequential")
+    parser.add_argument("--cache", action="store_true", help="Keep the FAQ response cache enabled")
+    parser.add_argument("--server", action="store_true",
+                        help="Serve the mock over local HTTP and use the real OpenAI client path")
+    args = parser.parse_args()
+
+    os.environ["MOCK_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MOCK_JITTER_MS"] = str(args.jitter_ms)
+
+    from llm.factory import get_mock_responder
+    responder = get_mock_responder()
+
+    server = None
+    if args.server:
+        from llm.mock_llm import MockOpenAIServer
+        server = MockOpenAIServer(responder=responder).start()
+        os.environ["MOCK_MODE"] = "false"
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+    else:
+        os.environ["MOCK_MODE"] = "true"
+
+    from crew.crew import create_customer_support_crew
+    from crew.pool import CrewPool
+    from crew.batch import process_queries_async
+
+    queries = load_queries(args.queries)
+    items = [(queries[i % len(queries)], f"bench_user_{i:05d}", "") for i in range(args.requests)]
+
+    tracemalloc.start()
+
+    construction_start = time.perf_counter()
+    with quiet():
+        create_customer_support_crew()
+    construction_time = time.perf_counter() - construction_start
+
+    def factory():
+        crew = create_customer_support_crew()
+        crew.process_type = args.process_type
+        if not args.cache:
+            crew.response_cache = None
+        return crew
+
+    responder.reset_stats()
+    start = time.perf_counter()
+    with quiet():
+        results = asyncio.run(process_queries_async(items, args.concurrency, CrewPool(args.concurrency, factory)))
+    elapsed = time.perf_counter() - start
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if server is not None:
+        server.stop()
+
+    successful = [r for r in results if r.get("success")]
+    rows = {"end_to_end": latency_summary([r["processing_time"] for r in successful])}
+    stage_times, step_times = {}, {}
+    for result in successful:
+        metrics = result.get("stage_metrics", {})
+        for stage, data in metrics.get("stages", {}).items():
+            stage_times.setdefault(stage, []).append(data["wall_time"])
+        for step, seconds in metrics.get("steps", {}).items():
+            step_times.setdefault(step, []).append(seconds)
+    for stage, values in sorted(stage_times.items()):
+        rows[f"stage:{stage}"] = latency_summary(values)
+    for stage, stats in sorted(responder.stats.items()):
+        rows[f"llm:{stage}"] = latency_summary(stats["latencies"])
+    for step, values in sorted(step_times.items()):
+        rows[f"step:{step}"] = latency_summary(values)
+
+    print("\n📊 OFFLINE CREW BENCHMARK")
+    print("=" * 64)
+    print(f"Backend: {'HTTP mock server' if args.server else 'in-process mock'}  "
+          f"Process type: {args.process_type}  Concurrency: {args.concurrency}")
+    print(f"Queries: {len(results)}  Successful: {len(successful)}  Elapsed: {elapsed:.2f}s")
+    print(f"Throughput: {len(results) / elapsed if elapsed else 0.0:.1f} queries/s")
+    print(f"Crew construction: {construction_time * 1000:.1f} ms")
+    print_latency_table("Latency", rows)
+    print(f"\nMemory: peak traced {peak_bytes / (1024 * 1024):.1f} MB, max RSS {max_rss_mb():.1f} MB")
+    calls = {stage: stats["calls"] for stage, stats in sorted(responder.stats.items())}
+    print(f"LLM calls per stage: {calls}")
+    print("=" * 64)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+FAQ Micro-Batching Benchmark
+
+Processes the same queries with FAQ micro-batching off and on
+(agents.faq_agent.micro_batch) against the mock LLM and compares
+throughput, end-to-end latency, the number of FAQ-stage model calls and
+the FAQ prompt tokens sent. The mock charges one call latency per batch
+plus 20% per extra answer. The response cache is disabled so every query
+reaches the FAQ stage.
+
+Usage:
+    python benchmarks/bench_microbatch.py --requests 400 --concurrency 16
+    python benchmarks/bench_microbatch.py --batch-size 4 --wait-ms 10
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, Any
+
+from bench_utils import latency_summary, load_queries, print_latency_table, quiet
+
+FAQ_STAGES = ("faq", "faq_batch")
+
+def run(items, concurrency: int, enabled: bool) -> Dict[str, Any]:
+    """
+    Process the items on fresh crews with micro-batching on or off
+    """
+    from config.settings import load_config
+    from crew.batch import process_queries_async
+    from crew.crew import create_customer_support_crew
+    from crew.microbatch import get_faq_batcher
+    from crew.pool import CrewPool
+    from llm.factory import get_mock_responder
+
+    load_config()["agents"]["faq_agent"].setdefault("micro_batch", {})["enabled"] = enabled
+    get_faq_batcher.cache_clear()
+    responder = get_mock_responder()
+
+    def factory():
+        crew = create_customer_support_crew()
+        crew.response_cache = None
+        return crew
+
+    pool = CrewPool(concurrency, factory)
+    with quiet():
+        pool.warm()
+        responder.reset_stats()
+        start = time.perf_counter()
+        results = asyncio.run(process_queries_async(items, concurrency, pool))
+    elapsed = time.perf_counter() - start
+    stats = responder.stats
+    return {
+        "results": results,
+        "elapsed": elapsed,
+        "faq_calls": sum(stats.get(stage, {}).get("calls", 0) for stage in FAQ_STAGES),
+        "faq_prompt_tokens": sum(stats.get(stage, {}).get("prompt_tokens", 0) for stage in FAQ_STAGES),
+        "batched": sum(1 for result in results if (result.get("faq_batch") or {}).get("accepted")),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="FAQ micro-batching on the mock LLM")
+    parser.add_argument("--queries", default="", help="Queries file (default: built-in sample mix)")
+    parser.add_argument("--requests", type=int, default=200, help="Queries per run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=8, help="agents.faq_agent.micro_batch.max_batch_size")
+    parser.add_argument("--wait-ms", type=float, default=20.0, help="agents.faq_agent.micro_batch.max_wait_ms")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock latency per LLM call")
+    args = parser.parse_args()
+
+    os.environ["MOCK_MODE"] = "true"
+    os.environ["MOCK_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MOCK_JITTER_MS"] = "0"
+
+    from config.settings import load_config
+    micro_batch = load_config()["agents"]["faq_agent"].setdefault("micro_batch", {})
+    micro_batch["max_batch_size"] = args.batch_size
+    micro_batch["max_wait_ms"] = args.wait_ms
+
+    queries = load_queries(args.queries)
+    items = [(queries[i % len(queries)], f"bench_user_{i:05d}", "") for i in range(args.requests)]
+
+    runs = {"single": run(items, args.concurrency, False), "micro-batched": run(items, args.concurrency, True)}
+
+    print("\n📊 FAQ MICRO-BATCHING")
+    print("=" * 72)
+    print(f"Batch size {args.batch_size}, window {args.wait_ms:g}ms, concurrency {args.concurrency}, "
+          f"mock latency {args.latency_ms:g}ms")
+    print(f"\n{'mode':<16}{'queries/s':>11}{'FAQ calls':>11}{'FAQ prompt tok':>16}{'batched':>9}{'failed':>8}")
+    for name, run_stats in runs.items():
+        failed = sum(1 for result in run_stats["results"] if not result.get("success"))
+        rate = len(items) / run_stats["elapsed"] if run_stats["elapsed"] else 0.0
+        print(f"{name:<16}{rate:>11.1f}{run_stats['faq_calls']:>11}{run_stats['faq_prompt_tokens']:>16}"
+              f"{run_stats['batched']:>9}{failed:>8}")
+    print_latency_table("End-to-end latency", {
+        name: latency_summary([r["processing_time"] for r in run_stats["results"] if r.get("success")])
+        for name, run_stats in runs.items()
+    })
+    print("=" * 72)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Status Output Overhead Benchmark
+
+Measures what the status output layer (crew/output.py) costs. The emit()
+microbenchmark times a single call for an event below the output level
+(dropped) and above it (queued for the background writer). The crew run
+then processes the same queries at each output level with stdout going to
+os.devnull, so "quiet" shows the floor and "verbose" the cost of CrewAI's
+agent traces on top of the status lines.
+
+Usage:
+    python benchmarks/bench_output.py --requests 200 --concurrency 8
+    python benchmarks/bench_output.py --levels quiet normal --sink jsonl
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any
+
+from bench_utils import latency_summary, load_queries, print_latency_table
+
+def bench_emit(calls: int) -> Dict[str, float]:
+    """
+    Nanoseconds per emit() for dropped and queued events
+    """
+    from crew.output import DEBUG, INFO, Output
+
+    class NullSink:
+        def write(self, events):
+            pass
+
+        def close(self):
+            pass
+
+    output = Output("normal", [NullSink()])
+    timings = {}
+    for name, level in (("dropped", DEBUG), ("queued", INFO)):
+        start = time.perf_counter()
+        for i in range(calls):
+            output.emit("bench", "Query {number}: {query}", level, number=i, query="Where is my order?")
+        timings[name] = (time.perf_counter() - start) / calls * 1e9
+    output.close()
+    return timings
+
+def run_level(level: str, items, concurrency: int) -> Dict[str, Any]:
+    """
+    Process the items on fresh crews at the given output level
+    """
+    from crew.output import get_output
+    from crew.crew import create_customer_support_crew
+    from crew.pool import CrewPool
+    from crew.batch import process_queries_async
+
+    output = get_output()
+    output.set_level(level)
+
+    def factory():
+        crew = create_customer_support_crew()
+        crew.response_cache = None
+        return crew
+
+    pool = CrewPool(concurrency, factory)
+    pool.warm()
+    start = time.perf_counter()
+    results = asyncio.run(process_queries_async(items, concurrency, pool))
+    output.flush(timeout=None)
+    elapsed = time.perf_counter() - start
+    return {"results": results, "elapsed": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Status output overhead per output level")
+    parser.add_argument("--queries", default="", help="Queries file (default: built-in sample mix)")
+    parser.add_argument("--requests", type=int, default=200, help="Queries per output level")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--levels", nargs="+", default=["quiet", "normal", "verbose"],
+                        choices=["quiet", "normal", "verbose"])
+    parser.add_argument("--sink", choices=["console", "jsonl"], default="console",
+                        help="Where status events go (jsonl writes to a temporary file)")
+    parser.add_argument("--emit-calls", type=int, default=200000, help="Calls per emit() microbenchmark")
+    args = parser.parse_args()
+
+    os.environ["MOCK_MODE"] = "true"
+    os.environ["MOCK_LATENCY_MS"] = "0"
+    os.environ["MOCK_JITTER_MS"] = "0"
+    os.environ.pop("CREW_OUTPUT", None)
+
+    from config.settings import load_config
+    settings = load_config().setdefault("output", {})
+    settings["sinks"] = [args.sink]
+    events_path = os.path.join(tempfile.mkdtemp(), "events.jsonl")
+    settings["jsonl_path"] = events_path
+
+    queries = load_queries(args.queries)
+    items = [(queries[i % len(queries)], f"bench_user_{i:05d}", "") for i in range(args.requests)]
+
+    emit_timings = bench_emit(args.emit_calls)
+
+    runs = {}
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for level in args.levels:
+            runs[level] = run_level(level, items, args.concurrency)
+            stdout.write(f"   {level}: {runs[level]['elapsed']:.2f}s\n")
+
+    print("\n📊 STATUS OUTPUT OVERHEAD")
+    print("=" * 64)
+    print(f"emit() below level: {emit_timings['dropped']:.0f} ns/call")
+    print(f"emit() queued:      {emit_timings['queued']:.0f} ns/call")
+    print(f"\n{'level':<12}{'queries/s':>12}{'elapsed s':>12}{'vs quiet':>12}")
+    baseline = runs.get("quiet", next(iter(runs.values())))["elapsed"]
+    for level, run in runs.items():
+        rate = len(items) / run["elapsed"] if run["elapsed"] else 0.0
+        print(f"{level:<12}{rate:>12.1f}{run['elapsed']:>12.2f}{run['elapsed'] / baseline:>11.2f}x")
+    print_latency_table("End-to-end latency", {
+        level: latency_summary([r["processing_time"] for r in run["results"] if r.get("success")])
+        for level, run in runs.items()
+    })
+    if args.sink == "jsonl" and os.path.exists(events_path):
+        with open(events_path, 'r') as f:
+            print(f"\nStructured events written: {sum(1 for _ in f)} ({events_path})")
+    print("=" * 64)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Pipeline Mode Benchmark
+
+Runs the same queries through the sequential (FAQ -> escalation) and fused
+(single support call) pipelines and compares latency and token usage.
+The response cache and rule fast path are disabled so every query pays
+for the full pipeline in both modes.
+
+Usage:
+    python benchmarks/bench_pipeline_modes.py [queries_file] [--repeat N]
+"""
+
+import os
+import sys
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crew.crew import create_customer_support_crew
+
+DEFAULT_QUERIES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "sample_data", "customer_query.txt")
+
+def load_queries(queries_file: str):
+    """
+    Read one query per non-blank line
+    """
+    with open(queries_file, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def run_mode(crew, queries, process_type: str, repeat: int):
+    """
+    Process every query `repeat` times in one mode and collect measurements
+    """
+    latencies, prompt_tokens, completion_tokens, requests, failures = [], [], [], [], 0
+    for _ in range(repeat):
+        for query in queries:
+            result = crew.process_customer_query(query, "bench_user", process_type=process_type)
+            if not result.get("success"):
+                failures += 1
+                continue
+            usage = result.get("token_usage", {})
+            latencies.append(result["processing_time"])
+            prompt_tokens.append(usage.get("prompt_tokens", 0))
+            completion_tokens.append(usage.get("completion_tokens", 0))
+            requests.append(usage.get("successful_requests", 0))
+    return {
+        "runs": len(latencies),
+        "failures": failures,
+        "latency_mean": statistics.mean(latencies) if latencies else 0.0,
+        "latency_p50": statistics.median(latencies) if latencies else 0.0,
+        "latency_max": max(latencies) if latencies else 0.0,
+        "prompt_tokens_mean": statistics.mean(prompt_tokens) if prompt_tokens else 0.0,
+        "completion_tokens_mean": statistics.mean(completion_tokens) if completion_tokens else 0.0,
+        "requests_mean": statistics.mean(requests) if requests else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and fused pipeline modes")
+    parser.add_argument("queries_file", nargs="?", default=DEFAULT_QUERIES_FILE)
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the query file per mode")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries_file)
+    crew = create_customer_support_crew()
+    crew.response_cache = None
+    crew.rule_fast_path = False
+
+    results = {mode: run_mode(crew, queries, mode, args.repeat) for mode in ("sequential", "fused")}
+
+    print("\n📊 PIPELINE MODE BENCHMARK")
+    print("=" * 72)
+    print(f"{'mode':<12}{'runs':>6}{'fail':>6}{'mean s':>9}{'p50 s':>9}{'max s':>9}"
+          f"{'prompt':>9}{'compl':>8}{'calls':>7}")
+    for mode, stats in results.items():
+        print(f"{mode:<12}{stats['runs']:>6}{stats['failures']:>6}{stats['latency_mean']:>9.2f}"
+              f"{stats['latency_p50']:>9.2f}{stats['latency_max']:>9.2f}{stats['prompt_tokens_mean']:>9.0f}"
+              f"{stats['completion_tokens_mean']:>8.0f}{stats['requests_mean']:>7.1f}")
+    print("=" * 72)
+
+    sequential, fused = results["sequential"], results["fused"]
+    if sequential["latency_mean"] and sequential["prompt_tokens_mean"]:
+        print(f"Fused latency: {fused['latency_mean'] / sequential['latency_mean'] * 100:.0f}% of sequential")
+        print(f"Fused prompt tokens: {fused['prompt_tokens_mean'] / sequential['prompt_tokens_mean'] * 100:.0f}% of sequential")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Transcript Replay Regression
+
+Runs a query set through the crew with every model call answered from an
+LLM transcript store (llm/transcripts.py), so a regression over thousands
+of queries needs no network. With --record the calls are first recorded
+against the mock LLM (or OpenAI with --live) and the replayed results are
+checked against the recorded run. With --baseline the structured results
+(volatile fields such as timestamps and timings removed) are written to a
+JSONL file on the first run and compared against it on later runs, e.g.
+after a prompt change that should not alter the answers.
+
+Usage:
+    python benchmarks/bench_replay.py --record --requests 1000
+    python benchmarks/bench_replay.py --requests 1000 --baseline logs/replay_baseline.jsonl
+    python benchmarks/bench_replay.py --requests 200 --replay-latency   # production timing
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from bench_utils import latency_summary, load_queries, print_latency_table, quiet
+
+# Result fields that differ between otherwise identical runs
+VOLATILE_FIELDS = {"timestamp", "processing_time", "stage_metrics", "logging_result", "queue_wait",
+                   "time_saved", "latency", "total_latency", "token_usage", "interaction_id"}
+
+def normalize(value: Any) -> Any:
+    """
+    Result without its volatile fields, for comparing runs
+    """
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [normalize(item) for item in value]
+    return value
+
+def run(items, concurrency: int, mode: str) -> Dict[str, Any]:
+    """
+    Process the items on fresh crews with transcripts in the given mode
+    """
+    os.environ["LLM_TRANSCRIPTS"] = mode
+    from crew.crew import create_customer_support_crew
+    from crew.pool import CrewPool
+    from crew.batch import process_queries_async
+
+    def factory():
+        crew = create_customer_support_crew()
+        # Cached answers would skip model calls depending on query order
+        crew.response_cache = None
+        return crew
+
+    pool = CrewPool(concurrency, factory)
+    with quiet():
+        pool.warm()
+        start = time.perf_counter()
+        results = asyncio.run(process_queries_async(items, concurrency, pool))
+    return {"results": results, "elapsed": time.perf_counter() - start}
+
+def differences(expected: List[Any], actual: List[Any]) -> List[int]:
+    return [index for index, (a, b) in enumerate(zip(expected, actual)) if a != b]
+
+def main():
+    parser = argparse.ArgumentParser(description="Crew regression run on recorded LLM transcripts")
+    parser.add_argument("--queries", default="", help="Queries file (default: built-in sample mix)")
+    parser.add_argument("--requests", type=int, default=200, help="Total queries to process")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--store", default="cache/llm_transcripts_bench.sqlite3", help="Transcript store file")
+    parser.add_argument("--record", action="store_true", help="Record the transcripts first")
+    parser.add_argument("--live", action="store_true", help="Record against OpenAI instead of the mock LLM")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock latency per call while recording")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep for each call's recorded latency")
+    parser.add_argument("--baseline", default="", help="JSONL of normalized results to write or compare against")
+    args = parser.parse_args()
+
+    os.environ["LLM_TRANSCRIPTS_PATH"] = args.store
+    os.environ["MOCK_MODE"] = "false" if args.live else "true"
+    os.environ["MOCK_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MOCK_JITTER_MS"] = "0"
+
+    from config.settings import load_config
+    transcripts = load_config().setdefault("api", {}).setdefault("transcripts", {})
+    transcripts["on_miss"] = "fail"
+    transcripts["replay_latency"] = args.replay_latency
+
+    queries = load_queries(args.queries)
+    items = [(queries[i % len(queries)], f"bench_user_{i:05d}", "") for i in range(args.requests)]
+
+    recorded = run(items, args.concurrency, "record") if args.record else None
+    replayed = run(items, args.concurrency, "replay")
+
+    from llm.transcripts import get_transcript_store
+    outputs = [normalize(result) for result in replayed["results"]]
+    failed = [result for result in replayed["results"] if not result.get("success")]
+
+    print("\n📊 TRANSCRIPT REPLAY REGRESSION")
+    print("=" * 64)
+    print(f"Store: {args.store} ({get_transcript_store().stats()['calls']} recorded calls)")
+    if recorded is not None:
+        print(f"Record run: {recorded['elapsed']:.2f}s "
+              f"({len(items) / recorded['elapsed'] if recorded['elapsed'] else 0.0:.1f} queries/s)")
+    print(f"Replay run: {replayed['elapsed']:.2f}s "
+          f"({len(items) / replayed['elapsed'] if replayed['elapsed'] else 0.0:.1f} queries/s), "
+          f"{len(failed)} failed")
+    if failed:
+        print(f"   First failure: {failed[0].get('error')}")
+    print_latency_table("Replay latency", {
+        "end_to_end": latency_summary([r["processing_time"] for r in replayed["results"] if r.get("success")]),
+    })
+
+    if recorded is not None:
+        changed = differences([normalize(result) for result in recorded["results"]], outputs)
+        print(f"\nReplay vs record: {len(items) - len(changed)}/{len(items)} results identical")
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = [json.loads(line) for line in f if line.strip()]
+        changed = differences(baseline, outputs)
+        print(f"Baseline {args.baseline}: {len(outputs) - len(changed)}/{len(outputs)} results identical")
+        for index in changed[:5]:
+            print(f"   #{index} {items[index][0][:60]}")
+    elif args.baseline:
+        directory = os.path.dirname(args.baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            for output in outputs:
+                f.write(json.dumps(output, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    print("=" * 64)
+
+if __name__ == "__main__":
+    main()
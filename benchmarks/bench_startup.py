@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Benchmark
+
+Measures how long the CLI takes before it does any work: `python main.py
+--help` wall time, and which modules `import main` pulls in according to
+`python -X importtime`. CrewAI, openai and the agents are meant to load only
+once a mode builds its first crew, so the heaviest of those should never
+show up here; --check fails if they do.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 10 --top 25 --check
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from bench_utils import REPO_ROOT, latency_summary, print_latency_table
+
+# Modules that must not be imported just to parse arguments
+HEAVY_MODULES = ("crewai", "openai", "litellm", "numpy", "crew.crew")
+
+def run(command: List[str]) -> Tuple[float, str]:
+    """
+    Run a command from the repo root; returns (wall seconds, stderr)
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", MOCK_MODE="true")
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed: {completed.stderr.strip()[-500:]}")
+    return elapsed, completed.stderr
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Cumulative microseconds per module from `-X importtime` output
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        # Nested imports are indented under their parent; keep the bare module name
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup time and import profile")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if a heavy module is imported by `import main`")
+    args = parser.parse_args()
+
+    help_times, import_times, profile = [], [], {}
+    for _ in range(args.runs):
+        help_times.append(run([sys.executable, "main.py", "--help"])[0])
+        elapsed, stderr = run([sys.executable, "-X", "importtime", "-c", "import main"])
+        import_times.append(elapsed)
+        profile = parse_importtime(stderr)
+    baseline = [run([sys.executable, "-c", "pass"])[0] for _ in range(args.runs)]
+
+    print("\n📊 CLI STARTUP BENCHMARK")
+    print("=" * 64)
+    print_latency_table("Wall time", {
+        "python -c pass": latency_summary(baseline),
+        "main.py --help": latency_summary(help_times),
+        "import main": latency_summary(import_times),
+    })
+
+    print(f"\nSlowest imports under `import main` (cumulative):")
+    for module, micros in sorted(profile.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"   {micros / 1000:>8.1f} ms  {module}")
+
+    loaded = [module for module in HEAVY_MODULES if module in profile]
+    print(f"\nHeavy modules imported: {', '.join(loaded) if loaded else 'none'}")
+    print("=" * 64)
+    if args.check and loaded:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
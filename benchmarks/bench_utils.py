@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import contextlib
+import io
+import os
+import resource
+import sys
+from typing import Dict, Iterator, List, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+SAMPLE_QUERIES = [
+    "Where is my order? I placed it 5 days ago and haven't received any tracking information.",
+    "How do I return a defective item and get a refund?",
+    "How long does express shipping take?",
+    "I forgot my password and can't log in to my account.",
+    "Why was my card charged twice for the same invoice?",
+    "This is the worst service ever, I want to speak to a manager about a lawsuit.",
+    "URGENT: my order never arrived and I need it immediately!",
+    "Do you ship to Canada?",
+]
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile (0 for an empty sequence)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def latency_summary(values: Sequence[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99/max of a list of seconds
+    """
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+def load_queries(queries_file: str = "") -> List[str]:
+    """
+    Queries from a file (one per line), or the built-in sample mix
+    """
+    if not queries_file:
+        return list(SAMPLE_QUERIES)
+    with open(queries_file, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def max_rss_mb() -> float:
+    """
+    Peak resident set size of this process in MB
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """
+    Swallow stdout so console output does not distort timings
+    """
+    from crew.output import get_output
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            yield
+        finally:
+            # Status events are written by a background thread; keep them inside the redirect
+            get_output().flush()
+
+def print_latency_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print a name -> latency_summary table in milliseconds
+    """
+    print(f"\n{title}")
+    print(f"{'':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in rows.items():
+        print(f"{name:<24}{stats['count']:>8}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}"
+              f"{stats['p99'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}")
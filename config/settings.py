@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+from typing import Dict, Any, Optional
+
+import yaml
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+
+@lru_cache(maxsize=None)
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load the crew configuration from config.yaml once per process
+
+    Args:
+        path: Optional override for the configuration file location
+
+    Returns:
+        Parsed configuration (empty dict if the file is missing)
+    """
+    config_path = path or os.getenv("CREW_CONFIG_PATH", CONFIG_PATH)
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+def get_setting(key: str, default: Any = None, config: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Look up a dotted configuration key such as "workflow.max_execution_time"
+    """
+    node: Any = load_config() if config is None else config
+    for part in key.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
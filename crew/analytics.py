@@ -0,0 +1,530 @@
+"""
+Incremental interaction analytics
+
+Every logged interaction updates, in O(1), all-time totals, a tumbling
+window and a sliding window of category counts, escalations and fixed-bucket
+confidence and latency histograms. A sliding-window escalation rate above
+monitoring.escalation_rate_threshold fires an alert callback. Rollups can be
+backfilled from the interaction JSONL logs with NumPy:
+
+    python -m crew.analytics logs/customer_interactions.jsonl --tumbling 3600
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence
+
+from config.settings import get_setting
+from crew.metrics import SECONDS_BUCKETS, get_metrics
+from crew.output import WARNING, emit
+
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+LATENCY_BUCKETS = SECONDS_BUCKETS
+
+def histogram_quantile(counts: Sequence[float], bounds: Sequence[float], q: float) -> Optional[float]:
+    """
+    Approximate quantile of a fixed-bucket histogram, interpolated within the bucket
+
+    counts has one more entry than bounds (the overflow bucket); values in
+    the overflow bucket are reported as the last bound.
+    """
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    running = 0.0
+    for index, count in enumerate(counts):
+        if count and running + count >= rank:
+            if index >= len(bounds):
+                return float(bounds[-1])
+            lower = bounds[index - 1] if index else 0.0
+            return float(lower + (bounds[index] - lower) * (rank - running) / count)
+        running += count
+    return float(bounds[-1])
+
+class Rollup:
+    """
+    Additive counters for one window (or all time)
+    """
+
+    __slots__ = ("start", "count", "escalations", "categories", "confidence", "confidence_sum",
+                 "latency", "latency_sum")
+
+    def __init__(self, start: float = 0.0):
+        self.start = start
+        self.count = 0
+        self.escalations = 0
+        self.categories: Dict[str, int] = {}
+        self.confidence = [0] * (len(CONFIDENCE_BUCKETS) + 1)
+        self.confidence_sum = 0.0
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def add(self, category: Optional[str], escalated: Optional[bool], confidence: Optional[float],
+            latency: Optional[float]) -> None:
+        self.count += 1
+        if escalated:
+            self.escalations += 1
+        if category is not None:
+            self.categories[category] = self.categories.get(category, 0) + 1
+        if confidence is not None:
+            self.confidence[bisect_left(CONFIDENCE_BUCKETS, confidence)] += 1
+            self.confidence_sum += confidence
+        if latency is not None:
+            self.latency[bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self.latency_sum += latency
+
+    def merge(self, other: "Rollup", sign: int = 1) -> None:
+        """
+        Add (or with sign=-1 subtract) another rollup's counters
+        """
+        self.count += sign * other.count
+        self.escalations += sign * other.escalations
+        for category, count in other.categories.items():
+            remaining = self.categories.get(category, 0) + sign * count
+            if remaining:
+                self.categories[category] = remaining
+            else:
+                self.categories.pop(category, None)
+        self.confidence = [a + sign * b for a, b in zip(self.confidence, other.confidence)]
+        self.confidence_sum += sign * other.confidence_sum
+        self.latency = [a + sign * b for a, b in zip(self.latency, other.latency)]
+        self.latency_sum += sign * other.latency_sum
+
+    def to_dict(self) -> Dict[str, Any]:
+        confidence_count = sum(self.confidence)
+        latency_count = sum(self.latency)
+        return {
+            "start": datetime.fromtimestamp(self.start).isoformat() if self.start else None,
+            "count": self.count,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.count if self.count else 0.0,
+            "categories": dict(sorted(self.categories.items(), key=lambda item: -item[1])),
+            "confidence": {
+                "count": confidence_count,
+                "mean": self.confidence_sum / confidence_count if confidence_count else None,
+                "p50": histogram_quantile(self.confidence, CONFIDENCE_BUCKETS, 0.5),
+                "p90": histogram_quantile(self.confidence, CONFIDENCE_BUCKETS, 0.9),
+                "histogram": dict(zip([repr(bound) for bound in CONFIDENCE_BUCKETS] + ["+Inf"], self.confidence)),
+            },
+            "latency": {
+                "count": latency_count,
+                "mean": self.latency_sum / latency_count if latency_count else None,
+                "p50": histogram_quantile(self.latency, LATENCY_BUCKETS, 0.5),
+                "p95": histogram_quantile(self.latency, LATENCY_BUCKETS, 0.95),
+                "p99": histogram_quantile(self.latency, LATENCY_BUCKETS, 0.99),
+            },
+        }
+
+def print_alert(alert: Dict[str, Any]) -> None:
+    """
+    Default alert callback
+    """
+    if alert["state"] == "firing":
+        emit("escalation_rate_alert",
+             "🚨 Escalation rate {rate:.1f}% over the last {window_seconds:.0f}s ({escalations}/{count}) "
+             "is above {limit:.0f}%", WARNING,
+             rate=alert["escalation_rate"] * 100, limit=alert["threshold"] * 100, **alert)
+    else:
+        emit("escalation_rate_resolved", "✅ Escalation rate back to {rate:.1f}% (below {limit:.0f}%)", WARNING,
+             rate=alert["escalation_rate"] * 100, limit=alert["threshold"] * 100, **alert)
+
+class InteractionAnalytics:
+    """
+    O(1)-per-event rollups over all time, a tumbling and a sliding window
+
+    The tumbling window restarts every `tumbling_seconds`; the last
+    `tumbling_history` closed windows are kept. The sliding window covers
+    the last `sliding_seconds` as a ring of `sliding_buckets` rollups: an
+    event is added to the current bucket and to the running window totals,
+    and a bucket's counters are subtracted from the totals when it falls out
+    of the window. Once the window holds `alert_min_events` events, the
+    escalation rate crossing `escalation_rate_threshold` calls `on_alert`
+    with state "firing", and falling back below it with state "resolved".
+    """
+
+    def __init__(self, sliding_seconds: float = 300, sliding_buckets: int = 30, tumbling_seconds: float = 60,
+                 tumbling_history: int = 60, escalation_rate_threshold: Optional[float] = 0.3,
+                 alert_min_events: int = 20, on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 track_categories: bool = True, track_escalations: bool = True,
+                 track_confidence: bool = True, track_latency: bool = True):
+        """
+        Args:
+            sliding_seconds: Length of the sliding window
+            sliding_buckets: Buckets the sliding window is kept in (its time resolution)
+            tumbling_seconds: Length of each tumbling window
+            tumbling_history: Closed tumbling windows kept
+            escalation_rate_threshold: Sliding escalation rate that fires an alert (None disables alerts)
+            alert_min_events: Events the sliding window needs before alerting
+            on_alert: Called with the alert dict (default: print it)
+            track_*: Which parts of each interaction are rolled up
+        """
+        self.sliding_seconds = float(sliding_seconds)
+        self.bucket_seconds = self.sliding_seconds / sliding_buckets
+        self.sliding_buckets = sliding_buckets
+        self.tumbling_seconds = float(tumbling_seconds)
+        self.escalation_rate_threshold = escalation_rate_threshold
+        self.alert_min_events = alert_min_events
+        self.on_alert = on_alert or print_alert
+        self.track_categories = track_categories
+        self.track_escalations = track_escalations
+        self.track_confidence = track_confidence
+        self.track_latency = track_latency
+
+        self.total = Rollup()
+        self.tumbling: Optional[Rollup] = None
+        self.closed_windows: "deque[Rollup]" = deque(maxlen=tumbling_history)
+        self.sliding = Rollup()
+        self._ring: List[Optional[Rollup]] = [None] * sliding_buckets
+        self._head = None  # index of the newest sliding bucket
+        self.alerting = False
+        self.alerts_fired = 0
+        self._lock = threading.Lock()
+        self.metrics = get_metrics()
+
+    def record(self, result: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """
+        Roll up one interaction result (or interaction log record)
+        """
+        faq = result.get("faq_response") or {}
+        escalation = result.get("escalation_decision") or {}
+        latency = result.get("processing_time", (result.get("metadata") or {}).get("processing_time"))
+        confidence = faq.get("confidence")
+        self.record_event(
+            time.time() if timestamp is None else timestamp,
+            str(faq.get("category", "unknown")),
+            bool(escalation.get("escalate", False)),
+            float(confidence) if isinstance(confidence, (int, float)) else None,
+            float(latency) if isinstance(latency, (int, float)) else None,
+        )
+
+    def record_event(self, timestamp: float, category: Optional[str], escalated: Optional[bool],
+                     confidence: Optional[float], latency: Optional[float]) -> None:
+        """
+        Roll up one event given its fields (None for a field that is not known)
+        """
+        category = category if self.track_categories else None
+        escalated = escalated if self.track_escalations else None
+        confidence = confidence if self.track_confidence else None
+        latency = latency if self.track_latency else None
+
+        with self._lock:
+            self.total.add(category, escalated, confidence, latency)
+
+            window = self._tumbling_for(timestamp)
+            if window is not None:
+                window.add(category, escalated, confidence, latency)
+
+            bucket = self._bucket_for(timestamp)
+            if bucket is not None:
+                bucket.add(category, escalated, confidence, latency)
+                self.sliding.add(category, escalated, confidence, latency)
+            alert = self._check_alert()
+        if alert is not None:
+            self.metrics.inc("analytics_alerts_total", state=alert["state"])
+            self.on_alert(alert)
+
+    def _tumbling_for(self, timestamp: float) -> Optional[Rollup]:
+        """
+        Current tumbling window, closing it once timestamp is past its end (None for late events)
+        """
+        start = timestamp - timestamp % self.tumbling_seconds
+        if self.tumbling is not None and start < self.tumbling.start:
+            return None
+        if self.tumbling is None or start > self.tumbling.start:
+            if self.tumbling is not None:
+                self.closed_windows.append(self.tumbling)
+            self.tumbling = Rollup(start)
+        return self.tumbling
+
+    def _advance(self, slot: int) -> None:
+        """
+        Move the sliding window forward to slot, expiring the buckets it passes
+        """
+        if self._head is not None and slot - self._head >= self.sliding_buckets:
+            self._ring = [None] * self.sliding_buckets
+            self.sliding = Rollup()
+        elif self._head is not None:
+            for passed in range(self._head + 1, slot + 1):
+                expired = self._ring[passed % self.sliding_buckets]
+                if expired is not None:
+                    self.sliding.merge(expired, -1)
+                    self._ring[passed % self.sliding_buckets] = None
+        self._head = slot
+
+    def _bucket_for(self, timestamp: float) -> Optional[Rollup]:
+        slot = int(timestamp // self.bucket_seconds)
+        if self._head is None or slot > self._head:
+            self._advance(slot)
+        elif slot <= self._head - self.sliding_buckets:
+            return None
+        bucket = self._ring[slot % self.sliding_buckets]
+        if bucket is None:
+            bucket = self._ring[slot % self.sliding_buckets] = Rollup(slot * self.bucket_seconds)
+        return bucket
+
+    def _check_alert(self) -> Optional[Dict[str, Any]]:
+        if self.escalation_rate_threshold is None or not self.track_escalations:
+            return None
+        count = self.sliding.count
+        rate = self.sliding.escalations / count if count else 0.0
+        if not self.alerting and count >= self.alert_min_events and rate >= self.escalation_rate_threshold:
+            self.alerting = True
+            self.alerts_fired += 1
+            state = "firing"
+        elif self.alerting and rate < self.escalation_rate_threshold:
+            self.alerting = False
+            state = "resolved"
+        else:
+            return None
+        return {
+            "state": state,
+            "escalation_rate": rate,
+            "escalations": self.sliding.escalations,
+            "count": count,
+            "threshold": self.escalation_rate_threshold,
+            "window_seconds": self.sliding_seconds,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Totals plus the current tumbling and sliding windows and the closed tumbling windows
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # An idle window still has to drop the buckets that aged out
+            self._advance(max(int(now // self.bucket_seconds), self._head or 0))
+            current = self.tumbling
+            if current is not None and now - current.start >= self.tumbling_seconds:
+                current = None
+            return {
+                "total": self.total.to_dict(),
+                "sliding": {"window_seconds": self.sliding_seconds, **self.sliding.to_dict()},
+                "tumbling": {
+                    "window_seconds": self.tumbling_seconds,
+                    "current": current.to_dict() if current is not None else None,
+                    "closed": [window.to_dict() for window in self.closed_windows] +
+                              ([self.tumbling.to_dict()] if current is None and self.tumbling is not None else []),
+                },
+                "alert": {
+                    "threshold": self.escalation_rate_threshold,
+                    "firing": self.alerting,
+                    "fired": self.alerts_fired,
+                },
+            }
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Compact all-time view for the batch summary
+        """
+        with self._lock:
+            total = self.total.to_dict()
+            return {
+                "categories": total["categories"],
+                "confidence_p50": total["confidence"]["p50"],
+                "latency_p50": total["latency"]["p50"],
+                "latency_p95": total["latency"]["p95"],
+                "alerts_fired": self.alerts_fired,
+            }
+
+    def backfill(self, paths: Iterable[str], now: Optional[float] = None) -> int:
+        """
+        Load the rollups from interaction JSONL logs, oldest records first
+
+        Records are grouped into tumbling windows and sliding buckets with
+        vectorized NumPy bin counts rather than one event at a time. Meant
+        for a fresh instance, before live events arrive; no alerts fire.
+
+        Returns:
+            Number of records loaded
+        """
+        import numpy as np
+
+        timestamps, categories, escalated, confidence, latency = [], [], [], [], []
+        for path in paths:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        timestamps.append(record["timestamp"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    analytics = record.get("analytics") or {}
+                    categories.append(str(analytics.get("category", "unknown")))
+                    escalated.append(bool(analytics.get("escalated", False)))
+                    score = analytics.get("confidence_score")
+                    confidence.append(score if isinstance(score, (int, float)) else np.nan)
+                    seconds = (record.get("metadata") or {}).get("processing_time")
+                    latency.append(seconds if isinstance(seconds, (int, float)) else np.nan)
+        if not timestamps:
+            return 0
+
+        # Log timestamps are naive local time
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+        moments = np.array(timestamps, dtype="datetime64[us]")
+        seconds = (moments - np.datetime64(0, "us")).astype(np.float64) / 1e6 - utc_offset
+        order = np.argsort(seconds, kind="stable")
+        seconds = seconds[order]
+        names, category_codes = np.unique(np.array(categories)[order], return_inverse=True)
+        columns = {
+            "category": category_codes,
+            "escalated": np.array(escalated, dtype=bool)[order],
+            "confidence": np.array(confidence, dtype=np.float64)[order],
+            "latency": np.array(latency, dtype=np.float64)[order],
+        }
+
+        def rollups(keys) -> Dict[int, Rollup]:
+            """
+            One Rollup per distinct key, all counters computed per key at once
+            """
+            unique, groups = np.unique(keys, return_inverse=True)
+            size = len(unique)
+            counts = np.bincount(groups, minlength=size)
+            escalations = np.bincount(groups, weights=columns["escalated"], minlength=size)
+            by_category = np.bincount(groups * len(names) + columns["category"],
+                                      minlength=size * len(names)).reshape(size, len(names))
+            histograms = {}
+            for field, bounds in (("confidence", CONFIDENCE_BUCKETS), ("latency", LATENCY_BUCKETS)):
+                values = columns[field]
+                known = ~np.isnan(values)
+                bins = np.searchsorted(np.asarray(bounds), values[known], side="left")
+                histograms[field] = (
+                    np.bincount(groups[known] * (len(bounds) + 1) + bins,
+                                minlength=size * (len(bounds) + 1)).reshape(size, len(bounds) + 1),
+                    np.bincount(groups[known], weights=values[known], minlength=size),
+                )
+            result = {}
+            for row, key in enumerate(unique.tolist()):
+                rollup = Rollup()
+                rollup.count = int(counts[row])
+                rollup.escalations = int(escalations[row])
+                rollup.categories = {
+                    str(names[column]): int(by_category[row, column]) for column in np.flatnonzero(by_category[row])
+                }
+                rollup.confidence = histograms["confidence"][0][row].tolist()
+                rollup.confidence_sum = float(histograms["confidence"][1][row])
+                rollup.latency = histograms["latency"][0][row].tolist()
+                rollup.latency_sum = float(histograms["latency"][1][row])
+                result[key] = rollup
+            return result
+
+        if not self.track_categories:
+            names, columns["category"] = np.array(["unknown"]), np.zeros(len(seconds), dtype=np.int64)
+        if not self.track_escalations:
+            columns["escalated"] = np.zeros(len(seconds), dtype=bool)
+        for field, tracked in (("confidence", self.track_confidence), ("latency", self.track_latency)):
+            if not tracked:
+                columns[field] = np.full(len(seconds), np.nan)
+
+        now = time.time() if now is None else now
+        with self._lock:
+            self.total.merge(rollups(np.zeros(len(seconds), dtype=np.int64))[0])
+
+            windows = rollups(np.floor(seconds / self.tumbling_seconds).astype(np.int64))
+            for index, rollup in sorted(windows.items()):
+                rollup.start = index * self.tumbling_seconds
+                if self.tumbling is not None and rollup.start == self.tumbling.start:
+                    self.tumbling.merge(rollup)
+                elif self.tumbling is None or rollup.start > self.tumbling.start:
+                    if self.tumbling is not None:
+                        self.closed_windows.append(self.tumbling)
+                    self.tumbling = rollup
+
+            slots = np.floor(seconds / self.bucket_seconds).astype(np.int64)
+            newest = max(int(now // self.bucket_seconds), int(slots[-1]), self._head or 0)
+            self._advance(newest)
+            for slot, rollup in rollups(slots).items():
+                if slot <= newest - self.sliding_buckets:
+                    continue
+                rollup.start = slot * self.bucket_seconds
+                bucket = self._ring[slot % self.sliding_buckets]
+                if bucket is None:
+                    self._ring[slot % self.sliding_buckets] = rollup
+                else:
+                    bucket.merge(rollup)
+                self.sliding.merge(rollup)
+            self.alerting = bool(
+                self.escalation_rate_threshold is not None and self.track_escalations
+                and self.sliding.count >= self.alert_min_events
+                and self.sliding.escalations / self.sliding.count >= self.escalation_rate_threshold
+            )
+        return len(seconds)
+
+def interaction_log_files(file_path: Optional[str] = None) -> List[str]:
+    """
+    Rotated interaction logs (oldest first) followed by the active one
+    """
+    file_path = file_path or get_setting("logging.file_path", "logs/customer_interactions.jsonl")
+    base, ext = os.path.splitext(file_path)
+    paths = sorted(glob.glob(f"{glob.escape(base)}-*{ext}"))
+    if os.path.exists(file_path):
+        paths.append(file_path)
+    return paths
+
+def create_analytics(**overrides: Any) -> InteractionAnalytics:
+    """
+    Analytics configured from config.yaml (monitoring, logging.analytics and analytics sections)
+    """
+    settings = {
+        "sliding_seconds": float(get_setting("analytics.sliding_window_seconds", 300)),
+        "sliding_buckets": int(get_setting("analytics.sliding_buckets", 30)),
+        "tumbling_seconds": float(get_setting("analytics.tumbling_window_seconds", 60)),
+        "tumbling_history": int(get_setting("analytics.tumbling_history", 60)),
+        "escalation_rate_threshold": (
+            float(get_setting("monitoring.escalation_rate_threshold", 0.3))
+            if get_setting("monitoring.alert_on_high_escalation_rate", True) else None
+        ),
+        "alert_min_events": int(get_setting("analytics.alert_min_events", 20)),
+        "track_categories": get_setting("logging.analytics.track_category_distribution", True),
+        "track_escalations": get_setting("logging.analytics.track_escalation_rate", True),
+        "track_confidence": get_setting("logging.analytics.track_confidence_scores", True),
+        "track_latency": get_setting("logging.analytics.track_resolution_time", True),
+    }
+    settings.update(overrides)
+    return InteractionAnalytics(**settings)
+
+@lru_cache(maxsize=None)
+def get_analytics() -> Optional[InteractionAnalytics]:
+    """
+    Process-wide analytics (None if disabled), backfilled from the interaction
+    logs when analytics.backfill_on_start is set
+    """
+    if not get_setting("analytics.enabled", True):
+        return None
+    analytics = create_analytics()
+    if get_setting("analytics.backfill_on_start", False):
+        loaded = analytics.backfill(interaction_log_files())
+        emit("analytics_backfilled", "📈 Analytics backfilled from {records} logged interactions", records=loaded)
+    return analytics
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Roll up interaction logs into analytics windows")
+    parser.add_argument("paths", nargs="*", help="Interaction JSONL files (default: logging.file_path and its rotations)")
+    parser.add_argument("--tumbling", type=float, default=None, help="Tumbling window seconds")
+    parser.add_argument("--sliding", type=float, default=None, help="Sliding window seconds")
+    args = parser.parse_args(argv)
+
+    overrides = {"on_alert": lambda alert: None}
+    if args.tumbling:
+        overrides["tumbling_seconds"] = args.tumbling
+        overrides["tumbling_history"] = 100000
+    if args.sliding:
+        overrides["sliding_seconds"] = args.sliding
+    analytics = create_analytics(**overrides)
+    paths = args.paths or interaction_log_files()
+    start = time.perf_counter()
+    loaded = analytics.backfill(paths)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"records": loaded, "backfill_seconds": elapsed, **analytics.snapshot()}, indent=2))
+
+if __name__ == "__main__":
+    main()
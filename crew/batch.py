@@ -0,0 +1,248 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+
+from config.settings import get_setting
+from crew.pool import CrewPool
+from crew.dedup import QueryClusterer, expand_clusters
+from crew.output import emit
+from crew.rules import PRIORITY_ORDER
+from crew.scheduler import DEFAULT_PRIORITY, PriorityScheduler, classify_priority
+
+def _process_with_pool(pool: CrewPool, customer_query: str, user_id: str, session_id: str,
+                       deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run one query on a borrowed crew (executed inside a worker thread)
+
+    deadline_seconds overrides workflow.max_execution_time for the query and
+    also bounds the wait for a crew: when every crew stays busy (e.g. held by
+    kickoffs abandoned at their deadline) the result fails with "timed_out"
+    set and "timed_out_stage" "crew_pool".
+    """
+    start_time = time.time()
+    acquired = False
+    try:
+        with pool.acquire(timeout=deadline_seconds or None) as crew:
+            acquired = True
+            return crew.process_customer_query(customer_query, user_id, session_id,
+                                               deadline_seconds=deadline_seconds)
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": str(e),
+            "customer_query": customer_query,
+            "user_id": user_id,
+            "timestamp": datetime.now().isoformat(),
+            "processing_time": time.time() - start_time
+        }
+        if isinstance(e, TimeoutError) and not acquired:
+            result.update({"timed_out": True, "timed_out_stage": "crew_pool"})
+        return result
+
+async def process_queries_async(queries: Sequence[Tuple[str, str, str]], concurrency: int = 1,
+                                pool: Optional[CrewPool] = None,
+                                on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+                                ) -> List[Dict[str, Any]]:
+    """
+    Process (query, user_id, session_id) items with at most `concurrency` in flight
+
+    Each in-flight query runs on its own crew from a CrewPool inside a
+    dedicated thread pool, since CrewAI kickoff is blocking network I/O.
+    Queries are dispatched by a PriorityScheduler, so urgent and high
+    priority queries go first; each result records its "priority" and
+    "queue_wait".
+
+    Args:
+        queries: (query, user_id, session_id) tuples
+        concurrency: Maximum number of queries in flight
+        pool: Crew pool to borrow from (default: a new pool of `concurrency` crews)
+        on_result: Called with (input index, result) as each query finishes
+
+    Returns:
+        Results in the same order as the input queries
+    """
+    pool = pool or CrewPool(concurrency)
+    loop = asyncio.get_running_loop()
+    results: List[Dict[str, Any]] = [{} for _ in queries]
+
+    scheduler = PriorityScheduler()
+    prioritize = get_setting("scheduler.enabled", True)
+    for index, item in enumerate(queries):
+        scheduler.put_nowait((index, item), classify_priority(item[0]) if prioritize else DEFAULT_PRIORITY)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crew") as executor:
+        async def worker() -> None:
+            while scheduler.qsize():
+                (index, (customer_query, user_id, session_id)), priority, waited = scheduler.get_nowait()
+                emit("batch_query_started", "\n🔄 Processing query {number}/{total} [{priority}]: {query:.50}...",
+                     number=index + 1, total=len(queries), priority=priority, query=customer_query)
+                result = await loop.run_in_executor(
+                    executor, _process_with_pool, pool, customer_query, user_id, session_id
+                )
+                result["priority"] = priority
+                result["queue_wait"] = waited
+                results[index] = result
+                if on_result is not None:
+                    on_result(index, result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return results
+
+def run_batch(queries: Sequence[Tuple[str, str, str]], concurrency: int = 1,
+              deduplicate: Optional[bool] = None,
+              runner: Optional[Callable[[Sequence[Tuple[str, str, str]]], List[Dict[str, Any]]]] = None
+              ) -> List[Dict[str, Any]]:
+    """
+    Synchronous wrapper around process_queries_async
+
+    With deduplication (default: batch_dedup.enabled) near-duplicate
+    queries are clustered first and only one representative per cluster
+    goes through the crew; its result is fanned out to the other members.
+
+    Args:
+        queries: (query, user_id, session_id) tuples
+        concurrency: Maximum number of queries in flight
+        deduplicate: Cluster near-duplicates (default: batch_dedup.enabled)
+        runner: Processes a list of queries into ordered results (default:
+            process_queries_async in this process; see ShardedBatchRunner)
+    """
+    if runner is None:
+        def runner(items):
+            return asyncio.run(process_queries_async(items, concurrency))
+    if deduplicate is None:
+        deduplicate = get_setting("batch_dedup.enabled", True)
+    if not deduplicate:
+        return runner(queries)
+
+    clusters = QueryClusterer().cluster(queries)
+    representatives = [queries[members[0]] for members in clusters]
+    if len(representatives) < len(queries):
+        emit("batch_clustered", "🧬 {queries} queries form {clusters} clusters; processing {representatives} representatives",
+             queries=len(queries), clusters=len(clusters), representatives=len(representatives))
+    results, unresolved = expand_clusters(queries, clusters, runner(representatives))
+
+    # Members of failed representatives get their own attempt
+    if unresolved:
+        retried = runner([queries[index] for index in unresolved])
+        for index, result in zip(unresolved, retried):
+            results[index] = result
+    return results
+
+class BatchAggregates:
+    """
+    Running batch counters so summaries never need the full result list
+    """
+
+    FIELDS = ("total_queries", "successful", "escalated", "processing_time_total", "queue_waits",
+              "deduplicated", "time_saved")
+
+    def __init__(self, **counters: Any):
+        self.total_queries = int(counters.get("total_queries", 0))
+        self.successful = int(counters.get("successful", 0))
+        self.escalated = int(counters.get("escalated", 0))
+        self.processing_time_total = float(counters.get("processing_time_total", 0.0))
+        self.deduplicated = int(counters.get("deduplicated", 0))
+        self.time_saved = float(counters.get("time_saved", 0.0))
+        # priority -> {"count", "total", "max"} of scheduler queue waits
+        self.queue_waits: Dict[str, Dict[str, float]] = {
+            priority: dict(stats) for priority, stats in (counters.get("queue_waits") or {}).items()
+        }
+
+    def add(self, result: Dict[str, Any]) -> None:
+        """
+        Fold one query result into the counters
+        """
+        self.total_queries += 1
+        if result.get("success"):
+            self.successful += 1
+        if result.get("escalation_decision", {}).get("escalate"):
+            self.escalated += 1
+        self.processing_time_total += float(result.get("processing_time", 0.0) or 0.0)
+        if "duplicate_of" in result:
+            self.deduplicated += 1
+            self.time_saved += float(result.get("time_saved", 0.0) or 0.0)
+        if "queue_wait" in result:
+            stats = self.queue_waits.setdefault(result.get("priority", DEFAULT_PRIORITY),
+                                                {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += result["queue_wait"]
+            stats["max"] = max(stats["max"], result["queue_wait"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Raw counters, suitable for checkpointing
+        """
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Batch summary in the shape printed by print_batch_summary
+        """
+        total_queries = self.total_queries
+        summary = {
+            "total_queries": total_queries,
+            "successful": self.successful,
+            "failed": total_queries - self.successful,
+            "escalated": self.escalated,
+            "resolution_rate": (self.successful - self.escalated) / total_queries if total_queries else 0.0,
+            "avg_processing_time": self.processing_time_total / total_queries if total_queries else 0.0
+        }
+        if self.deduplicated:
+            summary["deduplicated"] = self.deduplicated
+            summary["dedup_ratio"] = self.deduplicated / total_queries
+            summary["time_saved"] = self.time_saved
+        if self.queue_waits:
+            summary["queue_wait_by_priority"] = {
+                priority: {
+                    "count": int(self.queue_waits[priority]["count"]),
+                    "avg": self.queue_waits[priority]["total"] / self.queue_waits[priority]["count"],
+                    "max": self.queue_waits[priority]["max"],
+                }
+                for priority in sorted(self.queue_waits, key=lambda p: -PRIORITY_ORDER.get(p, 1))
+            }
+        return summary
+
+def summarize_batch(results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Count successes, failures and escalations across batch results
+    """
+    aggregates = BatchAggregates()
+    for result in results:
+        aggregates.add(result)
+    return aggregates.summary()
+
+def print_batch_summary(summary: Dict[str, Any]) -> None:
+    """
+    Print the batch processing summary
+    """
+    print(f"\n📊 BATCH PROCESSING SUMMARY")
+    print("="*40)
+    print(f"Total Queries: {summary['total_queries']}")
+    print(f"Successful: {summary['successful']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Escalated: {summary['escalated']}")
+    print(f"Resolution Rate: {summary['resolution_rate'] * 100:.1f}%")
+    print(f"Avg Processing Time: {summary['avg_processing_time']:.2f}s")
+    if "elapsed_time" in summary:
+        print(f"Elapsed Time: {summary['elapsed_time']:.2f}s")
+    if "deduplicated" in summary:
+        print(f"Deduplicated: {summary['deduplicated']} ({summary['dedup_ratio'] * 100:.1f}% answered from a cluster)")
+        print(f"Time Saved (est.): {summary['time_saved']:.2f}s")
+    for priority, wait in summary.get("queue_wait_by_priority", {}).items():
+        print(f"Queue Wait [{priority}]: avg {wait['avg']:.2f}s, max {wait['max']:.2f}s ({wait['count']} queries)")
+    if "workers" in summary:
+        print(f"Worker Processes: {summary['workers']} "
+              f"({summary['worker_crashes']} crashed, {summary['requeued']} queries requeued)")
+    analytics = summary.get("analytics")
+    if analytics:
+        if analytics["categories"]:
+            print("Categories: " + ", ".join(f"{name} {count}" for name, count in analytics["categories"].items()))
+        if analytics["confidence_p50"] is not None:
+            print(f"Confidence p50: {analytics['confidence_p50']:.2f}")
+        if analytics["latency_p50"] is not None:
+            print(f"Latency p50/p95: {analytics['latency_p50']:.2f}s / {analytics['latency_p95']:.2f}s")
+        print(f"Escalation Rate Alerts: {analytics['alerts_fired']}")
+    print("="*40)
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import load_config
+
+class FaqCascade:
+    """
+    Tiered model routing for the FAQ stage (agents.faq_agent.cascade)
+
+    Models are tried cheapest first. A tier's answer is accepted when it
+    parsed cleanly, its confidence clears agents.faq_agent.confidence_threshold
+    and its category is a known FAQ category; otherwise the query is re-run
+    on the next tier. The last tier's answer is always accepted.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Load the tier list, acceptance threshold and model pricing
+
+        Args:
+            config: Parsed configuration (default: config/config.yaml)
+        """
+        config = load_config() if config is None else config
+        faq_agent = (config.get("agents", {}) or {}).get("faq_agent", {}) or {}
+        cascade = faq_agent.get("cascade", {}) or {}
+        openai = (config.get("api", {}) or {}).get("openai", {}) or {}
+
+        self.models: List[str] = list(cascade.get("models") or [])
+        self.enabled = bool(cascade.get("enabled", False)) and len(self.models) > 1
+        self.confidence_threshold = float(faq_agent.get("confidence_threshold", 0.6))
+        self.categories = set(config.get("faq_categories", {}) or {})
+        # USD per 1M tokens
+        self.pricing: Dict[str, Dict[str, float]] = openai.get("pricing", {}) or {}
+
+    def evaluate(self, faq_response: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        Decide whether a tier's FAQ response is good enough to keep
+
+        Returns:
+            (accepted, reason)
+        """
+        if "parse_error" in faq_response or "answer" not in faq_response:
+            return False, "unparseable response"
+        confidence = faq_response.get("confidence")
+        if confidence is None or confidence < self.confidence_threshold:
+            return False, f"confidence {confidence} below {self.confidence_threshold}"
+        category = faq_response.get("category", "unknown")
+        if category not in self.categories:
+            return False, f"unknown category '{category}'"
+        return True, f"confidence {confidence} with category '{category}'"
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+        """
+        Estimated USD cost of a call, or None when the model has no pricing entry
+        """
+        price = self.pricing.get(model)
+        if not price:
+            return None
+        return (prompt_tokens * float(price.get("prompt", 0)) +
+                completion_tokens * float(price.get("completion", 0))) / 1_000_000
+
+@lru_cache(maxsize=None)
+def get_faq_cascade() -> FaqCascade:
+    """
+    Shared FAQ cascade settings loaded once per process from config.yaml
+    """
+    return FaqCascade()
@@ -1,11 +1,29 @@
 import time
 import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from crewai import Crew, Process
 from agents.faq_agent import create_faq_agent
 from agents.escalation_agent import create_escalation_agent
 from agents.logging_agent import create_logging_agent
-from tasks.task import create_faq_task, create_escalation_task, create_logging_task
+from agents.support_agent import create_support_agent
+from tasks.task import create_faq_task, create_escalation_task, create_logging_task, create_support_task
+from config.settings import get_setting
+from crew.rules import get_rule_engine
+from crew.interaction_log import create_interaction_logger
+from crew.response_cache import get_response_cache
+from crew.metrics import TOKEN_BUCKETS, StageRecorder, get_metrics
+from crew.parsing import get_output_parser
+from crew.cascade import get_faq_cascade
+from crew.microbatch import get_faq_batcher
+from crew.deadline import Deadline, DeadlineExceeded, deadline_scope
+from crew.knowledge_base import get_knowledge_base
+from crew.sessions import get_session_store
+from crew.output import INFO, WARNING, ERROR, get_output
+from tasks.prompts import prompt_estimate
+from llm.factory import create_llm, stage_max_tokens
+from llm.instrumented import InstrumentedLLM
 from typing import Dict, Any, Optional
 
 class CustomerSupportCrew:
@@ -17,63 +35,375 @@ class CustomerSupportCrew:
         """
         Initialize the customer support crew with all agents
         """
-        self.faq_agent = create_faq_agent()
-        self.escalation_agent = create_escalation_agent()
-        self.logging_agent = create_logging_agent()
+        # OpenAI (api.openai.model) or the local mock backend in mock mode, one per
+        # model and completion limit (api.openai.stage_max_tokens)
+        self._llms: Dict[tuple, Any] = {}
+        
+        # Status lines go through the non-blocking output layer; CrewAI's own
+        # agent output only at the "verbose" level (workflow.verbose_output)
+        self.output = get_output()
+        verbose = self.output.agent_verbose
+        
+        # Per-stage latency/token instrumentation (monitoring.track_response_times)
+        self.track_response_times = get_setting("monitoring.track_response_times", True)
+        self.recorder = StageRecorder()
+        
+        self.faq_agent = create_faq_agent(self._stage_llm("faq"), verbose)
+        self.escalation_agent = create_escalation_agent(self._stage_llm("escalation"), verbose)
+        
+        # "sequential" runs FAQ then escalation; "fused" asks one agent for both
+        self.process_type = get_setting("workflow.process_type", "sequential")
+        self.support_agent = create_support_agent(self._stage_llm("support"), verbose)
+        
+        # Interactions are logged natively; the LLM logging agent is opt-in
+        self.use_llm_logging = get_setting("agents.logging_agent.use_llm", False)
+        self.logging_agent = (
+            create_logging_agent(self._stage_llm("logging"), verbose) if self.use_llm_logging else None
+        )
+        self.interaction_logger = create_interaction_logger()
+        
+        # Repeated and near-duplicate questions reuse a prior FAQ response
+        self.response_cache = get_response_cache()
+        
+        # Local FAQ entries ground the FAQ prompt, or answer outright on a near-exact match
+        self.knowledge_base = get_knowledge_base()
+        self.cache_min_confidence = get_setting("agents.faq_agent.confidence_threshold", 0.6)
+        
+        # Earlier turns of a session are injected into the FAQ and escalation prompts
+        self.session_store = get_session_store()
+        
+        # Clear-cut escalations (lawsuit, urgent, ...) are decided locally
+        self.rule_engine = get_rule_engine()
+        self.rule_fast_path = get_setting("agents.escalation_agent.rule_fast_path", True)
+        
+        # Balanced-brace JSON extraction validated against per-stage schemas
+        self.output_parser = get_output_parser()
+        
+        # FAQ cascade: cheap model first, larger models only when it is not confident
+        self.faq_cascade = get_faq_cascade()
+        self.faq_tier_agents = []
+        if self.faq_cascade.enabled:
+            default_model = get_setting("api.openai.model", "gpt-4o")
+            for model in self.faq_cascade.models:
+                agent = (self.faq_agent if model == default_model
+                         else create_faq_agent(self._stage_llm("faq", model), verbose))
+                self.faq_tier_agents.append((model, agent))
+        
+        # Concurrent queries share one structured FAQ call (agents.faq_agent.micro_batch)
+        self.faq_batcher = get_faq_batcher()
+        
+        agents = [self.faq_agent, self.escalation_agent, self.support_agent]
+        if self.logging_agent is not None:
+            agents.append(self.logging_agent)
+        self._stage_by_role = {
+            agent.role: stage
+            for agent, stage in zip(agents, ["faq", "escalation", "support", "logging"])
+        }
+        agents.extend(agent for _, agent in self.faq_tier_agents if agent is not self.faq_agent)
         
         self.crew = Crew(
-            agents=[self.faq_agent, self.escalation_agent, self.logging_agent],
+            agents=agents,
             process=Process.sequential,
-            verbose=True
+            verbose=verbose,
+            task_callback=self._on_task_complete
         )
+        
+        # Per-query deadline (workflow.max_execution_time) split across the LLM stages
+        self.max_execution_time = float(get_setting("workflow.max_execution_time", 30) or 0)
+        self.stage_time_shares = get_setting("workflow.stage_time_shares", None)
+        self._deadline: Optional[Deadline] = None
+        self._kickoff_stages = []
+        self._stage_outputs: Dict[str, str] = {}
+        self._prompt_estimates: Dict[str, Dict[str, int]] = {}
+        # Kickoffs run on this thread so a query can return at its deadline even if a call hangs
+        self._kickoff_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kickoff")
+        self._abandoned_kickoff = None
+        
+        # Agents and the Crew are built once; only the task list changes per query
+        self._busy = threading.Lock()
+    
+    def reset(self) -> None:
+        """
+        Drop per-query state (tasks, stage timings) so the crew can serve the next query
+        """
+        self.crew.tasks = []
+        self.recorder.reset()
+        self._deadline = None
+        self._kickoff_stages = []
+        self._stage_outputs = {}
+        self._prompt_estimates = {}
+    
+    @property
+    def pending_kickoff(self) -> Optional[Future]:
+        """
+        Kickoff abandoned at a deadline that is still running on this crew, if any
+        
+        The crew resets itself once it finishes; until then it must not be reused.
+        """
+        future = self._abandoned_kickoff
+        return future if future is not None and not future.done() else None
+    
+    def _stage_llm(self, stage: str, model: Optional[str] = None):
+        """
+        LLM for one stage's agent, wrapped for instrumentation when enabled
+        
+        Args:
+            stage: Stage the agent's calls are attributed to
+            model: Model other than api.openai.model (FAQ cascade tiers)
+        """
+        key = (model, stage_max_tokens(stage))
+        if key not in self._llms:
+            self._llms[key] = create_llm(*key)
+        llm = self._llms[key]
+        if not self.track_response_times:
+            return llm
+        return InstrumentedLLM(llm, stage, self.recorder)
+    
+    def _note_prompt(self, stage: str, task) -> None:
+        """
+        Keep the estimated prompt tokens (cacheable prefix and per-query tail) of a stage's task
+        """
+        estimate = prompt_estimate(task.agent, task)
+        self._prompt_estimates[stage] = estimate
+        if self.track_response_times:
+            metrics = get_metrics()
+            metrics.observe("crew_prompt_estimated_tokens", estimate["prefix"], TOKEN_BUCKETS, stage=stage, part="prefix")
+            metrics.observe("crew_prompt_estimated_tokens", estimate["tail"], TOKEN_BUCKETS, stage=stage, part="tail")
+    
+    def _on_task_complete(self, task_output) -> None:
+        """
+        Crew task callback: keep the stage output, start the next stage's
+        time budget and close the wall-time window of the finished stage
+        """
+        stage = self._stage_by_role.get(getattr(task_output, "agent", ""), "unknown")
+        self._stage_outputs[stage] = getattr(task_output, "raw", "")
+        if self._kickoff_stages:
+            self._kickoff_stages.pop(0)
+            if self._kickoff_stages and self._deadline is not None:
+                self._deadline.enter(self._kickoff_stages[0])
+        if self.track_response_times:
+            self.recorder.task_completed(stage)
     
-    def process_customer_query(self, customer_query: str, user_id: str = "anonymous", session_id: str = "") -> Dict[str, Any]:
+    def _kickoff(self, tasks: list, stages: list):
+        """
+        Run tasks on the crew within the query deadline
+        
+        Each task's stage gets its share of the remaining time as it starts;
+        LLM backends time out in-flight calls at the end of that share. The
+        kickoff runs on the crew's kickoff thread, so even a backend that
+        cannot be cancelled only delays it: at the deadline the kickoff is
+        abandoned and DeadlineExceeded raised, and the crew stays busy until
+        the abandoned kickoff returns.
+        
+        Args:
+            tasks: Tasks to run, in order
+            stages: Stage of each task
+        """
+        self.crew.tasks = tasks
+        self._kickoff_stages = list(stages)
+        self.recorder.mark()
+        deadline = self._deadline
+        with self.recorder.timed("kickoff"):
+            if deadline is None:
+                return self.crew.kickoff()
+            deadline.enter(stages[0])
+            deadline.check()
+            
+            def run():
+                with deadline_scope(deadline):
+                    return self.crew.kickoff()
+            
+            future = self._kickoff_executor.submit(run)
+            try:
+                # A little grace so a backend timeout surfaces as its own DeadlineExceeded
+                return future.result(timeout=deadline.remaining() + 0.05)
+            except FutureTimeoutError:
+                self._abandoned_kickoff = future
+                raise DeadlineExceeded(f"{deadline.stage} stage did not return within the deadline",
+                                       deadline.stage) from None
+    
+    def _release(self) -> None:
+        self.reset()
+        self._busy.release()
+    
+    def process_customer_query(self, customer_query: str, user_id: str = "anonymous", session_id: str = "",
+                               process_type: Optional[str] = None,
+                               deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
         """
         Process a customer query through the complete support workflow
         
         Args:
             customer_query: The customer's question or concern
             user_id: Unique identifier for the customer (default: "anonymous")
-            session_id: Session identifier for tracking (default: "")
+            session_id: Session identifier; with the session store enabled, earlier
+                turns of the same user's session are given to the agents (default: "")
+            process_type: "sequential" or "fused" (default: workflow.process_type)
+            deadline_seconds: Time budget for this query, 0 for none
+                (default: workflow.max_execution_time)
         
         Returns:
-            Complete interaction result with all agent responses
+            Complete interaction result with all agent responses. When the
+            deadline runs out the result is degraded but valid, with
+            "timed_out" set (see _degraded_result).
         """
         start_time = time.time()
+        process_type = process_type or self.process_type
+        if process_type not in ("sequential", "fused"):
+            raise ValueError(f"Unknown process type: {process_type}")
+        if deadline_seconds is None:
+            deadline_seconds = self.max_execution_time
+        
+        deadline = Deadline(deadline_seconds, self.stage_time_shares) if deadline_seconds else None
+        
+        # crew.tasks is per-query state: concurrent callers need one crew each (see CrewPool).
+        # Only wait for the lock while an abandoned (timed out) kickoff winds down.
+        if not self._busy.acquire(blocking=False):
+            wait = deadline.remaining() if deadline is not None else -1
+            if self._abandoned_kickoff is None or not self._busy.acquire(timeout=wait):
+                raise RuntimeError("Crew is already processing a query; use a CrewPool for concurrent callers")
+        self._abandoned_kickoff = None
+        self.recorder.reset()
+        self._deadline = deadline
+        rule_decision = cached_faq = kb_faq = routed_faq = faq_routing = faq_batch = history = None
         
         try:
-            print(f"\n🎯 Processing Customer Query: {customer_query}")
-            print(f"👤 User ID: {user_id}")
-            print(f"📅 Timestamp: {datetime.now().isoformat()}")
-            print("=" * 60)
+            self.output.emit("query_started",
+                             "\n🎯 Processing Customer Query: {query}\n👤 User ID: {user_id}\n" + "=" * 60,
+                             query=customer_query, user_id=user_id, session_id=session_id)
+            
+            # Skip the escalation LLM call when a keyword rule clearly fires
+            rule_decision = self.rule_engine.decide(customer_query) if self.rule_fast_path else None
+            
+            history = self.session_store.context(user_id, session_id) if self.session_store else None
+            if history:
+                self.output.emit("session_context", "🧵 Session context: {turns} earlier turn(s)",
+                                 turns=history["turn_count"])
+            
+            # A follow-up turn can depend on the earlier ones, so its answer is never reused:
+            # with history the knowledge base only grounds the FAQ prompt
+            cached_faq = self.response_cache.get(customer_query) if self.response_cache and not history else None
+            
+            kb_matches = []
+            if cached_faq is None and self.knowledge_base is not None:
+                kb_matches = self.knowledge_base.search(customer_query)
+                kb_faq = self.knowledge_base.direct_answer(kb_matches) if not history else None
+            known_faq = cached_faq if cached_faq is not None else kb_faq
+            
+            # The fused single-call pipeline only pays off when both stages need the LLM
+            fused = process_type == "fused" and known_faq is None and rule_decision is None
+            
+            faq_stages = (["faq"] + ([] if rule_decision else ["escalation"]) +
+                          (["logging"] if self.use_llm_logging else []))
+            
+            # Micro-batching answers the FAQ stage together with other in-flight queries;
+            # prompts with session history are personal and go through the single-query path
+            batch_tiers = None
+            if self.faq_batcher is not None and known_faq is None and not fused and not history:
+                if self._deadline is not None:
+                    self._deadline.plan(faq_stages)
+                    self._deadline.enter("faq")
+                batched = self.faq_batcher.submit(
+                    customer_query, kb_matches,
+                    timeout=self._deadline.stage_remaining() if self._deadline is not None else None,
+                )
+                if batched is None:
+                    if self._deadline is not None:
+                        self._deadline.check()
+                else:
+                    accepted, reason = (self.faq_cascade.evaluate(batched["faq_response"])
+                                        if self.faq_tier_agents else (True, "schema valid"))
+                    faq_batch = {name: batched[name] for name in ("model", "batch_size", "latency")}
+                    faq_batch["accepted"] = accepted
+                    if accepted:
+                        routed_faq = batched["faq_response"]
+                        self.output.emit("faq_batched", "📦 FAQ answered in a batch of {size} by {model}",
+                                         size=batched["batch_size"], model=batched["model"])
+                    elif batched["model"] == self.faq_tier_agents[0][0]:
+                        # The batch was the cascade's first tier: continue with the next one
+                        batch_tiers = [self._batch_tier(batched, reason)]
+            
+            # The cascade answers the FAQ stage up front, tier by tier
+            if self.faq_tier_agents and known_faq is None and routed_faq is None and not fused:
+                if self._deadline is not None:
+                    # Every tier shares the FAQ stage's time budget
+                    self._deadline.plan(faq_stages)
+                routed_faq, faq_routing = self._run_faq_cascade(customer_query, kb_matches, history, batch_tiers)
             
             # Create the workflow tasks
-            faq_task = create_faq_task(self.faq_agent, customer_query)
-            escalation_task = create_escalation_task(self.escalation_agent, "{faq_response}", customer_query)
-            logging_task = create_logging_task(self.logging_agent, customer_query, "{faq_response}", "{escalation_decision}")
+            tasks = []
+            if fused:
+                tasks.append(create_support_task(self.support_agent, customer_query, kb_matches, history))
+                faq_input = "{faq_response}"
+            elif known_faq is None and routed_faq is None:
+                faq_task = create_faq_task(self.faq_agent, customer_query, kb_matches, history)
+                tasks.append(faq_task)
+                faq_input = "{faq_response}"
+            else:
+                if cached_faq is not None:
+                    self.output.emit("faq_cache_hit", "♻️  FAQ response served from cache")
+                elif kb_faq is not None:
+                    self.output.emit("faq_kb_answer", "📚 FAQ answered from knowledge base entry {entry}",
+                                     entry=kb_faq["kb_entry"])
+                faq_input = json.dumps(known_faq if known_faq is not None else routed_faq)
             
-            # Set task dependencies
-            escalation_task.context = [faq_task]
-            logging_task.context = [faq_task, escalation_task]
+            if rule_decision is None and not fused:
+                escalation_task = create_escalation_task(self.escalation_agent, faq_input, customer_query, history)
+                escalation_task.context = list(tasks)
+                tasks.append(escalation_task)
+            elif rule_decision is not None:
+                self.output.emit("escalation_rule", "⚡ Escalation rule fired: {rules}",
+                                 rules=", ".join(rule_decision["matched_rules"]))
             
-            tasks = [faq_task, escalation_task, logging_task]
+            if self.use_llm_logging:
+                escalation_input = "{escalation_decision}" if rule_decision is None else json.dumps(rule_decision)
+                if fused:
+                    faq_input = escalation_input = "{support_response}"
+                logging_task = create_logging_task(self.logging_agent, customer_query, faq_input, escalation_input)
+                logging_task.context = list(tasks)
+                tasks.append(logging_task)
             
-            # Execute the crew workflow
-            self.crew.tasks = tasks
-            results = self.crew.kickoff()
+            # Execute the crew workflow (nothing to run when cache and rules cover both stages)
+            if tasks:
+                stages = [self._stage_by_role.get(task.agent.role, "unknown") for task in tasks]
+                for task, stage in zip(tasks, stages):
+                    self._note_prompt(stage, task)
+                if self._deadline is not None:
+                    self._deadline.plan(stages)
+                results = self._kickoff(tasks, stages)
+            else:
+                results = []
             
             processing_time = time.time() - start_time
             
             # Parse and structure the results
-            final_result = self._structure_results(
-                results, customer_query, user_id, session_id, processing_time
-            )
+            with self.recorder.timed("structure_results"):
+                final_result = self._structure_results(
+                    results, customer_query, user_id, session_id, processing_time, rule_decision, cached_faq, fused,
+                    routed_faq, faq_routing, kb_faq, kb_matches, history, faq_batch
+                )
+            self._remember_turn(final_result)
+            if final_result.get("success"):
+                final_result["prompt_estimates"] = dict(self._prompt_estimates)
+            
+            if self.track_response_times:
+                final_result["stage_metrics"] = self.recorder.to_dict()
+                metrics = get_metrics()
+                self.recorder.publish(metrics)
+                metrics.observe("crew_query_duration_seconds", processing_time)
             
-            print(f"\n✅ Query processed successfully in {processing_time:.2f} seconds")
-            self._print_summary(final_result)
+            self.output.emit("query_completed", "\n✅ Query processed successfully in {seconds:.2f} seconds",
+                             seconds=processing_time)
+            self._emit_summary(final_result)
             
             return final_result
             
+        except DeadlineExceeded as e:
+            self.output.emit("deadline_exceeded", "⏱️  Deadline exceeded: {error}", WARNING,
+                             error=str(e), stage=e.stage)
+            result = self._degraded_result(customer_query, user_id, session_id, start_time, process_type, e.stage,
+                                           rule_decision, cached_faq, routed_faq, faq_routing, kb_faq)
+            self._remember_turn(result)
+            return result
         except Exception as e:
             error_result = {
                 "success": False,
@@ -84,12 +414,128 @@ class CustomerSupportCrew:
                 "processing_time": time.time() - start_time
             }
             
-            print(f"❌ Error processing query: {e}")
+            if self.track_response_times:
+                get_metrics().inc("crew_query_errors_total")
+            
+            self.output.emit("query_failed", "❌ Error processing query: {error}", ERROR, error=str(e))
             return error_result
+        finally:
+            if self._abandoned_kickoff is not None:
+                # The kickoff thread still uses the crew: hand it the lock to release
+                self._abandoned_kickoff.add_done_callback(lambda _: self._release())
+            else:
+                self._release()
     
-    def _structure_results(self, results, customer_query: str, user_id: str, session_id: str, processing_time: float) -> Dict[str, Any]:
+    def _run_faq_cascade(self, customer_query: str, kb_matches: Optional[list] = None,
+                         history: Optional[Dict[str, Any]] = None, tiers: Optional[list] = None) -> tuple:
+        """
+        Answer the FAQ stage on the cheapest model tier that is confident enough
+        
+        Args:
+            customer_query: The customer's question
+            kb_matches: Knowledge base entries to ground every tier's prompt
+            history: Earlier turns of the session, given to every tier
+            tiers: Tiers already tried (a rejected micro-batch answer); the cascade resumes after them
+        
+        Returns:
+            (faq_response, routing) where routing records, for every tier
+            tried, its latency, tokens, estimated cost and why it was accepted
+            or rejected
+        """
+        metrics = get_metrics()
+        tiers = list(tiers or [])
+        faq_response: Dict[str, Any] = {}
+        for index, (model, agent) in enumerate(self.faq_tier_agents[len(tiers):], len(tiers)):
+            before = dict(self.recorder.stages.get("faq", {}))
+            start = time.perf_counter()
+            task = create_faq_task(agent, customer_query, kb_matches, history)
+            self._note_prompt("faq", task)
+            output = self._kickoff([task], ["faq"])
+            latency = time.perf_counter() - start
+            
+            raw = output.tasks_output[0].raw if getattr(output, "tasks_output", None) else str(output)
+            faq_response = self._parse_agent_output(raw, "faq")
+            accepted, reason = self.faq_cascade.evaluate(faq_response)
+            if not accepted and index == len(self.faq_tier_agents) - 1:
+                accepted, reason = True, f"last tier ({reason})"
+            
+            # Crew-reported usage, or our own per-call counts for backends that report none
+            token_usage = self._token_usage(output)
+            prompt_tokens, completion_tokens = token_usage["prompt_tokens"], token_usage["completion_tokens"]
+            if not token_usage["total_tokens"]:
+                after = self.recorder.stages.get("faq", {})
+                prompt_tokens = after.get("prompt_tokens", 0) - before.get("prompt_tokens", 0)
+                completion_tokens = after.get("completion_tokens", 0) - before.get("completion_tokens", 0)
+            
+            tiers.append({
+                "model": model,
+                "latency": latency,
+                "confidence": faq_response.get("confidence"),
+                "category": faq_response.get("category"),
+                "accepted": accepted,
+                "reason": reason,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": self.faq_cascade.cost(model, prompt_tokens, completion_tokens),
+                "token_usage": token_usage,
+            })
+            metrics.observe("crew_faq_tier_seconds", latency, model=model)
+            metrics.inc("crew_faq_tier_decisions_total", model=model, outcome="accepted" if accepted else "rejected")
+            if accepted:
+                break
+        
+        costs = [tier["cost_usd"] for tier in tiers if tier["cost_usd"] is not None]
+        routing = {
+            "accepted_model": tiers[-1]["model"],
+            "tiers_tried": len(tiers),
+            "escalated_to_larger_model": len(tiers) > 1,
+            "total_latency": sum(tier["latency"] for tier in tiers),
+            "total_cost_usd": sum(costs) if costs else None,
+            "tiers": tiers,
+        }
+        self.output.emit("faq_routed", "🪜 FAQ answered by {model} after {tiers} tier(s)",
+                         model=routing["accepted_model"], tiers=len(tiers))
+        return faq_response, routing
+    
+    def _batch_tier(self, batched: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        """
+        Cascade tier record of a micro-batched FAQ answer that was not accepted
+        
+        The batch's tokens are shared by all its queries, so none are attributed here.
+        """
+        faq_response = batched["faq_response"]
+        return {
+            "model": batched["model"],
+            "latency": batched["latency"],
+            "confidence": faq_response.get("confidence"),
+            "category": faq_response.get("category"),
+            "accepted": False,
+            "reason": f"{reason} (batch of {batched['batch_size']})",
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": None,
+            "token_usage": self._token_usage(None),
+        }
+    
+    def _structure_results(self, results, customer_query: str, user_id: str, session_id: str, processing_time: float,
+                           rule_decision: Optional[Dict[str, Any]] = None,
+                           cached_faq: Optional[Dict[str, Any]] = None, fused: bool = False,
+                           routed_faq: Optional[Dict[str, Any]] = None,
+                           faq_routing: Optional[Dict[str, Any]] = None,
+                           kb_faq: Optional[Dict[str, Any]] = None,
+                           kb_matches: Optional[list] = None,
+                           history: Optional[Dict[str, Any]] = None,
+                           faq_batch: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Structure the crew results into a comprehensive response
+        
+        Task outputs arrive in workflow order: FAQ (skipped when cached_faq,
+        kb_faq or routed_faq is given), then escalation (skipped when rule_decision
+        is given), then logging (only when the LLM logging agent is enabled).
+        Otherwise the interaction is logged here. In fused mode a single
+        support task output is split into the FAQ and escalation parts.
+        Answers that depended on session history are not cached. faq_batch
+        describes the micro-batched call that answered (or first tried) the FAQ.
         """
         try:
             # Extract results from each task
@@ -102,24 +548,71 @@ class CustomerSupportCrew:
                 task_results = [str(results)]
             
             # Parse individual agent outputs
-            faq_response = self._parse_agent_output(task_results[0] if len(task_results) > 0 else "")
-            escalation_decision = self._parse_agent_output(task_results[1] if len(task_results) > 1 else "")
-            logging_result = self._parse_agent_output(task_results[2] if len(task_results) > 2 else "")
+            task_results = list(task_results)
+            if fused:
+                faq_response, escalation_decision = self._split_support_output(
+                    self._parse_agent_output(task_results.pop(0) if task_results else "", "support")
+                )
+            else:
+                if cached_faq is not None:
+                    faq_response = cached_faq
+                elif kb_faq is not None:
+                    faq_response = kb_faq
+                elif routed_faq is not None:
+                    faq_response = routed_faq
+                else:
+                    faq_response = self._parse_agent_output(task_results.pop(0) if task_results else "", "faq")
+                
+                if rule_decision is None:
+                    escalation_decision = self._parse_agent_output(
+                        task_results.pop(0) if task_results else "", "escalation"
+                    )
+                else:
+                    escalation_decision = dict(rule_decision)
+                    escalation_decision["confidence_score"] = faq_response.get("confidence")
+                    if escalation_decision.get("category") == "unknown":
+                        escalation_decision["category"] = faq_response.get("category", "unknown")
             
-            return {
+            if cached_faq is None and kb_faq is None and not history:
+                self._cache_faq_response(customer_query, faq_response)
+            
+            token_usage = self._token_usage(results)
+            for tier in (faq_routing or {}).get("tiers", []):
+                for field, count in tier["token_usage"].items():
+                    token_usage[field] += count
+            
+            result = {
                 "success": True,
                 "customer_query": customer_query,
                 "user_id": user_id,
                 "session_id": session_id,
                 "timestamp": datetime.now().isoformat(),
                 "processing_time": processing_time,
+                "process_type": "fused" if fused else "sequential",
+                "token_usage": token_usage,
                 "faq_response": faq_response,
+                "faq_cache_hit": cached_faq is not None,
+                "faq_routing": faq_routing,
+                "faq_batch": faq_batch,
+                "kb_matches": [
+                    {"id": match["id"], "similarity": match["similarity"]} for match in kb_matches or []
+                ],
+                "session_turns": history["turn_count"] if history else 0,
                 "escalation_decision": escalation_decision,
-                "logging_result": logging_result,
                 "final_status": self._determine_final_status(escalation_decision),
                 "recommended_action": self._get_recommended_action(escalation_decision, faq_response)
             }
             
+            if self.use_llm_logging:
+                result["logging_result"] = self._parse_agent_output(
+                    task_results.pop(0) if task_results else "", "logging"
+                )
+                self.interaction_logger.observe(result)
+            else:
+                result["logging_result"] = self.interaction_logger.log_interaction(result)
+            
+            return result
+            
         except Exception as e:
             return {
                 "success": False,
@@ -131,29 +624,152 @@ class CustomerSupportCrew:
                 "processing_time": processing_time
             }
     
-    def _parse_agent_output(self, output: str) -> Dict[str, Any]:
+    def _degraded_result(self, customer_query: str, user_id: str, session_id: str, start_time: float,
+                         process_type: str, stage: Optional[str], rule_decision: Optional[Dict[str, Any]] = None,
+                         cached_faq: Optional[Dict[str, Any]] = None, routed_faq: Optional[Dict[str, Any]] = None,
+                         faq_routing: Optional[Dict[str, Any]] = None,
+                         kb_faq: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        Parse agent output, handling both JSON and plain text responses
+        Build a valid response for a query that ran out of time
+        
+        When an FAQ answer is ready (cache, knowledge base, cascade or a finished FAQ task)
+        it is returned with a rule-based escalation decision: the keyword
+        rules if one fires, else escalation on low FAQ confidence. Without an
+        answer the query is escalated to a human automatically with
+        final_status "escalated_to_human_timeout".
         """
-        if not output:
-            return {"raw_output": "No output received"}
+        faq_response = cached_faq or kb_faq or routed_faq
+        if faq_response is None and self._stage_outputs.get("support"):
+            support_output = self._parse_agent_output(self._stage_outputs["support"], "support")
+            faq_response, _ = self._split_support_output(support_output)
+        elif faq_response is None and self._stage_outputs.get("faq"):
+            faq_response = self._parse_agent_output(self._stage_outputs["faq"], "faq")
+        if faq_response is not None and "answer" not in faq_response:
+            faq_response = None
         
-        try:
-            # Try to parse as JSON first
-            if isinstance(output, dict):
-                return output
-            elif isinstance(output, str):
-                # Look for JSON in the output
-                import re
-                json_match = re.search(r'\{.*\}', output, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group())
-                else:
-                    return {"raw_output": output.strip()}
+        rule_decision = rule_decision or self.rule_engine.decide(customer_query)
+        if faq_response is not None:
+            if rule_decision is not None:
+                escalation_decision = dict(rule_decision)
             else:
-                return {"raw_output": str(output)}
-        except (json.JSONDecodeError, AttributeError):
-            return {"raw_output": str(output)}
+                confidence = faq_response.get("confidence")
+                escalate = confidence is None or confidence < self.rule_engine.low_confidence_threshold
+                escalation_decision = {
+                    "escalate": escalate,
+                    "reason": "Timed out before the escalation decision; " + (
+                        "low confidence FAQ response" if escalate else "FAQ response is confident"
+                    ),
+                    "priority": "normal" if escalate else "low",
+                    "category": faq_response.get("category", "unknown"),
+                    "human_agent_suggestion": "general_support",
+                    "decided_by": "deadline_fallback",
+                }
+            escalation_decision["confidence_score"] = faq_response.get("confidence")
+            final_status = self._determine_final_status(escalation_decision)
+        else:
+            faq_response = {}
+            escalation_decision = {
+                "escalate": True,
+                "reason": f"Timed out in the {stage or 'query'} stage before an answer was ready",
+                "priority": (rule_decision or {}).get("priority", "normal"),
+                "confidence_score": None,
+                "category": (rule_decision or {}).get("category", "unknown"),
+                "human_agent_suggestion": (rule_decision or {}).get("human_agent_suggestion", "general_support"),
+                "decided_by": "deadline",
+            }
+            final_status = "escalated_to_human_timeout"
+        
+        processing_time = time.time() - start_time
+        result = {
+            "success": True,
+            "customer_query": customer_query,
+            "user_id": user_id,
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "processing_time": processing_time,
+            "process_type": process_type,
+            "token_usage": self._token_usage(None),
+            "faq_response": faq_response,
+            "faq_cache_hit": cached_faq is not None,
+            "faq_routing": faq_routing,
+            "escalation_decision": escalation_decision,
+            "final_status": final_status,
+            "recommended_action": self._get_recommended_action(escalation_decision, faq_response),
+            "timed_out": True,
+            "timed_out_stage": stage,
+        }
+        result["logging_result"] = self.interaction_logger.log_interaction(result)
+        
+        metrics = get_metrics()
+        metrics.inc("crew_deadline_exceeded_total", stage=stage or "unknown")
+        if self.track_response_times:
+            result["stage_metrics"] = self.recorder.to_dict()
+            self.recorder.publish(metrics)
+            metrics.observe("crew_query_duration_seconds", processing_time)
+        self._emit_summary(result)
+        return result
+    
+    def _remember_turn(self, result: Dict[str, Any]) -> None:
+        """
+        Add an answered query to its session so follow-ups get the context
+        """
+        if self.session_store is None or not result.get("success"):
+            return
+        self.session_store.record(result["user_id"], result.get("session_id", ""), result["customer_query"],
+                                  result.get("faq_response"), result.get("escalation_decision"))
+    
+    def _split_support_output(self, support_output: Dict[str, Any]) -> tuple:
+        """
+        Split a fused support response into FAQ and escalation parts
+        """
+        if "answer" not in support_output and "escalate" not in support_output:
+            return support_output, dict(support_output)
+        
+        faq_response = {
+            key: support_output[key]
+            for key in ("answer", "confidence", "category", "raw_output", "parse_error")
+            if key in support_output
+        }
+        escalation_decision = {
+            key: support_output[key]
+            for key in ("escalate", "reason", "priority", "category", "human_agent_suggestion")
+            if key in support_output
+        }
+        escalation_decision["confidence_score"] = support_output.get("confidence")
+        return faq_response, escalation_decision
+    
+    def _token_usage(self, results) -> Dict[str, int]:
+        """
+        Token counts reported by the crew run (zeros when nothing ran)
+        """
+        usage = getattr(results, "token_usage", None)
+        return {
+            field: int(getattr(usage, field, 0) or 0)
+            for field in ("prompt_tokens", "completion_tokens", "total_tokens", "successful_requests")
+        }
+    
+    def _cache_faq_response(self, customer_query: str, faq_response: Dict[str, Any]) -> None:
+        """
+        Cache confident, well-formed FAQ responses for near-duplicate queries
+        """
+        if self.response_cache is None or "answer" not in faq_response:
+            return
+        try:
+            confidence = float(faq_response.get("confidence", 0))
+        except (TypeError, ValueError):
+            return
+        if confidence >= self.cache_min_confidence:
+            self.response_cache.put(customer_query, faq_response)
+    
+    def _parse_agent_output(self, output: str, stage: str) -> Dict[str, Any]:
+        """
+        Parse an agent output into the validated JSON object for its stage
+        
+        Malformed output comes back with "raw_output" and "parse_error" and is
+        counted in crew_parse_failures_total (see crew/parsing.py).
+        """
+        with self.recorder.timed("parse_agent_output"):
+            return self.output_parser.parse(output, stage)
     
     def _determine_final_status(self, escalation_decision: Dict[str, Any]) -> str:
         """
@@ -180,26 +796,36 @@ class CustomerSupportCrew:
             else:
                 return "Response provided - monitor for customer satisfaction"
     
-    def _print_summary(self, result: Dict[str, Any]) -> None:
+    def _emit_summary(self, result: Dict[str, Any]) -> None:
         """
-        Print a formatted summary of the interaction results
+        Emit the interaction summary (only formatted when the output level shows it)
         """
-        print("\n📊 INTERACTION SUMMARY")
-        print("=" * 40)
-        
-        faq = result.get("faq_response", {})
-        escalation = result.get("escalation_decision", {})
-        
-        print(f"Query: {result.get('customer_query', 'N/A')[:80]}...")
-        print(f"FAQ Confidence: {faq.get('confidence', 'N/A')}")
-        print(f"Category: {faq.get('category', 'N/A')}")
-        print(f"Escalated: {'Yes' if escalation.get('escalate') else 'No'}")
-        if escalation.get("escalate"):
-            print(f"Escalation Reason: {escalation.get('reason', 'N/A')}")
-            print(f"Priority: {escalation.get('priority', 'N/A')}")
-        print(f"Processing Time: {result.get('processing_time', 0):.2f}s")
-        print(f"Final Status: {result.get('final_status', 'N/A')}")
-        print("=" * 40)
+        if self.output.enabled(INFO):
+            self.output.emit("interaction_summary", format_interaction_summary(result),
+                             final_status=result.get("final_status"))
+
+def format_interaction_summary(result: Dict[str, Any]) -> str:
+    """
+    Human-readable summary of a query result
+    """
+    faq = result.get("faq_response", {}) or {}
+    escalation = result.get("escalation_decision", {}) or {}
+    
+    lines = [
+        "\n📊 INTERACTION SUMMARY",
+        "=" * 40,
+        f"Query: {result.get('customer_query', 'N/A')[:80]}...",
+        f"FAQ Confidence: {faq.get('confidence', 'N/A')}",
+        f"Category: {faq.get('category', 'N/A')}",
+        f"Escalated: {'Yes' if escalation.get('escalate') else 'No'}",
+    ]
+    if escalation.get("escalate"):
+        lines.append(f"Escalation Reason: {escalation.get('reason', 'N/A')}")
+        lines.append(f"Priority: {escalation.get('priority', 'N/A')}")
+    lines.append(f"Processing Time: {result.get('processing_time', 0):.2f}s")
+    lines.append(f"Final Status: {result.get('final_status', 'N/A')}")
+    lines.append("=" * 40)
+    return "\n".join(lines)
 
 def create_customer_support_crew() -> CustomerSupportCrew:
     """
@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+DEFAULT_STAGE_SHARES = {"faq": 0.45, "escalation": 0.35, "support": 0.8, "logging": 0.2}
+
+class DeadlineExceeded(TimeoutError):
+    """
+    A query or one of its stages ran out of time
+    """
+
+    def __init__(self, message: str, stage: Optional[str] = None):
+        super().__init__(message)
+        self.stage = stage
+
+class Deadline:
+    """
+    Per-query time budget split across the stages that will call the LLM
+
+    plan() lists the stages in order. When a stage is entered it gets the
+    share of the *remaining* time given by its weight relative to the
+    stages still ahead of it, so time left over by a fast stage rolls over
+    to the later ones. LLM backends read the current stage's remaining time
+    (via current_deadline()) to time out in-flight calls.
+    """
+
+    def __init__(self, seconds: float, stage_shares: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            seconds: Total budget for the query
+            stage_shares: Relative weight of each stage (default: DEFAULT_STAGE_SHARES)
+        """
+        self.seconds = float(seconds)
+        self.start = time.monotonic()
+        self.end = self.start + self.seconds
+        self.stage_shares = stage_shares or DEFAULT_STAGE_SHARES
+        self.stage: Optional[str] = None
+        self._stage_end = self.end
+        self._pending: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.end - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.end
+
+    def plan(self, stages: Sequence[str]) -> None:
+        """
+        Declare the stages still to run, in order
+        """
+        self._pending = [stage for stage in stages if stage != self.stage]
+
+    def enter(self, stage: str) -> None:
+        """
+        Start `stage` and fix its share of the remaining time (no-op if already current)
+        """
+        if stage == self.stage:
+            return
+        if stage in self._pending:
+            self._pending = self._pending[self._pending.index(stage) + 1:]
+        share = self.stage_shares.get(stage, 1.0)
+        ahead = share + sum(self.stage_shares.get(name, 1.0) for name in self._pending)
+        self.stage = stage
+        self._stage_end = time.monotonic() + self.remaining() * (share / ahead if ahead else 1.0)
+
+    def stage_remaining(self) -> float:
+        """
+        Seconds left for the current stage (never beyond the query deadline)
+        """
+        return max(0.0, min(self._stage_end, self.end) - time.monotonic())
+
+    def check(self) -> None:
+        """
+        Raise DeadlineExceeded when the current stage is out of time
+        """
+        if self.stage_remaining() <= 0:
+            raise DeadlineExceeded(f"{self.stage or 'query'} stage exceeded its time budget", self.stage)
+
+_local = threading.local()
+
+def current_deadline() -> Optional[Deadline]:
+    """
+    Deadline of the query running on this thread, if any
+    """
+    return getattr(_local, "deadline", None)
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[None]:
+    """
+    Make `deadline` visible to LLM calls made on this thread
+    """
+    previous = current_deadline()
+    _local.deadline = deadline
+    try:
+        yield
+    finally:
+        _local.deadline = previous
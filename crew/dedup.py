@@ -0,0 +1,233 @@
+import re
+from datetime import datetime
+from typing import Dict, Any, FrozenSet, List, Optional, Sequence, Tuple
+
+from config.settings import get_setting
+from crew.interaction_log import create_interaction_logger
+from crew.scheduler import classify_priority
+from crew.similarity import LSHIndex, MinHasher, jaccard, normalize_query, query_tokens
+from crew.similarity import extract_masked_fields, find_masked_fields
+
+class QueryClusterer:
+    """
+    Group batch queries that differ only in order details or minor wording
+
+    Queries are compared after masking order numbers, emails and dates;
+    any other number stays part of the query. Identical masked text clusters directly; otherwise MinHash
+    LSH proposes earlier clusters whose representative is then checked with
+    exact token Jaccard. Queries only cluster when they have the same arrival
+    priority and the same kinds of masked fields in the same order, so a
+    member's own values can always be restored in the shared answer.
+    """
+
+    def __init__(self, similarity_threshold: Optional[float] = None, num_perm: int = 64, bands: int = 16):
+        """
+        Args:
+            similarity_threshold: Minimum token Jaccard for a near-duplicate
+                (default: batch_dedup.similarity_threshold)
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by bands)
+        """
+        if similarity_threshold is None:
+            similarity_threshold = get_setting("batch_dedup.similarity_threshold", 0.85)
+        self.similarity_threshold = float(similarity_threshold)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.hasher = MinHasher(num_perm)
+
+    def cluster(self, queries: Sequence[Tuple[str, str, str]]) -> List[List[int]]:
+        """
+        Cluster (query, user_id, session_id) items
+
+        Returns:
+            Lists of input indexes; the first index of each cluster is its
+            representative, and clusters are ordered by that index
+        """
+        clusters: List[List[int]] = []
+        exact: Dict[Tuple[Any, ...], int] = {}
+        representative_tokens: Dict[int, FrozenSet[str]] = {}
+        indexes: Dict[Tuple[Any, ...], LSHIndex] = {}
+
+        for index, (customer_query, _, _) in enumerate(queries):
+            masked_kinds = tuple(kind for kind, _ in extract_masked_fields(customer_query))
+            group = (classify_priority(customer_query), masked_kinds)
+            exact_key = group + (normalize_query(customer_query),)
+            cluster_id = exact.get(exact_key)
+
+            tokens, signature = None, None
+            if cluster_id is None:
+                tokens = query_tokens(customer_query)
+                signature = self.hasher.signature(tokens)
+                if tokens and self.similarity_threshold < 1.0 and group in indexes:
+                    best_similarity = 0.0
+                    for candidate in indexes[group].candidates(signature):
+                        similarity = jaccard(tokens, representative_tokens[int(candidate)])
+                        if similarity >= self.similarity_threshold and similarity > best_similarity:
+                            cluster_id, best_similarity = int(candidate), similarity
+
+            if cluster_id is None:
+                cluster_id = len(clusters)
+                clusters.append([])
+                representative_tokens[cluster_id] = tokens
+                indexes.setdefault(group, LSHIndex(self.num_perm, self.bands)).add(str(cluster_id), signature)
+            exact.setdefault(exact_key, cluster_id)
+            clusters[cluster_id].append(index)
+
+        return clusters
+
+# Keys fan_out sets for the member itself; the representative's values are never shared
+MEMBER_FIELDS = ("customer_query", "user_id", "session_id", "timestamp", "processing_time")
+
+def _canonical(value: str) -> str:
+    """
+    A masked value with "#" and whitespace dropped and case folded, so "#CS 12345" equals "cs12345"
+    """
+    return re.sub(r"[#\s]", "", value).casefold()
+
+def _pair_fields(representative_query: str, member_query: str) -> Tuple[Optional[Dict[str, str]],
+                                                                      List[Tuple[str, str]]]:
+    """
+    Map the representative's masked values to the member's, pairing the n-th value of each kind
+
+    Returns:
+        (canonical representative value -> member value, or None if one
+        value would need two different replacements; (kind, value) of every
+        representative value that must not remain in the member's answer,
+        i.e. changed ones and those the member has no counterpart for)
+    """
+    member_values: Dict[str, List[str]] = {}
+    for kind, value in extract_masked_fields(member_query):
+        member_values.setdefault(kind, []).append(value)
+    replacements: Dict[str, str] = {}
+    leftovers: List[Tuple[str, str]] = []
+    for kind, old in extract_masked_fields(representative_query):
+        values = member_values.get(kind)
+        if not values:
+            leftovers.append((kind, old))
+            continue
+        new = values.pop(0)
+        if _canonical(replacements.setdefault(_canonical(old), new)) != _canonical(new):
+            return None, leftovers
+        if _canonical(old) != _canonical(new):
+            leftovers.append((kind, old))
+    return replacements, leftovers
+
+def _strings(value: Any):
+    """
+    Every string inside a result value
+    """
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+def _mentions(text: str, leftovers: List[Tuple[str, str]]) -> bool:
+    """
+    Whether text still refers to one of the representative's values in any format
+
+    Order numbers are matched by their digit run, so "CS12345", "#CS 12345"
+    and a bare "12345" all count; emails and dates by their canonical form.
+    """
+    folded = _canonical(text)
+    for kind, value in leftovers:
+        if kind == "order_number":
+            if any(re.search(rf"(?<!\d){digits}(?!\d)", text) for digits in re.findall(r"\d{3,}", value)):
+                return True
+        elif _canonical(value) in folded:
+            return True
+    return False
+
+def _substitute(value: Any, replacements: Dict[str, str]) -> Any:
+    """
+    Swap representative values for the member's in the masked fields of every string of a result
+
+    Fields are compared in canonical form; a "#" is only kept where the answer used one.
+    """
+    if isinstance(value, str):
+        for start, end, _, old in reversed(find_masked_fields(value)):
+            new = replacements.get(_canonical(old))
+            if new is not None:
+                if not old.startswith("#"):
+                    new = new.lstrip("#").lstrip()
+                value = value[:start] + new + value[end:]
+        return value
+    if isinstance(value, dict):
+        return {key: _substitute(item, replacements) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, replacements) for item in value]
+    return value
+
+def fan_out(result: Dict[str, Any], representative: Tuple[str, str, str], member: Tuple[str, str, str],
+            representative_number: int) -> Optional[Dict[str, Any]]:
+    """
+    Build a cluster member's result from its representative's result
+
+    Args:
+        result: Successful result of the representative query
+        representative: (query, user_id, session_id) that was processed
+        member: (query, user_id, session_id) receiving the answer
+        representative_number: 1-based batch position of the representative
+
+    Returns:
+        The representative's answer and escalation decision with the
+        member's own order numbers, emails and dates restored, its own
+        query, user and session, and "duplicate_of"/"time_saved" set; None
+        when any reference to the representative's values is left after
+        the rewrite, so the member has to be processed on its own
+    """
+    replacements, leftovers = _pair_fields(representative[0], member[0])
+    if replacements is None:
+        return None
+    member_result = _substitute({
+        key: value for key, value in result.items()
+        if key not in ("stage_metrics", "logging_result") + MEMBER_FIELDS
+    }, replacements)
+    if any(_mentions(text, leftovers) for text in _strings(member_result)):
+        return None
+
+    member_result.update({
+        "customer_query": member[0],
+        "user_id": member[1],
+        "session_id": member[2],
+        "timestamp": datetime.now().isoformat(),
+        "processing_time": 0.0,
+        "duplicate_of": representative_number,
+        "time_saved": float(result.get("processing_time", 0.0) or 0.0),
+    })
+    return member_result
+
+def expand_clusters(queries: Sequence[Tuple[str, str, str]], clusters: List[List[int]],
+                    representative_results: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Fan representative results out to every cluster member, in input order
+
+    Members are logged like processed queries. Members of a failed
+    representative are not given the failure, and members whose answer
+    fan_out can't rewrite safely are not given the representative's; their
+    indexes are returned so the caller can process them individually.
+
+    Returns:
+        (results with {} for unresolved members, unresolved member indexes)
+    """
+    logger = create_interaction_logger()
+    results: List[Dict[str, Any]] = [{} for _ in queries]
+    unresolved: List[int] = []
+    for members, result in zip(clusters, representative_results):
+        representative_index = members[0]
+        results[representative_index] = result
+        for member_index in members[1:]:
+            if not result.get("success"):
+                unresolved.append(member_index)
+                continue
+            member_result = fan_out(result, queries[representative_index], queries[member_index],
+                                    representative_index + 1)
+            if member_result is None:
+                unresolved.append(member_index)
+                continue
+            member_result["logging_result"] = logger.log_interaction(member_result)
+            results[member_index] = member_result
+    return results, sorted(unresolved)
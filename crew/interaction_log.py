@@ -0,0 +1,341 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, Any, Optional
+
+from config.settings import get_setting
+from crew.analytics import InteractionAnalytics, get_analytics
+from crew.metrics import get_metrics
+from crew.output import WARNING, emit
+
+_STOP = object()
+
+class InteractionLogWriter:
+    """
+    Append-only JSONL interaction log with a background writer thread
+
+    Callers only enqueue records; the writer thread batches them into the
+    file, fsyncs once per batch (or flush interval) and rotates the file
+    when it reaches max_entries, max_bytes or rotate_interval seconds.
+    Rotated files older than retention_days are deleted. Disk errors are
+    reported through the status output and the affected records dropped;
+    writing resumes once the file can be opened again.
+    """
+
+    def __init__(self, file_path: str, max_entries: int = 1000, retention_days: int = 90,
+                 max_bytes: int = 10 * 1024 * 1024, rotate_interval: float = 24 * 3600,
+                 flush_interval: float = 1.0, flush_batch_size: int = 64):
+        """
+        Args:
+            file_path: Active JSONL log file
+            max_entries: Records per file before rotating
+            retention_days: Age after which rotated files are removed
+            max_bytes: File size before rotating
+            rotate_interval: Seconds a file stays active before rotating
+            flush_interval: Maximum seconds between fsyncs
+            flush_batch_size: Records written before forcing an fsync
+        """
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._entries = 0
+        self._opened_at = 0.0
+        self._forward: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._failing = False
+        self._dropped = 0
+
+    def forward_to(self, sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """
+        Hand records to `sink` instead of the file (None writes to the file again)
+
+        Worker processes forward their records to the parent, which owns
+        the file, so shards never append to or rotate the same log.
+        """
+        self._forward = sink
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Queue a record for the writer thread (never blocks on disk I/O)
+        """
+        if self._forward is not None:
+            self._forward(record)
+            return
+        self._ensure_started()
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record queued so far is on disk
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Flush pending records and stop the writer thread
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="interaction-log", daemon=True)
+                self._thread.start()
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = 0
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'rb') as f:
+                self._entries = sum(1 for _ in f)
+        self._file = open(self.file_path, 'ab')
+        self._opened_at = time.time()
+
+    def _sync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _should_rotate(self) -> bool:
+        return (
+            self._entries >= self.max_entries
+            or self._file.tell() >= self.max_bytes
+            or time.time() - self._opened_at >= self.rotate_interval
+        ) and self._entries > 0
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._file.close()
+        self._file = None
+
+        base, ext = os.path.splitext(self.file_path)
+        rotated = f"{base}-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}{ext}"
+        os.replace(self.file_path, rotated)
+        self._purge_expired()
+        self._open()
+
+    def _purge_expired(self) -> None:
+        base, ext = os.path.splitext(self.file_path)
+        cutoff = time.time() - self.retention_days * 86400
+        for path in glob.glob(f"{glob.escape(base)}-*{ext}"):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        """
+        Writer thread: drain the queue into the file until close()
+
+        Disk errors never stop the thread, so the queue keeps draining.
+        Records of a failed write are dropped and counted, one warning is
+        emitted per outage, and the file is reopened for the next record.
+        """
+        unsynced = 0
+        last_sync = time.time()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                try:
+                    self._sync()
+                    if self._file is not None:
+                        self._file.close()
+                except OSError as e:
+                    self._write_failed(e, unsynced)
+                self._file = None
+                return
+
+            pending = unsynced
+            try:
+                if isinstance(item, threading.Event):
+                    self._sync()
+                    unsynced = 0
+                    last_sync = time.time()
+                elif item is not None:
+                    pending += 1
+                    if self._file is None:
+                        self._open()
+                        self._purge_expired()
+                    line = json.dumps(item, default=str) + "\n"
+                    self._file.write(line.encode('utf-8'))
+                    self._entries += 1
+                    unsynced += 1
+
+                if unsynced and (unsynced >= self.flush_batch_size or time.time() - last_sync >= self.flush_interval):
+                    self._sync()
+                    unsynced = 0
+                    last_sync = time.time()
+
+                if self._file is not None and self._should_rotate():
+                    self._rotate()
+                    unsynced = 0
+                    last_sync = time.time()
+
+                if self._failing and item is not None and not isinstance(item, threading.Event):
+                    self._failing = False
+                    emit("interaction_log_recovered", "📝 Interaction log {path} is writable again "
+                         "({dropped} record(s) dropped)", path=self.file_path, dropped=self._dropped)
+            except OSError as e:
+                self._write_failed(e, pending)
+                unsynced = 0
+                last_sync = time.time()
+            finally:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write_failed(self, error: OSError, records: int) -> None:
+        """
+        Drop the open file after a disk error and report the outage once
+        """
+        self._dropped += records
+        get_metrics().inc("interaction_log_write_errors_total")
+        if records:
+            get_metrics().inc("interaction_log_dropped_records_total", records)
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+        if not self._failing:
+            self._failing = True
+            emit("interaction_log_failed", "⚠️  Interaction log write to {path} failed: {error}; "
+                 "records are dropped until it is writable again", WARNING, path=self.file_path, error=str(error))
+
+class InteractionLogger:
+    """
+    Native replacement for the LLM logging task
+
+    Builds the interaction record locally and hands it to the shared
+    InteractionLogWriter. Returns the same fields the LoggingAgent used to
+    produce (logged, interaction_id, timestamp, analytics, log_location).
+    Every interaction also updates the analytics rollups.
+    """
+
+    def __init__(self, writer: Optional[InteractionLogWriter], include_metadata: bool = True,
+                 analytics: Optional[InteractionAnalytics] = None):
+        self.writer = writer
+        self.include_metadata = include_metadata
+        self.analytics = analytics
+
+    def observe(self, result: Dict[str, Any]) -> None:
+        """
+        Update the analytics rollups without writing a log record
+        """
+        if self.analytics is not None:
+            self.analytics.record(result)
+
+    def log_interaction(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Record a structured interaction result
+        """
+        timestamp = datetime.now()
+        interaction_id = f"INT-{timestamp.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        faq = result.get("faq_response", {}) or {}
+        escalation = result.get("escalation_decision", {}) or {}
+        analytics = {
+            "escalated": bool(escalation.get("escalate", False)),
+            "confidence_score": faq.get("confidence"),
+            "category": faq.get("category", "unknown"),
+            "priority": escalation.get("priority") if escalation.get("escalate") else None,
+            "final_status": result.get("final_status"),
+        }
+        self.observe(result)
+
+        if self.writer is None:
+            return {
+                "logged": False,
+                "interaction_id": interaction_id,
+                "timestamp": timestamp.isoformat(),
+                "analytics": analytics,
+                "log_location": None
+            }
+
+        record = {
+            "interaction_id": interaction_id,
+            "timestamp": timestamp.isoformat(),
+            "user_id": result.get("user_id"),
+            "session_id": result.get("session_id"),
+            "customer_query": result.get("customer_query"),
+            "faq_response": faq,
+            "escalation_decision": escalation,
+            "analytics": analytics,
+        }
+        if self.include_metadata:
+            record["metadata"] = {
+                "processing_time": result.get("processing_time"),
+                "recommended_action": result.get("recommended_action"),
+            }
+        self.writer.write(record)
+
+        return {
+            "logged": True,
+            "interaction_id": interaction_id,
+            "timestamp": timestamp.isoformat(),
+            "analytics": analytics,
+            "log_location": self.writer.file_path
+        }
+
+@lru_cache(maxsize=None)
+def get_interaction_log_writer() -> Optional[InteractionLogWriter]:
+    """
+    Process-wide log writer configured from config.yaml (None if file logging is off)
+    """
+    if not get_setting("agents.logging_agent.log_to_file", True):
+        return None
+
+    writer = InteractionLogWriter(
+        file_path=get_setting("logging.file_path", "logs/customer_interactions.jsonl"),
+        max_entries=int(get_setting("agents.logging_agent.max_log_entries", 1000)),
+        retention_days=int(get_setting("logging.retention_days", 90)),
+        max_bytes=int(get_setting("logging.rotate_max_bytes", 10 * 1024 * 1024)),
+        rotate_interval=float(get_setting("logging.rotate_interval_hours", 24)) * 3600,
+        flush_interval=float(get_setting("logging.flush_interval", 1.0)),
+        flush_batch_size=int(get_setting("logging.flush_batch_size", 64)),
+    )
+    atexit.register(writer.close)
+    return writer
+
+def create_interaction_logger() -> InteractionLogger:
+    """
+    Factory for the native logging stage
+    """
+    return InteractionLogger(
+        get_interaction_log_writer(),
+        include_metadata=get_setting("logging.include_metadata", True),
+        analytics=get_analytics()
+    )
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import math
+import os
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import yaml
+
+from config.settings import get_setting
+from crew.metrics import get_metrics
+from crew.output import WARNING, emit
+from crew.similarity import STOPWORDS, TOKEN_PATTERN, normalize_query
+
+# Bump when tokenization or weighting changes so persisted indexes are rebuilt
+INDEX_VERSION = 1
+
+def kb_tokens(text: str) -> List[str]:
+    """
+    Content-word tokens of a normalized text, with plural "s" stripped (repeats kept)
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(normalize_query(text)):
+        token = token.strip("'")
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+class FaqKnowledgeBase:
+    """
+    Local FAQ entries with a TF-IDF retrieval index
+
+    Entries are indexed on their question and keywords with sublinear term
+    frequency and smoothed IDF, rows L2-normalized, so a query's score
+    against an entry is a cosine similarity in [0, 1]. Query terms the index
+    has never seen still count towards the query's norm, which keeps
+    similarity low for questions the knowledge base does not cover.
+
+    The index is persisted in `index_dir` term-major (one row of entry
+    weights per term) and memory-mapped on load; it is rebuilt only when the
+    knowledge base file changes, so restarts don't pay for indexing.
+    """
+
+    def __init__(self, path: str, index_dir: Optional[str] = None, top_k: int = 3, min_similarity: float = 0.2,
+                 direct_answer_threshold: float = 0.85):
+        """
+        Args:
+            path: YAML file with an "entries" list (id, category, question, answer, keywords)
+            index_dir: Directory for the persisted index (None keeps it in memory only)
+            top_k: Entries returned by search()
+            min_similarity: Entries scoring below this are not returned
+            direct_answer_threshold: Similarity at which an entry answers the query without the LLM
+        """
+        self.path = path
+        self.index_dir = index_dir
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.direct_answer_threshold = direct_answer_threshold
+        self.metrics = get_metrics()
+
+        with open(path, 'rb') as f:
+            source = f.read()
+        self.fingerprint = hashlib.sha256(source + f":{INDEX_VERSION}".encode('utf-8')).hexdigest()
+        if not self._load():
+            self._build(yaml.safe_load(source) or {})
+            self._save()
+
+    def _build(self, data: Dict[str, Any]) -> None:
+        self.entries: List[Dict[str, Any]] = [
+            {
+                "id": str(entry.get("id", index)),
+                "category": entry.get("category", "unknown"),
+                "question": entry["question"],
+                "answer": entry["answer"],
+            }
+            for index, entry in enumerate(data.get("entries", []) or [])
+        ]
+        documents = [
+            Counter(kb_tokens(entry["question"] + " " + " ".join(raw.get("keywords", []) or [])))
+            for entry, raw in zip(self.entries, data.get("entries", []) or [])
+        ]
+        vocabulary = sorted({token for document in documents for token in document})
+        self.vocabulary = {token: column for column, token in enumerate(vocabulary)}
+
+        count = len(documents)
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float32)
+        for document in documents:
+            for token in document:
+                document_frequency[self.vocabulary[token]] += 1
+        self.idf = (np.log((1 + count) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.unseen_idf = float(math.log(1 + count) + 1)
+
+        weights = np.zeros((len(vocabulary), count), dtype=np.float32)
+        for row, document in enumerate(documents):
+            for token, frequency in document.items():
+                column = self.vocabulary[token]
+                weights[column, row] = (1 + math.log(frequency)) * self.idf[column]
+        norms = np.linalg.norm(weights, axis=0)
+        weights /= np.where(norms > 0, norms, 1)
+        self.term_weights = weights
+
+    def _paths(self) -> Dict[str, str]:
+        return {
+            "meta": os.path.join(self.index_dir, "meta.json"),
+            "idf": os.path.join(self.index_dir, "idf.npy"),
+            "weights": os.path.join(self.index_dir, "term_weights.npy"),
+        }
+
+    def _load(self) -> bool:
+        """
+        Memory-map the persisted index if it was built from the current file
+        """
+        if not self.index_dir:
+            return False
+        paths = self._paths()
+        try:
+            with open(paths["meta"], 'r') as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") != self.fingerprint:
+                return False
+            self.entries = meta["entries"]
+            self.vocabulary = {token: column for column, token in enumerate(meta["vocabulary"])}
+            self.unseen_idf = float(meta["unseen_idf"])
+            self.idf = np.load(paths["idf"], mmap_mode="r")
+            self.term_weights = np.load(paths["weights"], mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return False
+        return self.term_weights.shape == (len(self.vocabulary), len(self.entries))
+
+    def _save(self) -> None:
+        if not self.index_dir:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        paths = self._paths()
+        # Arrays first, metadata (which carries the fingerprint) last, each via an atomic rename
+        for name, array in (("idf", self.idf), ("weights", self.term_weights)):
+            tmp_path = paths[name] + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, paths[name])
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        tmp_path = paths["meta"] + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "fingerprint": self.fingerprint,
+                "entries": self.entries,
+                "vocabulary": vocabulary,
+                "unseen_idf": self.unseen_idf,
+            }, f)
+        os.replace(tmp_path, paths["meta"])
+
+    def search(self, customer_query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Entries most similar to the query
+
+        Returns:
+            Up to top_k entries (id, category, question, answer, similarity),
+            best first, each at least min_similarity
+        """
+        start = time.perf_counter()
+        top_k = self.top_k if top_k is None else top_k
+        counts = Counter(kb_tokens(customer_query))
+        columns, weights, norm = [], [], 0.0
+        for token, frequency in counts.items():
+            column = self.vocabulary.get(token)
+            weight = (1 + math.log(frequency)) * (self.idf[column] if column is not None else self.unseen_idf)
+            norm += weight * weight
+            if column is not None:
+                columns.append(column)
+                weights.append(weight)
+
+        matches = []
+        if columns and self.entries:
+            scores = np.asarray(weights, dtype=np.float32) @ self.term_weights[columns] / math.sqrt(norm)
+            best = np.argsort(scores)[::-1][:top_k]
+            matches = [
+                {**self.entries[row], "similarity": round(float(scores[row]), 4)}
+                for row in best
+                if scores[row] >= self.min_similarity
+            ]
+        self.metrics.observe("kb_search_seconds", time.perf_counter() - start)
+        return matches
+
+    def direct_answer(self, matches: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        FAQ response taken straight from the best match when it is similar enough
+
+        Returns:
+            {"answer", "confidence", "category", "kb_entry"} or None
+        """
+        if not matches or matches[0]["similarity"] < self.direct_answer_threshold:
+            self.metrics.inc("kb_lookups_total", outcome="grounded" if matches else "miss")
+            return None
+        self.metrics.inc("kb_lookups_total", outcome="direct")
+        best = matches[0]
+        return {
+            "answer": best["answer"],
+            "confidence": best["similarity"],
+            "category": best["category"],
+            "kb_entry": best["id"],
+        }
+
+@lru_cache(maxsize=None)
+def get_knowledge_base() -> Optional[FaqKnowledgeBase]:
+    """
+    Process-wide FAQ knowledge base configured from config.yaml (None if disabled or missing)
+    """
+    if not get_setting("knowledge_base.enabled", True):
+        return None
+    path = get_setting("knowledge_base.path", "sample_data/faq_knowledge_base.yaml")
+    if not os.path.exists(path):
+        emit("knowledge_base_missing", "⚠️  FAQ knowledge base not found at {path}", WARNING, path=path)
+        return None
+    return FaqKnowledgeBase(
+        path,
+        index_dir=get_setting("knowledge_base.index_dir") or None,
+        top_k=int(get_setting("knowledge_base.top_k", 3)),
+        min_similarity=float(get_setting("knowledge_base.min_similarity", 0.2)),
+        direct_answer_threshold=float(get_setting("knowledge_base.direct_answer_threshold", 0.85)),
+    )
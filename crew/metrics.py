@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional, Sequence, Tuple
+
+from config.settings import get_setting
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+class Histogram:
+    """
+    Fixed-bucket histogram (Prometheus cumulative semantics on export)
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process histograms and counters
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = SECONDS_BUCKETS, **labels: str) -> None:
+        """
+        Record a value in the histogram `name` with the given labels
+        """
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """
+        Increase the counter `name` with the given labels
+        """
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-serializable view of every metric
+        """
+        with self._lock:
+            return {
+                "histograms": {
+                    name: [{"labels": dict(key), **histogram.to_dict()} for key, histogram in series.items()]
+                    for name, series in self._histograms.items()
+                },
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+            }
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Add another registry's snapshot() (e.g. from a worker process) into this one
+        """
+        for name, series in snapshot.get("counters", {}).items():
+            for item in series:
+                self.inc(name, item["value"], **item["labels"])
+        with self._lock:
+            for name, series in snapshot.get("histograms", {}).items():
+                for item in series:
+                    bounds = [float(bound) for bound in item["buckets"] if bound != "+Inf"]
+                    key = tuple(sorted(item["labels"].items()))
+                    histogram = self._histograms.setdefault(name, {}).get(key)
+                    if histogram is None:
+                        histogram = self._histograms[name][key] = Histogram(bounds)
+                    previous = 0
+                    # Snapshots hold cumulative counts; histograms keep per-bucket counts
+                    for position, cumulative in enumerate(item["buckets"].values()):
+                        histogram.counts[position] += cumulative - previous
+                        previous = cumulative
+                    histogram.sum += item["sum"]
+                    histogram.count += item["count"]
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+        """
+        def label_text(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels.items()) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {name} counter")
+            for item in series:
+                lines.append(f"{name}{label_text(item['labels'])} {item['value']}")
+        for name, series in sorted(snapshot["histograms"].items()):
+            lines.append(f"# TYPE {name} histogram")
+            for item in series:
+                for bound, count in item["buckets"].items():
+                    lines.append(f"{name}_bucket{label_text(item['labels'], ('le', bound))} {count}")
+                lines.append(f"{name}_sum{label_text(item['labels'])} {item['sum']}")
+                lines.append(f"{name}_count{label_text(item['labels'])} {item['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """
+        Write metrics to `path`; ".json" files get JSON, anything else Prometheus text
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+@lru_cache(maxsize=None)
+def get_metrics() -> MetricsRegistry:
+    """
+    Process-wide metrics registry
+    """
+    return MetricsRegistry()
+
+def dump_metrics(path: Optional[str] = None) -> Optional[str]:
+    """
+    Write the process metrics to monitoring.metrics_file when performance_logging is on
+
+    Returns:
+        The path written, or None when performance logging is disabled
+    """
+    if not get_setting("monitoring.performance_logging", True):
+        return None
+    path = path or get_setting("monitoring.metrics_file", "logs/metrics.prom")
+    get_metrics().dump(path)
+    return path
+
+class StageRecorder:
+    """
+    Per-query collector for stage timings, token counts and retries
+
+    A crew serves one query at a time, so each crew owns one recorder and
+    resets it at the start of every query.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, float] = {}
+        self._last_failed: Dict[str, bool] = {}
+        self._mark = time.perf_counter()
+
+    def _stage(self, stage: str) -> Dict[str, Any]:
+        return self.stages.setdefault(stage, {
+            "wall_time": 0.0,
+            "llm_time": 0.0,
+            "ttft": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "llm_calls": 0,
+            "retries": 0,
+        })
+
+    def mark(self) -> None:
+        """
+        Start timing the next task from now
+        """
+        self._mark = time.perf_counter()
+
+    def task_completed(self, stage: str) -> None:
+        """
+        Attribute the time since the last mark to `stage`
+        """
+        now = time.perf_counter()
+        self._stage(stage)["wall_time"] += now - self._mark
+        self._mark = now
+
+    def record_llm_call(self, stage: str, duration: float, ttft: float, prompt_tokens: int,
+                        completion_tokens: int, failed: bool = False) -> None:
+        """
+        Record one model call made on behalf of `stage`
+
+        A call counts as a retry only when the stage's previous call failed;
+        later calls of a multi-call stage (tool use, cascade tiers) don't.
+        """
+        data = self._stage(stage)
+        if self._last_failed.get(stage):
+            data["retries"] += 1
+        if not failed and data["ttft"] is None:
+            data["ttft"] = ttft
+        self._last_failed[stage] = failed
+        data["llm_calls"] += 1
+        data["llm_time"] += duration
+        data["prompt_tokens"] += prompt_tokens
+        data["completion_tokens"] += completion_tokens
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        """
+        Accumulate time spent in one of our own steps (kickoff, parsing, ...)
+        """
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """
+        Time a block and add it to the step timings
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stages": self.stages, "steps": self.timings}
+
+    def publish(self, registry: MetricsRegistry) -> None:
+        """
+        Feed this query's numbers into the process histograms
+        """
+        for stage, data in self.stages.items():
+            registry.observe("crew_stage_duration_seconds", data["wall_time"], stage=stage)
+            registry.observe("crew_stage_llm_seconds", data["llm_time"], stage=stage)
+            if data["ttft"] is not None:
+                registry.observe("crew_stage_ttft_seconds", data["ttft"], stage=stage)
+            registry.observe("crew_stage_prompt_tokens", data["prompt_tokens"], TOKEN_BUCKETS, stage=stage)
+            registry.observe("crew_stage_completion_tokens", data["completion_tokens"], TOKEN_BUCKETS, stage=stage)
+            registry.inc("crew_stage_llm_calls_total", data["llm_calls"], stage=stage)
+            registry.inc("crew_stage_retries_total", data["retries"], stage=stage)
+        for name, seconds in self.timings.items():
+            registry.observe("crew_step_seconds", seconds, step=name)
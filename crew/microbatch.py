@@ -0,0 +1,266 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+from config.settings import get_setting, load_config
+from crew.deadline import Deadline, deadline_scope
+from crew.metrics import TOKEN_BUCKETS, get_metrics
+from crew.parsing import OutputParser, get_output_parser, iter_json_objects
+from llm.tokens import estimate_tokens
+from tasks.prompts import get_prompt_builder
+
+# Marks a batched FAQ prompt; the queries follow as a JSON array
+BATCH_MARKER = "Customer Query Batch (JSON):"
+
+BATCH_INSTRUCTIONS = """You are an experienced customer service representative with deep knowledge of company
+policies, procedures, and common customer concerns. You answer routine questions quickly and accurately.
+
+You are given a batch of independent customer queries, each with an id and, where available, relevant
+knowledge base entries (answer from these when they cover the question). Answer every query on its own.
+
+Respond with a single JSON object {{"results": [...]}} holding one entry per query, in any order, with:
+- id: the query's id, copied exactly
+- answer: A clear, helpful response to the customer's question
+- confidence: Your confidence level (0-1) in this response
+- category: The type of question ({categories})"""
+
+class _PendingItem:
+    """
+    One caller's query waiting for its batch
+    """
+
+    __slots__ = ("item_id", "customer_query", "kb_entries", "expires", "taken", "done", "result")
+
+    def __init__(self, customer_query: str, kb_entries: Optional[List[Dict[str, Any]]],
+                 expires: Optional[float]):
+        self.item_id = ""
+        self.customer_query = customer_query
+        self.kb_entries = kb_entries
+        self.expires = expires
+        self.taken = False
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+class FaqMicroBatcher:
+    """
+    Answer the FAQ stage of concurrent queries in one structured model call
+
+    Callers block in submit(). The first query of a batch waits up to
+    `max_wait_ms` for others to arrive; whichever caller fills the batch to
+    `max_batch_size`, or the first one once the window closes, hands the
+    whole batch to a batch thread, which sends it as a single request and
+    gives every caller its own entry of the returned array, matched by item
+    id. That request runs under the earliest deadline of the batch's
+    callers, capped at `call_timeout`, and every caller (the one that took
+    the batch included) only waits for it up to its own timeout. The
+    instructions go in one
+    static system message, so their tokens are paid once per batch rather
+    than once per query. Entries that are missing or fail the FAQ schema
+    come back as None and the caller falls back to a single call.
+    """
+
+    def __init__(self, llm: Any, model: str, max_batch_size: int = 8, max_wait_ms: float = 20.0,
+                 call_timeout: float = 30.0, max_concurrent_batches: int = 4,
+                 parser: Optional[OutputParser] = None, categories: Optional[List[str]] = None):
+        """
+        Args:
+            llm: LLM the batched calls go to (anything with call(messages))
+            model: Model name reported with each answer
+            max_batch_size: Queries per call
+            max_wait_ms: How long the first query of a batch waits for more
+            call_timeout: Upper bound in seconds on one batched call
+            max_concurrent_batches: Batched calls in flight at once
+            parser: Validates each entry against the FAQ schema (default: shared parser)
+            categories: FAQ categories listed in the instructions (default: faq_categories)
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.llm = llm
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.call_timeout = call_timeout
+        self.parser = parser or get_output_parser()
+        if categories is None:
+            categories = list(load_config().get("faq_categories", {}) or {})
+        self.instructions = BATCH_INSTRUCTIONS.format(categories=", ".join(list(categories) + ["unknown"]))
+
+        self._pending: List[_PendingItem] = []
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="faq-batch")
+        self.metrics = get_metrics()
+
+    def submit(self, customer_query: str, kb_entries: Optional[List[Dict[str, Any]]] = None,
+               timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer one query as part of a batch
+
+        Args:
+            customer_query: The customer's question
+            kb_entries: Knowledge base matches to ground the answer
+            timeout: Seconds to wait for the batch (None: no limit)
+
+        Returns:
+            {"faq_response", "model", "batch_size", "latency"}, or None when
+            the query has to be answered by a single call instead
+        """
+        item = _PendingItem(customer_query, kb_entries,
+                            time.monotonic() + timeout if timeout is not None else None)
+        batch = None
+        with self._condition:
+            self._pending.append(item)
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take()
+            elif len(self._pending) == 1:
+                # First arrival: hold the window open for the others
+                end = time.monotonic() + self.max_wait
+                while not item.taken:
+                    left = end - time.monotonic()
+                    if left <= 0:
+                        batch = self._take()
+                        break
+                    self._condition.wait(left)
+
+        if batch is not None:
+            self._executor.submit(self._run, batch)
+        if not item.done.wait(item.expires - time.monotonic() if item.expires is not None else None):
+            self.metrics.inc("crew_faq_batch_items_total", outcome="timeout")
+            return None
+        return item.result
+
+    def _take(self) -> List[_PendingItem]:
+        """
+        Claim everything pending as one batch (condition held)
+        """
+        batch, self._pending = self._pending, []
+        for number, item in enumerate(batch, 1):
+            item.item_id = f"q{number}"
+            item.taken = True
+        self._condition.notify_all()
+        return batch
+
+    def build_messages(self, batch: List[_PendingItem]) -> List[Dict[str, str]]:
+        """
+        Static instructions as the system message, the batch's queries as the user message
+        """
+        builder = get_prompt_builder()
+        items = []
+        for item in batch:
+            entry: Dict[str, Any] = {
+                "id": item.item_id,
+                "query": builder.trim("faq", "customer_query", item.customer_query),
+            }
+            if item.kb_entries:
+                entry["knowledge_base"] = [
+                    {"category": kb["category"], "question": kb["question"], "answer": kb["answer"]}
+                    for kb in item.kb_entries
+                ]
+            items.append(entry)
+        return [
+            {"role": "system", "content": self.instructions},
+            {"role": "user", "content": BATCH_MARKER + "\n" + json.dumps(items, ensure_ascii=False)},
+        ]
+
+    @staticmethod
+    def split_results(output: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Entries of a batched response by item id
+
+        Accepts {"results": [...]} as well as bare entry objects, so a
+        response cut off at the token limit still yields its complete
+        entries (the brace scan resumes inside an unbalanced outer object).
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        for span in iter_json_objects(output or ""):
+            try:
+                value = json.loads(span)
+            except ValueError:
+                continue
+            if not isinstance(value, dict):
+                continue
+            candidates = value["results"] if isinstance(value.get("results"), list) else [value]
+            for entry in candidates:
+                if isinstance(entry, dict) and entry.get("id") is not None:
+                    entries.setdefault(str(entry["id"]), entry)
+        return entries
+
+    def _run(self, batch: List[_PendingItem]) -> None:
+        """
+        Send one batch and hand each caller its validated entry (runs on a batch thread)
+
+        The call gets the time left until the earliest caller's deadline,
+        at most call_timeout; LLM backends see it through deadline_scope.
+        """
+        messages = self.build_messages(batch)
+        seconds = min([self.call_timeout] + [item.expires - time.monotonic() for item in batch
+                                             if item.expires is not None])
+        deadline = Deadline(max(0.0, seconds), {"faq": 1.0})
+        deadline.enter("faq")
+        start = time.perf_counter()
+        try:
+            with deadline_scope(deadline):
+                deadline.check()
+                output = self.llm.call(messages)
+        except Exception as e:
+            output = ""
+            self.metrics.inc("crew_faq_batch_errors_total", error=type(e).__name__)
+        latency = time.perf_counter() - start
+
+        self.metrics.inc("crew_faq_batches_total")
+        self.metrics.observe("crew_faq_batch_seconds", latency)
+        self.metrics.observe("crew_faq_batch_prompt_tokens_per_query",
+                             estimate_tokens("".join(message["content"] for message in messages)) / len(batch),
+                             TOKEN_BUCKETS)
+        try:
+            entries = self.split_results(output if isinstance(output, str) else str(output))
+            for item in batch:
+                entry = entries.get(item.item_id)
+                faq_response = None
+                if entry is not None:
+                    entry = {name: value for name, value in entry.items() if name != "id"}
+                    parsed = self.parser.parse(entry, "faq")
+                    if "parse_error" not in parsed:
+                        faq_response = parsed
+                if faq_response is not None:
+                    item.result = {
+                        "faq_response": faq_response,
+                        "model": self.model,
+                        "batch_size": len(batch),
+                        "latency": latency,
+                    }
+                self.metrics.inc("crew_faq_batch_items_total",
+                                 outcome="answered" if faq_response is not None else "fallback")
+        finally:
+            for item in batch:
+                item.done.set()
+
+@lru_cache(maxsize=None)
+def get_faq_batcher() -> Optional[FaqMicroBatcher]:
+    """
+    Process-wide FAQ micro-batcher configured from agents.faq_agent.micro_batch (None if disabled)
+
+    All crews of a process share it, so queries running concurrently in a
+    CrewPool (batch and service mode) end up in the same batches.
+    """
+    if not get_setting("agents.faq_agent.micro_batch.enabled", False):
+        return None
+    from llm.factory import create_llm
+
+    model = get_setting("agents.faq_agent.micro_batch.model", "") or None
+    if model is None:
+        cascade = get_setting("agents.faq_agent.cascade", {}) or {}
+        # Batches stand in for the cascade's first (cheapest) tier
+        if cascade.get("enabled") and len(cascade.get("models") or []) > 1:
+            model = cascade["models"][0]
+        else:
+            model = get_setting("api.openai.model", "gpt-4o")
+    return FaqMicroBatcher(
+        create_llm(model, get_setting("agents.faq_agent.micro_batch.max_tokens", 2000)),
+        model,
+        max_batch_size=int(get_setting("agents.faq_agent.micro_batch.max_batch_size", 8)),
+        max_wait_ms=float(get_setting("agents.faq_agent.micro_batch.max_wait_ms", 20)),
+        call_timeout=float(get_setting("agents.faq_agent.micro_batch.timeout_seconds", 30)),
+    )
@@ -0,0 +1,209 @@
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, TextIO
+
+from config.settings import get_setting
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+# Output level -> lowest event level shown; "verbose" also turns on CrewAI's agent output
+OUTPUT_LEVELS = {"verbose": DEBUG, "normal": INFO, "quiet": WARNING}
+
+_STOP = object()
+
+def output_level_name(value: Any = None) -> str:
+    """
+    Normalize workflow.verbose_output (true/false or a level name); CREW_OUTPUT in the environment wins
+    """
+    value = os.getenv("CREW_OUTPUT") or (get_setting("workflow.verbose_output", True) if value is None else value)
+    if isinstance(value, bool):
+        return "verbose" if value else "normal"
+    value = str(value).strip().lower()
+    if value in ("true", "false"):
+        return "verbose" if value == "true" else "normal"
+    if value not in OUTPUT_LEVELS:
+        raise ValueError(f"Unknown output level: {value} (use one of {', '.join(OUTPUT_LEVELS)})")
+    return value
+
+class ConsoleSink:
+    """
+    Human-readable lines on stdout (or another stream)
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        stream = self.stream or sys.stdout
+        stream.write("".join(event["message"] + "\n" for event in events))
+        stream.flush()
+
+    def close(self) -> None:
+        pass
+
+class JsonlSink:
+    """
+    One JSON object per event, appended to a file
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        self._file.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+class Output:
+    """
+    Leveled, non-blocking status output
+
+    emit() drops events below the current level after a single comparison
+    and otherwise only enqueues them; messages are formatted from their
+    fields and written to the sinks by a background thread in batches, so
+    concurrent queries never contend for stdout. flush() waits until
+    everything emitted so far has been written.
+    """
+
+    def __init__(self, level: str = "normal", sinks: Optional[List[Any]] = None):
+        """
+        Args:
+            level: "verbose", "normal" or "quiet"
+            sinks: Objects with write(events) and close() (default: console)
+        """
+        self.sinks = sinks if sinks is not None else [ConsoleSink()]
+        self.set_level(level)
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def set_level(self, level: str) -> None:
+        self.level_name = output_level_name(level)
+        self.threshold = OUTPUT_LEVELS[self.level_name]
+
+    @property
+    def agent_verbose(self) -> bool:
+        """
+        Whether CrewAI agents and crews are built with verbose=True
+        """
+        return self.level_name == "verbose"
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.threshold
+
+    def emit(self, event: str, message: str, level: int = INFO, **fields: Any) -> None:
+        """
+        Queue an event; message is a str.format template over fields, rendered off the caller's thread
+        """
+        if level < self.threshold:
+            return
+        if self._thread is None:
+            self._start()
+        self._queue.put((time.time(), level, event, message, fields))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Block until every event emitted so far is written
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Write pending events and stop the handler thread
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="crew-output", daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _render(item) -> Dict[str, Any]:
+        timestamp, level, event, message, fields = item
+        try:
+            text = message.format(**fields) if fields else message
+        except (KeyError, IndexError, ValueError):
+            text = message
+        return {
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            "level": LEVEL_NAMES.get(level, str(level)),
+            "event": event,
+            "message": text,
+            **fields,
+        }
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch, markers, stop = [], [], False
+            # Drain whatever else is already queued into the same write
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(self._render(item))
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception as e:
+                        sys.stderr.write(f"⚠️  Output sink failed: {e}\n")
+            for marker in markers:
+                marker.set()
+            if stop:
+                for sink in self.sinks:
+                    sink.close()
+                return
+
+@lru_cache(maxsize=None)
+def get_output() -> Output:
+    """
+    Process-wide output configured from config.yaml (workflow.verbose_output and the output section)
+    """
+    sinks = []
+    for name in get_setting("output.sinks", ["console"]) or []:
+        if name == "console":
+            sinks.append(ConsoleSink())
+        elif name == "jsonl":
+            sinks.append(JsonlSink(get_setting("output.jsonl_path", "logs/events.jsonl")))
+        else:
+            raise ValueError(f"Unknown output sink: {name}")
+    output = Output(output_level_name(), sinks)
+    atexit.register(output.close)
+    return output
+
+def emit(event: str, message: str, level: int = INFO, **fields: Any) -> None:
+    """
+    Emit through the process-wide output (see Output.emit)
+    """
+    get_output().emit(event, message, level, **fields)
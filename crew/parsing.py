@@ -0,0 +1,242 @@
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from config.settings import load_config
+from crew.metrics import get_metrics
+from crew.rules import PRIORITY_ORDER
+
+HUMAN_AGENTS = ("general_support", "technical", "billing", "manager")
+
+# Probabilities up to this are taken as slightly over 1 and clamped
+PROBABILITY_OVERSHOOT = 1.5
+# Whole numbers above this (up to 100) are read as percentages
+PERCENT_SCALE_MIN = 10
+
+# Structural characters for the brace scan: everything else is skipped in C
+_STRUCTURAL = re.compile(r'[{}"\\]')
+
+# field -> (kind, required, allowed values or None, fallback for an invalid enum value)
+FieldSpec = Tuple[str, bool, Optional[Tuple[str, ...]], Any]
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """
+    Yield every top-level brace-balanced span of `text`, in order
+
+    One pass over the text that is string- and escape-aware, so braces in
+    JSON string values don't end an object early and prose or markdown code
+    fences around the JSON are simply skipped. If a stray "{" leaves the
+    scan unbalanced, scanning resumes just after it.
+    """
+    begin = 0
+    while True:
+        depth, start, in_string, skip_to = 0, -1, False, -1
+        for found in _STRUCTURAL.finditer(text, begin):
+            position = found.start()
+            if position < skip_to:
+                continue
+            char = found.group()
+            if in_string:
+                if char == "\\":
+                    skip_to = position + 2
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = depth > 0
+            elif char == "{":
+                if depth == 0:
+                    start = position
+                depth += 1
+            elif char == "}" and depth:
+                depth -= 1
+                if depth == 0:
+                    yield text[start:position + 1]
+        if depth == 0:
+            return
+        begin = start + 1
+
+class OutputParser:
+    """
+    Extract and validate the JSON object an agent returned for its stage
+
+    Each stage has a schema of expected fields. Values are coerced to the
+    schema's types ("0.8" -> 0.8, "yes" -> True, "High" -> "high"), unknown
+    enum values fall back to a safe default, and extra fields are kept.
+    Failures never raise: the result carries "raw_output" and "parse_error",
+    plus the stage's failure defaults. For escalation that means a human
+    reviews the query instead of a missing "escalate" silently resolving it.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Build the stage schemas
+
+        Args:
+            config: Parsed configuration (default: config/config.yaml)
+        """
+        config = load_config() if config is None else config
+        categories = tuple(config.get("faq_categories", {}) or {}) + ("unknown",)
+        priorities = tuple(PRIORITY_ORDER)
+
+        faq: Dict[str, FieldSpec] = {
+            "answer": ("str", True, None, None),
+            "confidence": ("probability", False, None, None),
+            "category": ("enum", False, categories, "unknown"),
+        }
+        escalation: Dict[str, FieldSpec] = {
+            "escalate": ("bool", True, None, None),
+            "reason": ("str", False, None, None),
+            "priority": ("enum", False, priorities, "normal"),
+            "confidence_score": ("probability", False, None, None),
+            "category": ("enum", False, categories, "unknown"),
+            "human_agent_suggestion": ("enum", False, HUMAN_AGENTS, "general_support"),
+        }
+        logging: Dict[str, FieldSpec] = {
+            "logged": ("bool", True, None, None),
+            "interaction_id": ("str", False, None, None),
+            "timestamp": ("str", False, None, None),
+            "analytics": ("dict", False, None, None),
+            "log_location": ("str", False, None, None),
+        }
+        support = dict(escalation)
+        support.update(faq)
+
+        self.schemas: Dict[str, Dict[str, FieldSpec]] = {
+            "faq": faq,
+            "escalation": escalation,
+            "logging": logging,
+            "support": support,
+        }
+
+        needs_review = {
+            "escalate": True,
+            "reason": "Escalation decision could not be parsed; routing to a human for review",
+            "priority": "normal",
+            "human_agent_suggestion": "general_support",
+        }
+        self.failure_defaults: Dict[str, Dict[str, Any]] = {
+            "escalation": needs_review,
+            "support": needs_review,
+        }
+
+    def parse(self, output: Any, stage: str) -> Dict[str, Any]:
+        """
+        Parse one agent output for `stage` ("faq", "escalation", "logging" or "support")
+
+        Returns:
+            The validated, coerced object, or a failure dict with
+            "raw_output", "parse_error" and the stage's failure defaults
+        """
+        schema = self.schemas[stage]
+        metrics = get_metrics()
+
+        if isinstance(output, dict):
+            candidates: List[Dict[str, Any]] = [output]
+            text = json.dumps(output)
+        else:
+            text = "" if output is None else str(output)
+            candidates = []
+            for span in iter_json_objects(text):
+                try:
+                    value = json.loads(span)
+                except ValueError:
+                    continue
+                if isinstance(value, dict):
+                    candidates.append(value)
+
+        # Prefer the first object carrying the stage's required fields
+        required = [name for name, spec in schema.items() if spec[1]]
+        chosen = next((c for c in candidates if all(c.get(name) is not None for name in required)), None)
+        if chosen is not None or candidates:
+            parsed = self._coerce(chosen if chosen is not None else candidates[0], schema, stage)
+            missing = [name for name in required if parsed.get(name) is None]
+            if not missing:
+                return parsed
+            reason = "invalid_fields" if chosen is not None else "missing_fields"
+            error = f"{reason.replace('_', ' ')}: {', '.join(missing)}"
+            for name in missing:
+                parsed.pop(name, None)
+        elif not text.strip():
+            parsed, reason, error = {}, "empty", "no output received"
+        else:
+            parsed, reason, error = {}, "no_json", "no JSON object found"
+
+        metrics.inc("crew_parse_failures_total", stage=stage, reason=reason)
+        result = dict(self.failure_defaults.get(stage, {}))
+        result.update(parsed)
+        result["raw_output"] = text.strip() or "No output received"
+        result["parse_error"] = error
+        return result
+
+    def _coerce(self, data: Dict[str, Any], schema: Dict[str, FieldSpec], stage: str) -> Dict[str, Any]:
+        """
+        Coerce schema fields to their types; invalid optional values are dropped
+        """
+        result = dict(data)
+        for name, (kind, _, allowed, fallback) in schema.items():
+            if name not in result or result[name] is None:
+                continue
+            value = result[name]
+            try:
+                coerced = self._coerce_value(value, kind, allowed, fallback)
+            except (TypeError, ValueError):
+                del result[name]
+                get_metrics().inc("crew_parse_invalid_fields_total", stage=stage, field=name)
+                continue
+            if coerced != value or type(coerced) is not type(value):
+                get_metrics().inc("crew_parse_coerced_fields_total", stage=stage, field=name)
+            result[name] = coerced
+        return result
+
+    @staticmethod
+    def _coerce_value(value: Any, kind: str, allowed: Optional[Tuple[str, ...]], fallback: Any) -> Any:
+        if kind == "str":
+            if isinstance(value, (dict, list)):
+                return json.dumps(value)
+            return value if isinstance(value, str) else str(value)
+
+        if kind == "bool":
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, (int, float)) and value in (0, 1):
+                return bool(value)
+            text = str(value).strip().lower()
+            if text in ("true", "yes", "y", "1"):
+                return True
+            if text in ("false", "no", "n", "0"):
+                return False
+            raise ValueError(f"not a boolean: {value!r}")
+
+        if kind == "probability":
+            if isinstance(value, bool):
+                raise ValueError("boolean is not a probability")
+            if isinstance(value, str) and value.strip().endswith("%"):
+                return min(max(float(value.strip()[:-1]) / 100, 0.0), 1.0)
+            number = float(value.strip() if isinstance(value, str) else value)
+            if number != number:
+                raise ValueError("NaN probability")
+            if number > PROBABILITY_OVERSHOOT:
+                # Some models answer on a 0-100 scale; anything else above 1 is ambiguous
+                if number.is_integer() and PERCENT_SCALE_MIN < number <= 100:
+                    return number / 100
+                raise ValueError(f"probability out of range: {value!r}")
+            return min(max(number, 0.0), 1.0)
+
+        if kind == "enum":
+            text = re.sub(r"[\s-]+", "_", str(value).strip().lower())
+            return text if text in allowed else fallback
+
+        if kind == "dict":
+            if isinstance(value, dict):
+                return value
+            raise ValueError(f"not an object: {value!r}")
+
+        raise ValueError(f"unknown field kind: {kind}")
+
+@lru_cache(maxsize=None)
+def get_output_parser() -> OutputParser:
+    """
+    Shared output parser built once per process from config.yaml
+    """
+    return OutputParser()
@@ -0,0 +1,145 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from crew.crew import CustomerSupportCrew
+
+def _build_crew() -> "CustomerSupportCrew":
+    # crew.crew pulls in CrewAI, so it is imported when the first crew is built, not with the pool
+    from crew.crew import create_customer_support_crew
+    return create_customer_support_crew()
+
+class CrewPool:
+    """
+    Bounded pool of independent CustomerSupportCrew instances
+
+    Building a crew (LLM client, agents, Crew) is far more expensive than a
+    query's own setup, so crews are built once and reused. Lifecycle:
+
+    - build: lazily on first demand until `size` instances exist, or all at
+      once with warm()
+    - hand out: acquire() gives each caller its own crew, since a crew's task
+      list is per-query state and must never serve two queries at once
+    - reset: returned crews drop their per-query state; a crew that fails to
+      reset is replaced with a freshly built one, and a crew whose kickoff was
+      abandoned at a deadline only returns once that kickoff has finished
+    """
+
+    def __init__(self, size: int, factory: Optional[Callable[[], "CustomerSupportCrew"]] = None):
+        """
+        Args:
+            size: Maximum number of crews (and therefore concurrent queries)
+            factory: Callable that builds a fresh crew (default: create_customer_support_crew)
+        """
+        if size < 1:
+            raise ValueError("Crew pool size must be at least 1")
+        self.size = size
+        self._factory = factory or _build_crew
+        self._idle: "queue.LifoQueue[CustomerSupportCrew]" = queue.LifoQueue()
+        self._created = 0
+        self._built = 0
+        self._lock = threading.Lock()
+
+    def _build(self) -> "CustomerSupportCrew":
+        crew = self._factory()
+        with self._lock:
+            self._built += 1
+        return crew
+
+    def _checkout(self, timeout: Optional[float]) -> "CustomerSupportCrew":
+        """
+        Take an idle crew, building one if the pool has not reached its size
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            build = self._created < self.size
+            if build:
+                self._created += 1
+        if build:
+            try:
+                return self._build()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No crew available within {timeout} seconds")
+
+    def warm(self) -> int:
+        """
+        Build every remaining crew now so the first requests don't pay construction
+
+        Each crew becomes available as soon as it is built, so when warming
+        runs in the background early requests only wait for the first one.
+
+        Returns:
+            Number of crews built
+        """
+        built = 0
+        with self._lock:
+            missing = self.size - self._created
+            self._created = self.size
+        try:
+            for _ in range(missing):
+                self._idle.put(self._build())
+                built += 1
+        except Exception:
+            with self._lock:
+                self._created -= missing - built
+            raise
+        return built
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator["CustomerSupportCrew"]:
+        """
+        Borrow a crew for the duration of one query
+        """
+        crew = self._checkout(timeout)
+        try:
+            yield crew
+        finally:
+            self.release(crew)
+
+    def release(self, crew: "CustomerSupportCrew") -> None:
+        """
+        Reset a borrowed crew and make it available again
+        """
+        pending = crew.pending_kickoff
+        if pending is not None:
+            # The crew resets itself when the kickoff ends (its callback runs first)
+            pending.add_done_callback(lambda _: self._idle.put(crew))
+            return
+        try:
+            crew.reset()
+        except Exception:
+            try:
+                crew = self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                    self._built -= 1
+                return
+        self._idle.put(crew)
+
+    @property
+    def created(self) -> int:
+        """
+        Crews built so far (idle plus borrowed)
+        """
+        return self._created
+
+    @property
+    def built(self) -> int:
+        """
+        Crews actually constructed so far; lags `created` while crews are being built
+        """
+        return self._built
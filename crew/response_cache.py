@@ -0,0 +1,221 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+from config.settings import get_setting
+from crew.output import WARNING, emit
+from crew.similarity import LSHIndex, MinHasher, jaccard, query_tokens
+
+class ResponseCache:
+    """
+    Near-duplicate cache for FAQ responses
+
+    Queries are reduced to a content-word token set with order numbers,
+    emails and dates removed. An exact token-set match is a dict lookup;
+    otherwise MinHash/LSH candidates are verified with exact Jaccard
+    similarity against `similarity_threshold`. Entries are evicted LRU
+    once `max_entries` is reached and expire after `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600, similarity_threshold: float = 0.8,
+                 persist_path: Optional[str] = None, num_perm: int = 64, bands: int = 16):
+        """
+        Args:
+            max_entries: Maximum cached responses before LRU eviction
+            ttl_seconds: Lifetime of a cached response
+            similarity_threshold: Minimum Jaccard similarity for a near-duplicate hit
+            persist_path: JSON file to load from and save to (None disables persistence)
+            num_perm: MinHash signature length
+            bands: LSH bands (num_perm must be divisible by bands)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.persist_path = persist_path
+
+        self._hasher = MinHasher(num_perm)
+        self._index = LSHIndex(num_perm, bands)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def _key(tokens) -> str:
+        return " ".join(sorted(tokens))
+
+    def get(self, customer_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a cached FAQ response for the query or a near-duplicate of it
+        """
+        tokens = query_tokens(customer_query)
+        key = self._key(tokens)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["created_at"] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+
+            if entry is None and tokens:
+                best_key, best_score = None, self.similarity_threshold
+                for candidate in self._index.candidates(self._hasher.signature(tokens)):
+                    candidate_entry = self._entries[candidate]
+                    if now - candidate_entry["created_at"] > self.ttl_seconds:
+                        continue
+                    score = jaccard(tokens, candidate_entry["tokens"])
+                    if score >= best_score:
+                        best_key, best_score = candidate, score
+                if best_key is not None:
+                    key, entry = best_key, self._entries[best_key]
+                    self.near_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return dict(entry["response"])
+
+    def put(self, customer_query: str, faq_response: Dict[str, Any]) -> None:
+        """
+        Cache an FAQ response for the query
+        """
+        tokens = query_tokens(customer_query)
+        if not tokens:
+            return
+        key = self._key(tokens)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            signature = self._hasher.signature(tokens)
+            self._entries[key] = {
+                "tokens": tokens,
+                "signature": signature,
+                "response": dict(faq_response),
+                "created_at": time.time(),
+            }
+            self._index.add(key, signature)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._index.remove(key, entry["signature"])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def export(self) -> List[Dict[str, Any]]:
+        """
+        Unexpired entries in their JSON form, least recently used first
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                {"tokens": sorted(entry["tokens"]), "response": entry["response"], "created_at": entry["created_at"]}
+                for entry in self._entries.values()
+                if now - entry["created_at"] <= self.ttl_seconds
+            ]
+
+    def merge(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Add exported entries, skipping expired ones and keeping the newer of two for the same query
+        """
+        now = time.time()
+        with self._lock:
+            for item in entries:
+                if now - item.get("created_at", 0) > self.ttl_seconds:
+                    continue
+                tokens = frozenset(item["tokens"])
+                key = self._key(tokens)
+                if key in self._entries:
+                    if self._entries[key]["created_at"] >= item["created_at"]:
+                        continue
+                    self._remove(key)
+                signature = self._hasher.signature(tokens)
+                self._entries[key] = {
+                    "tokens": tokens,
+                    "signature": signature,
+                    "response": item["response"],
+                    "created_at": item["created_at"],
+                }
+                self._index.add(key, signature)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def save(self) -> None:
+        """
+        Write unexpired entries to persist_path (LRU order preserved)
+        """
+        if not self.persist_path:
+            return
+        entries = self.export()
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"entries": entries}, f)
+        os.replace(tmp_path, self.persist_path)
+
+    def load(self) -> None:
+        """
+        Warm the cache from persist_path, skipping expired entries
+        """
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            emit("response_cache_load_failed", "⚠️  Could not load response cache: {error}", WARNING, error=str(e))
+            return
+        self.merge(data.get("entries", []))
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide FAQ response cache configured from config.yaml (None if disabled)
+    """
+    if not get_setting("response_cache.enabled", True):
+        return None
+
+    cache = ResponseCache(
+        max_entries=int(get_setting("response_cache.max_entries", 10000)),
+        ttl_seconds=float(get_setting("response_cache.ttl_seconds", 3600)),
+        similarity_threshold=float(get_setting("response_cache.similarity_threshold", 0.8)),
+        persist_path=get_setting("response_cache.persist_path") or None,
+    )
+    if cache.persist_path:
+        atexit.register(cache.save)
+    return cache
@@ -0,0 +1,169 @@
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+
+from config.settings import load_config
+
+PRIORITY_ORDER = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+
+# Keywords are matched as word prefixes so "refund" also catches "refunds"/"refunded"
+KEYWORD_SUFFIX = r"(?:s|es|d|ed|ing|ly)?"
+
+# A negation up to two words before a trigger in the same clause ("not angry", "isn't really urgent")
+NEGATION_PATTERN = re.compile(r"(?:\b(?:not|no|never|without|nor)|n't)\b(?:\W+\w+){0,2}\W*$", re.IGNORECASE)
+CLAUSE_BREAK = re.compile(r"[.,;:!?]|\bbut\b", re.IGNORECASE)
+
+# Distinct trigger keywords needed to decide without the agent when none is unambiguous
+MIN_INDEPENDENT_HITS = 2
+
+class EscalationRuleEngine:
+    """
+    Compiled keyword rules from config.yaml (escalation_rules + faq_categories)
+
+    All trigger and category keywords are folded into one case-insensitive
+    alternation so a query is scanned exactly once regardless of rule count.
+    Triggers preceded by a negation in the same clause don't count.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Compile the escalation rules and FAQ category keywords
+
+        Args:
+            config: Parsed configuration (default: config/config.yaml)
+        """
+        config = load_config() if config is None else config
+        escalation_rules = config.get("escalation_rules", {}) or {}
+        faq_categories = config.get("faq_categories", {}) or {}
+
+        self.low_confidence_threshold = float(
+            escalation_rules.get("low_confidence", {}).get("threshold", 0.6)
+        )
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        self.categories: Dict[str, Dict[str, Any]] = {}
+        # Triggers that decide on their own (e.g. "lawsuit"); the rest need a second hit
+        self.unambiguous = set()
+
+        # keyword -> list of ("rule" | "category", name) labels
+        self._labels: Dict[str, List[tuple]] = {}
+
+        for name, rule in escalation_rules.items():
+            triggers = (rule or {}).get("triggers")
+            if not triggers:
+                continue
+            self.rules[name] = rule
+            for keyword in triggers:
+                self._labels.setdefault(keyword.lower(), []).append(("rule", name))
+            self.unambiguous.update(keyword.lower() for keyword in rule.get("unambiguous_triggers", []) or [])
+
+        for name, category in faq_categories.items():
+            self.categories[name] = category or {}
+            for keyword in (category or {}).get("keywords", []):
+                self._labels.setdefault(keyword.lower(), []).append(("category", name))
+
+        # Longest keywords first so multi-word phrases win over their prefixes
+        keywords = sorted(self._labels, key=len, reverse=True)
+        if keywords:
+            alternation = "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in keywords)
+            self._pattern = re.compile(rf"\b({alternation}){KEYWORD_SUFFIX}\b", re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def match(self, customer_query: str) -> Dict[str, Any]:
+        """
+        Scan a query once and report which rules and categories it hits
+
+        Returns:
+            Dict with "rules" (rule name -> matched keywords, negated
+            triggers left out) and "categories" (category name -> matched
+            keywords)
+        """
+        rule_hits: Dict[str, List[str]] = {}
+        category_hits: Dict[str, List[str]] = {}
+        if not self._pattern or not customer_query:
+            return {"rules": rule_hits, "categories": category_hits}
+
+        for found in self._pattern.finditer(customer_query):
+            keyword = re.sub(r"\s+", " ", found.group(1).lower())
+            negated = None
+            for kind, name in self._labels.get(keyword, []):
+                if kind == "rule":
+                    if negated is None:
+                        negated = self._negated(customer_query, found.start())
+                    if negated:
+                        continue
+                hits = rule_hits if kind == "rule" else category_hits
+                if keyword not in hits.setdefault(name, []):
+                    hits[name].append(keyword)
+
+        return {"rules": rule_hits, "categories": category_hits}
+
+    @staticmethod
+    def _negated(text: str, start: int) -> bool:
+        """
+        Whether the keyword at `start` is negated within its clause
+        """
+        clause = CLAUSE_BREAK.split(text[max(0, start - 40):start])[-1]
+        return NEGATION_PATTERN.search(clause) is not None
+
+    def classify_category(self, category_hits: Dict[str, List[str]]) -> str:
+        """
+        Pick the FAQ category with the most keyword hits (ties go to config order)
+        """
+        best, best_hits = "unknown", 0
+        for name in self.categories:
+            hits = len(category_hits.get(name, []))
+            if hits > best_hits:
+                best, best_hits = name, hits
+        return best
+
+    def decide(self, customer_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Build an escalation decision when a keyword rule clearly fires
+
+        A rule fires clearly on an unambiguous trigger (unambiguous_triggers,
+        e.g. "lawsuit" or "fraud") or when at least MIN_INDEPENDENT_HITS
+        distinct triggers match. A single ordinary hit such as "asap" is
+        left to the agent.
+
+        Returns:
+            Escalation decision in the same shape the EscalationAgent emits,
+            or None when no rule fires clearly and the agent should decide
+        """
+        matched = self.match(customer_query)
+        fired = {
+            name: keywords for name, keywords in matched["rules"].items()
+            if self.rules[name].get("action", "escalate") == "escalate"
+        }
+        keywords = {keyword for hits in fired.values() for keyword in hits}
+        if not keywords or (not keywords & self.unambiguous and len(keywords) < MIN_INDEPENDENT_HITS):
+            return None
+
+        top_rule = max(
+            fired,
+            key=lambda name: PRIORITY_ORDER.get(self.rules[name].get("priority", "normal"), 1)
+        )
+        category = self.classify_category(matched["categories"])
+        rule = self.rules[top_rule]
+        suggestion = rule.get("human_agent")
+        if not suggestion:
+            suggestion = "billing" if category == "billing" else "general_support"
+
+        reasons = [f"{name} ({', '.join(keywords)})" for name, keywords in fired.items()]
+        return {
+            "escalate": True,
+            "reason": "Rule-based escalation: matched " + "; ".join(reasons),
+            "priority": rule.get("priority", "normal"),
+            "confidence_score": None,
+            "category": category,
+            "human_agent_suggestion": suggestion,
+            "decided_by": "rule_engine",
+            "matched_rules": sorted(fired),
+        }
+
+@lru_cache(maxsize=None)
+def get_rule_engine() -> EscalationRuleEngine:
+    """
+    Shared rule engine compiled once per process from config.yaml
+    """
+    return EscalationRuleEngine()
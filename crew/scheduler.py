@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional, Tuple
+
+from config.settings import get_setting
+from crew.metrics import get_metrics
+from crew.rules import PRIORITY_ORDER, get_rule_engine
+
+DEFAULT_PRIORITY = "normal"
+
+def classify_priority(customer_query: str) -> str:
+    """
+    Cheap arrival-time priority: the highest priority of any escalation rule the query triggers
+
+    Uses the compiled keyword scan of the rule engine, so it costs one regex
+    pass and no LLM call. Queries that trigger nothing are "normal".
+    """
+    rule_engine = get_rule_engine()
+    levels = [
+        rule_engine.rules[name].get("priority", DEFAULT_PRIORITY)
+        for name in rule_engine.match(customer_query)["rules"]
+        if rule_engine.rules[name].get("action", "escalate") == "escalate"
+    ]
+    return max(levels, key=lambda level: PRIORITY_ORDER.get(level, 1), default=DEFAULT_PRIORITY)
+
+class PriorityScheduler:
+    """
+    Asyncio work queue that dispatches the most urgent item first, with aging
+
+    Items wait in one FIFO per priority level. get() compares only the head
+    of each level, scoring it as its level plus one level per
+    `aging_seconds` waited, so urgent and high work jumps the line while low
+    priority work is promoted over time and never starves.
+    """
+
+    def __init__(self, aging_seconds: Optional[float] = None, max_size: int = 0):
+        """
+        Args:
+            aging_seconds: Wait that promotes an item one level (default: scheduler.aging_seconds)
+            max_size: Maximum queued items, 0 for unbounded (put_nowait raises asyncio.QueueFull)
+        """
+        if aging_seconds is None:
+            aging_seconds = get_setting("scheduler.aging_seconds", 30)
+        self.aging_seconds = float(aging_seconds)
+        self.max_size = max_size
+        self._levels: Dict[str, Deque[Tuple[float, Any]]] = {level: deque() for level in PRIORITY_ORDER}
+        self._size = 0
+        self._getters: Deque[asyncio.Future] = deque()
+        self.metrics = get_metrics()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def depths(self) -> Dict[str, int]:
+        """
+        Queued items per priority level
+        """
+        return {level: len(items) for level, items in self._levels.items()}
+
+    def put_nowait(self, item: Any, priority: str = DEFAULT_PRIORITY) -> None:
+        """
+        Queue an item at `priority` ("low", "normal", "high" or "urgent")
+        """
+        if self.max_size and self._size >= self.max_size:
+            raise asyncio.QueueFull
+        if priority not in self._levels:
+            priority = DEFAULT_PRIORITY
+        self._levels[priority].append((time.monotonic(), item))
+        self._size += 1
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
+
+    async def get(self) -> Tuple[Any, str, float]:
+        """
+        Wait for the next item to dispatch
+
+        Returns:
+            (item, priority it was queued at, seconds it waited)
+        """
+        while not self._size:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except asyncio.CancelledError:
+                if getter.done() and not getter.cancelled() and self._size:
+                    # We were woken for an item we won't take: pass the wake-up on
+                    self._wake_next()
+                raise
+        return self.get_nowait()
+
+    def get_nowait(self) -> Tuple[Any, str, float]:
+        """
+        Take the highest scoring item; raises asyncio.QueueEmpty when nothing is queued
+        """
+        if not self._size:
+            raise asyncio.QueueEmpty
+        now = time.monotonic()
+        best, best_score, best_enqueued = None, None, None
+        for level, items in self._levels.items():
+            if not items:
+                continue
+            enqueued = items[0][0]
+            score = PRIORITY_ORDER[level]
+            if self.aging_seconds > 0:
+                score += (now - enqueued) / self.aging_seconds
+            # Ties go to the item that has waited longest
+            if best_score is None or score > best_score or (score == best_score and enqueued < best_enqueued):
+                best, best_score, best_enqueued = level, score, enqueued
+        enqueued, item = self._levels[best].popleft()
+        self._size -= 1
+        waited = now - enqueued
+        self.metrics.observe("scheduler_queue_wait_seconds", waited, priority=best)
+        return item, best, waited
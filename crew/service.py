@@ -0,0 +1,308 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from config.settings import get_setting
+from crew.analytics import get_analytics
+from crew.batch import _process_with_pool
+from crew.metrics import get_metrics
+from crew.output import WARNING, emit
+from crew.pool import CrewPool
+from crew.scheduler import DEFAULT_PRIORITY, PriorityScheduler, classify_priority
+
+MAX_BODY_BYTES = 1024 * 1024
+DEADLINE_GRACE_SECONDS = 1.0
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+class SupportService:
+    """
+    Long-running HTTP front end for warm CustomerSupportCrew instances
+
+    Requests go into a bounded priority queue drained by `workers` worker
+    tasks, each running one query at a time on a crew from the pool. Urgent
+    and high priority queries are dispatched first (see PriorityScheduler).
+    When the queue is full new queries are rejected with 429. Every query has
+    `request_timeout` seconds from arrival: the crew gets what is left after
+    the queue wait as its deadline and returns a degraded answer when it runs
+    out; 504 is only sent if no answer arrives shortly after the deadline.
+    A request_timeout of 0 (or less) means no deadline.
+
+    Endpoints:
+        POST /query    {"query": "...", "user_id": "...", "session_id": "..."}
+        GET  /health   queue depth per priority, in-flight count and pool size
+        GET  /metrics  Prometheus text (?format=json for JSON)
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 64, request_timeout: float = 30.0,
+                 prewarm: bool = True):
+        """
+        Args:
+            workers: Warm crews, and therefore queries processed concurrently
+            queue_size: Queries allowed to wait for a worker before 429s
+            request_timeout: Per-request deadline in seconds (queue wait included), 0 for none
+            prewarm: Build every crew in the background once started; otherwise
+                crews (and CrewAI itself) are loaded by the first requests
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout if request_timeout and request_timeout > 0 else None
+        self.pool = CrewPool(workers)
+        self.metrics = get_metrics()
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.prioritize = get_setting("scheduler.enabled", True)
+        self.prewarm = prewarm
+        self._warming: Optional[asyncio.Future] = None
+        self._queue: Optional[PriorityScheduler] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._worker_tasks = []
+
+    async def start(self) -> None:
+        """
+        Start the worker tasks, and the crew pre-warm unless disabled
+        
+        Pre-warming runs in the background so the service can listen (and
+        answer /health) while CrewAI is imported and the crews are built.
+        """
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crew")
+        if self.prewarm:
+            self._warming = loop.run_in_executor(self._executor, self.pool.warm)
+            self._warming.add_done_callback(self._report_warm)
+        self._queue = PriorityScheduler(max_size=self.queue_size)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    @staticmethod
+    def _report_warm(future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            emit("prewarm_failed", "⚠️  Crew pre-warm failed: {error}", WARNING, error=str(future.exception()))
+        else:
+            emit("prewarm_done", "🔥 Warmed {crews} crew instance(s)", crews=future.result())
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            (payload, future, deadline), priority, waited = await self._queue.get()
+            try:
+                if future.done():
+                    continue
+                if deadline is not None and time.monotonic() >= deadline:
+                    future.set_exception(asyncio.TimeoutError())
+                    continue
+                # 0 tells the crew to run without a deadline
+                remaining = max(0.001, deadline - time.monotonic()) if deadline is not None else 0
+                self.in_flight += 1
+                try:
+                    result = await loop.run_in_executor(
+                        self._executor, _process_with_pool, self.pool,
+                        payload["query"], payload["user_id"], payload["session_id"], remaining
+                    )
+                finally:
+                    self.in_flight -= 1
+                if result.get("timed_out_stage") == "crew_pool":
+                    # No crew freed up before the deadline: answer like any other expired request
+                    if not future.done():
+                        future.set_exception(asyncio.TimeoutError())
+                    continue
+                result["priority"] = priority
+                result["queue_wait"] = waited
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def submit(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Queue one query and wait for its result or the deadline
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        deadline = time.monotonic() + self.request_timeout if self.request_timeout is not None else None
+        priority = classify_priority(payload["query"]) if self.prioritize else DEFAULT_PRIORITY
+        try:
+            self._queue.put_nowait((payload, future, deadline), priority)
+        except asyncio.QueueFull:
+            self.metrics.inc("service_rejected_total", reason="queue_full")
+            return 429, {"success": False, "error": "Server busy, request queue is full"}
+
+        try:
+            # The crew answers (degraded if need be) at the deadline; the grace covers the hand-off
+            timeout = self.request_timeout + DEADLINE_GRACE_SECONDS if self.request_timeout is not None else None
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # Queued work is skipped by the worker; running work finishes but is discarded
+            future.cancel()
+            self.metrics.inc("service_rejected_total", reason="deadline")
+            return 504, {
+                "success": False,
+                "error": f"Query exceeded max_execution_time of {self.request_timeout:g} seconds",
+                "customer_query": payload["query"],
+                "user_id": payload["user_id"],
+                "timestamp": datetime.now().isoformat(),
+            }
+        return 200, result
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "uptime_seconds": time.time() - self.started_at,
+            "workers": self.workers,
+            "warm_crews": self.pool.built,
+            "in_flight": self.in_flight,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_by_priority": self._queue.depths() if self._queue else {},
+            "queue_size": self.queue_size,
+            "request_timeout": self.request_timeout,
+        }
+
+    @staticmethod
+    def _parse_query_payload(body: bytes) -> Dict[str, Any]:
+        data = json.loads(body or b"{}")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        query = data.get("query") or data.get("customer_query")
+        if not query or not isinstance(query, str):
+            raise ValueError("Missing 'query'")
+        return {
+            "query": query,
+            "user_id": str(data.get("user_id") or "anonymous"),
+            "session_id": str(data.get("session_id") or ""),
+        }
+
+    async def route(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """
+        Dispatch a request and return (status, content type, body)
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+
+        if path == "/query":
+            if method != "POST":
+                return self._json(405, {"error": "Use POST"})
+            try:
+                payload = self._parse_query_payload(body)
+            except (ValueError, json.JSONDecodeError) as e:
+                return self._json(400, {"success": False, "error": str(e)})
+            start = time.perf_counter()
+            status, result = await self.submit(payload)
+            self.metrics.observe("service_request_seconds", time.perf_counter() - start)
+            self.metrics.inc("service_requests_total", status=status)
+            return self._json(status, result)
+
+        if path == "/health" and method == "GET":
+            return self._json(200, self.health())
+
+        if path == "/analytics" and method == "GET":
+            analytics = get_analytics()
+            if analytics is None:
+                return self._json(404, {"error": "Analytics are disabled"})
+            return self._json(200, analytics.snapshot())
+
+        if path == "/metrics" and method == "GET":
+            if parse_qs(url.query).get("format") == ["json"]:
+                return self._json(200, self.metrics.snapshot())
+            return 200, "text/plain; version=0.0.4", self.metrics.to_prometheus().encode('utf-8')
+
+        return self._json(404, {"error": f"No route for {method} {path}"})
+
+    @staticmethod
+    def _json(status: int, body: Dict[str, Any]) -> Tuple[int, str, bytes]:
+        return status, "application/json", json.dumps(body, default=str).encode('utf-8')
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Minimal HTTP/1.1 connection handler with keep-alive
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._write(writer, *self._json(400, {"error": "Malformed request line"}), keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, *self._json(413, {"error": "Request body too large"}), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    status, content_type, payload = await self.route(method.upper(), target, body)
+                except Exception as e:
+                    status, content_type, payload = self._json(500, {"success": False, "error": str(e)})
+                await self._write(writer, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, status: int, content_type: str, payload: bytes,
+                     keep_alive: bool) -> None:
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Unknown')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        )
+        if status == 429:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode('latin-1') + b"\r\n" + payload)
+        await writer.drain()
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, workers: int = 4, queue_size: int = 64,
+                request_timeout: float = 30.0, prewarm: bool = True) -> None:
+    """
+    Run the support service until cancelled
+    """
+    service = SupportService(workers, queue_size, request_timeout, prewarm)
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"🌐 Customer support service listening on http://{host}:{port}")
+    deadline = f"{service.request_timeout:g}s" if service.request_timeout is not None else "none"
+    print(f"   Workers: {workers}  Queue size: {queue_size}  Deadline: {deadline}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
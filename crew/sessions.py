@@ -0,0 +1,302 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.settings import get_setting
+from crew.metrics import get_metrics
+from crew.output import WARNING, emit
+from llm.tokens import estimate_tokens
+
+# Kept per turn: (customer query, answer excerpt, category, escalated, estimated tokens)
+Turn = Tuple[str, str, str, bool, int]
+
+def _excerpt(text: str, limit: int) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+class Session:
+    """
+    Conversation state of one session: a rolling summary plus the last turns
+
+    Slotted so hundreds of thousands of live sessions stay small.
+    """
+
+    __slots__ = ("key", "summary", "summary_tokens", "turns", "turn_count", "tokens", "last_seen")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.summary = ""
+        self.summary_tokens = 0
+        self.turns: "deque[Turn]" = deque()
+        self.turn_count = 0
+        self.tokens = 0
+        self.last_seen = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "summary": self.summary,
+            "turns": [list(turn) for turn in self.turns],
+            "turn_count": self.turn_count,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Session":
+        session = cls(data["key"])
+        session.summary = data.get("summary", "")
+        session.summary_tokens = estimate_tokens(session.summary) if session.summary else 0
+        session.turns = deque(tuple(turn) for turn in data.get("turns", []))
+        session.turn_count = int(data.get("turn_count", len(session.turns)))
+        session.tokens = session.summary_tokens + sum(turn[4] for turn in session.turns)
+        session.last_seen = float(data.get("last_seen", time.time()))
+        return session
+
+class SessionStore:
+    """
+    In-process conversation memory keyed by (user_id, session_id)
+
+    Each session keeps its last `max_turns` turns verbatim (query plus an
+    answer excerpt); older turns, or any beyond `max_session_tokens`, are
+    folded into a one-line-per-turn rolling summary capped at
+    `summary_max_tokens`. Sessions live in an LRU-ordered dict, so lookups
+    and updates are O(1). Sessions idle for `ttl_seconds` expire; the least
+    recently used are evicted once there are more than `max_sessions` or
+    their estimated tokens exceed `max_total_tokens`. With a `spill_dir`,
+    evicted (not expired) sessions are written to disk and restored on
+    their next lookup.
+    """
+
+    def __init__(self, max_sessions: int = 200000, max_turns: int = 4, max_session_tokens: int = 600,
+                 summary_max_tokens: int = 150, max_total_tokens: int = 20000000, ttl_seconds: float = 1800,
+                 answer_chars: int = 300, spill_dir: Optional[str] = None):
+        """
+        Args:
+            max_sessions: Live sessions kept in memory before LRU eviction
+            max_turns: Recent turns kept verbatim per session
+            max_session_tokens: Estimated tokens per session (summary plus turns)
+            summary_max_tokens: Estimated tokens of the rolling summary
+            max_total_tokens: Estimated tokens across all sessions before LRU eviction
+            ttl_seconds: Idle time after which a session is forgotten
+            answer_chars: Characters of each answer kept in a turn
+            spill_dir: Directory evicted sessions are written to (None drops them)
+        """
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_session_tokens = max_session_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.max_total_tokens = max_total_tokens
+        self.ttl_seconds = ttl_seconds
+        self.answer_chars = answer_chars
+        self.spill_dir = spill_dir
+
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._total_tokens = 0
+        self._lock = threading.Lock()
+        self.metrics = get_metrics()
+
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def key(user_id: str, session_id: str) -> Optional[str]:
+        """
+        Store key of a conversation (None without a session_id: nothing to remember)
+        """
+        if not session_id:
+            return None
+        return f"{user_id or 'anonymous'}\x1f{session_id}"
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".json")
+
+    def _lookup(self, key: str, now: float) -> Optional[Session]:
+        """
+        Live session for the key, restoring a spilled one (lock held)
+        """
+        session = self._sessions.get(key)
+        if session is not None:
+            if now - session.last_seen > self.ttl_seconds:
+                self._remove(key)
+                self.metrics.inc("session_lookups_total", outcome="expired")
+                return None
+            self._sessions.move_to_end(key)
+            self.metrics.inc("session_lookups_total", outcome="hit")
+            return session
+
+        if self.spill_dir:
+            path = self._spill_path(key)
+            try:
+                with open(path, 'r') as f:
+                    session = Session.from_dict(json.load(f))
+                os.remove(path)
+            except (OSError, ValueError, KeyError):
+                session = None
+            if session is not None and session.key == key and now - session.last_seen <= self.ttl_seconds:
+                self._sessions[key] = session
+                self._total_tokens += session.tokens
+                self.metrics.inc("session_lookups_total", outcome="restored")
+                return session
+
+        self.metrics.inc("session_lookups_total", outcome="miss")
+        return None
+
+    def _remove(self, key: str) -> Session:
+        session = self._sessions.pop(key)
+        self._total_tokens -= session.tokens
+        return session
+
+    def _evict(self, now: float) -> List[Session]:
+        """
+        Drop expired sessions from the LRU end, then enforce the caps (lock held)
+
+        Returns:
+            Sessions evicted for space, to be spilled
+        """
+        evicted = []
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_seen > self.ttl_seconds:
+                self._remove(key)
+                self.metrics.inc("session_evictions_total", reason="ttl")
+            elif len(self._sessions) > self.max_sessions:
+                evicted.append(self._remove(key))
+                self.metrics.inc("session_evictions_total", reason="max_sessions")
+            elif self._total_tokens > self.max_total_tokens:
+                evicted.append(self._remove(key))
+                self.metrics.inc("session_evictions_total", reason="memory")
+            else:
+                break
+        return evicted
+
+    def _spill(self, sessions: List[Session]) -> None:
+        if not self.spill_dir:
+            return
+        for session in sessions:
+            path = self._spill_path(session.key)
+            tmp_path = path + ".tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(session.to_dict(), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                emit("session_spill_failed", "⚠️  Could not spill session: {error}", WARNING, error=str(e))
+
+    def context(self, user_id: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Conversation so far, for the prompts of the session's next query
+
+        Returns:
+            {"summary", "turns": [{"query", "answer", "category", "escalated"}],
+            "turn_count"} or None when the session has no history
+        """
+        key = self.key(user_id, session_id)
+        if key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            session = self._lookup(key, now)
+            # A session restored from disk may push the store over its caps
+            evicted = self._evict(now) if session is not None else []
+            history = None
+            if session is not None and session.turn_count:
+                history = {
+                    "summary": session.summary,
+                    "turns": [
+                        {"query": query, "answer": answer, "category": category, "escalated": escalated}
+                        for query, answer, category, escalated, _ in session.turns
+                    ],
+                    "turn_count": session.turn_count,
+                }
+        self._spill(evicted)
+        return history
+
+    def record(self, user_id: str, session_id: str, customer_query: str,
+               faq_response: Optional[Dict[str, Any]], escalation_decision: Optional[Dict[str, Any]]) -> None:
+        """
+        Append a finished query to its session
+        """
+        key = self.key(user_id, session_id)
+        if key is None:
+            return
+        faq_response = faq_response or {}
+        query = _excerpt(customer_query, self.answer_chars)
+        answer = _excerpt(faq_response.get("answer", ""), self.answer_chars)
+        turn = (query, answer, str(faq_response.get("category", "unknown")),
+                bool((escalation_decision or {}).get("escalate")),
+                estimate_tokens(query) + estimate_tokens(answer))
+
+        now = time.time()
+        with self._lock:
+            session = self._lookup(key, now)
+            if session is None:
+                session = self._sessions[key] = Session(key)
+            before = session.tokens
+            session.turns.append(turn)
+            session.tokens += turn[4]
+            session.turn_count += 1
+            session.last_seen = now
+            while session.turns and (len(session.turns) > self.max_turns or
+                                     session.tokens > self.max_session_tokens):
+                self._fold(session, session.turns.popleft())
+            self._total_tokens += session.tokens - before
+            evicted = self._evict(now)
+        self._spill(evicted)
+
+    def _fold(self, session: Session, turn: Turn) -> None:
+        """
+        Move a turn out of the verbatim window into the rolling summary
+        """
+        query, _, category, escalated, tokens = turn
+        line = f"[{category}] {_excerpt(query, 80)}" + (" (escalated)" if escalated else "")
+        lines = (session.summary.split("\n") if session.summary else []) + [line]
+        # Oldest summary lines go first once the summary is over its cap
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_max_tokens:
+            lines.pop(0)
+        session.summary = "\n".join(lines)
+        summary_tokens = estimate_tokens(session.summary)
+        session.tokens += summary_tokens - session.summary_tokens - tokens
+        session.summary_tokens = summary_tokens
+
+    def forget(self, user_id: str, session_id: str) -> None:
+        """
+        Drop a session (and its spilled copy)
+        """
+        key = self.key(user_id, session_id)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._sessions:
+                self._remove(key)
+        if self.spill_dir and os.path.exists(self._spill_path(key)):
+            os.remove(self._spill_path(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Live sessions and their estimated tokens
+        """
+        with self._lock:
+            return {"sessions": len(self._sessions), "tokens": self._total_tokens}
+
+@lru_cache(maxsize=None)
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Process-wide session store configured from config.yaml (None if disabled)
+    """
+    if not get_setting("sessions.enabled", True):
+        return None
+    return SessionStore(
+        max_sessions=int(get_setting("sessions.max_sessions", 200000)),
+        max_turns=int(get_setting("sessions.max_turns", 4)),
+        max_session_tokens=int(get_setting("sessions.max_session_tokens", 600)),
+        summary_max_tokens=int(get_setting("sessions.summary_max_tokens", 150)),
+        max_total_tokens=int(get_setting("sessions.max_total_tokens", 20000000)),
+        ttl_seconds=float(get_setting("sessions.ttl_seconds", 1800)),
+        answer_chars=int(get_setting("sessions.answer_chars", 300)),
+        spill_dir=get_setting("sessions.spill_dir") or None,
+    )
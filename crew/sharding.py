@@ -0,0 +1,191 @@
+import asyncio
+import itertools
+import multiprocessing
+import queue
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+
+from config.settings import get_setting
+from crew.analytics import get_analytics
+from crew.batch import process_queries_async
+from crew.interaction_log import get_interaction_log_writer
+from crew.metrics import get_metrics
+from crew.output import WARNING, emit, get_output
+from crew.pool import CrewPool
+from crew.response_cache import get_response_cache
+
+def _shard_worker(worker_id: int, items: List[Tuple[int, Tuple[str, str, str]]], concurrency: int,
+                  results: "multiprocessing.Queue") -> None:
+    """
+    Worker process entry point: run a shard on warm crews and stream each result back
+
+    Messages are (kind, worker_id, batch index, payload) with kind "ready",
+    "result", "log", "cache", "metrics" or "done". Interaction log records
+    and response cache entries go to the parent, which owns the log file
+    and the cache's persist file.
+    """
+    writer = get_interaction_log_writer()
+    if writer is not None:
+        writer.forward_to(lambda record: results.put(("log", worker_id, None, record)))
+    cache = get_response_cache()
+    if cache is not None:
+        # Warmed from the persist file already; only the parent writes it back
+        cache.persist_path = None
+
+    pool = CrewPool(concurrency)
+    results.put(("ready", worker_id, None, pool.warm()))
+
+    def on_result(position: int, result: Dict[str, Any]) -> None:
+        results.put(("result", worker_id, items[position][0], result))
+
+    asyncio.run(process_queries_async([item for _, item in items], concurrency, pool, on_result=on_result))
+
+    # Child processes may skip atexit handlers, so flush the status output here
+    get_output().close()
+    if cache is not None:
+        results.put(("cache", worker_id, None, cache.export()))
+    results.put(("metrics", worker_id, None, get_metrics().snapshot()))
+    results.put(("done", worker_id, None, None))
+
+class ShardedBatchRunner:
+    """
+    Batch runner that spreads queries over worker processes (run_batch's runner)
+
+    Queries are dealt round-robin into one shard per worker. Each worker
+    process builds its own warm crews, processes its shard with
+    `concurrency` queries in flight and streams every result back over a
+    queue as soon as it is ready; results are merged in input order. When a
+    worker dies before finishing, its unfinished queries are requeued on a
+    new worker, up to `max_attempts` tries per query, after which they fail.
+    Worker metrics and response cache entries are merged into this
+    process's registry and cache, results update this process's analytics
+    as they arrive, and workers' interaction log records are written by
+    this process's log writer.
+    """
+
+    def __init__(self, workers: int, concurrency: int = 1, max_attempts: Optional[int] = None,
+                 start_method: Optional[str] = None):
+        """
+        Args:
+            workers: Worker processes
+            concurrency: Queries in flight per worker
+            max_attempts: Tries per query across worker crashes (default: batch_workers.max_attempts)
+            start_method: multiprocessing start method (default: batch_workers.start_method)
+        """
+        self.workers = workers
+        self.concurrency = concurrency
+        self.max_attempts = int(max_attempts or get_setting("batch_workers.max_attempts", 3))
+        self.context = multiprocessing.get_context(start_method or get_setting("batch_workers.start_method", "spawn"))
+        self.crashes = 0
+        self.requeued = 0
+        self.metrics = get_metrics()
+        self.analytics = get_analytics()
+        self.log_writer = get_interaction_log_writer()
+        self.response_cache = get_response_cache()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Worker counters for the batch summary
+        """
+        return {"workers": self.workers, "worker_crashes": self.crashes, "requeued": self.requeued}
+
+    def __call__(self, queries: Sequence[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """
+        Process (query, user_id, session_id) items; results are in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        attempts = [0] * len(queries)
+        owner: Dict[int, int] = {}
+        pending: Dict[int, Set[int]] = {}
+        processes: Dict[int, Any] = {}
+        messages = self.context.Queue()
+        worker_ids = itertools.count(1)
+
+        def launch(indexes: List[int]) -> None:
+            worker_id = next(worker_ids)
+            for index in indexes:
+                attempts[index] += 1
+                owner[index] = worker_id
+            process = self.context.Process(
+                target=_shard_worker, name=f"crew-shard-{worker_id}", daemon=True,
+                args=(worker_id, [(index, tuple(queries[index])) for index in indexes], self.concurrency, messages),
+            )
+            process.start()
+            processes[worker_id] = process
+            pending[worker_id] = set(indexes)
+
+        def reap(queue_drained: bool) -> None:
+            """
+            Requeue the unfinished work of workers that died without reporting "done"
+            """
+            for worker_id, process in list(processes.items()):
+                # A clean exit's "done" may still be in flight until the queue has been drained
+                if process.is_alive() or (process.exitcode == 0 and not queue_drained):
+                    continue
+                process.join()
+                del processes[worker_id]
+                unfinished = sorted(pending.pop(worker_id))
+                self.crashes += 1
+                self.metrics.inc("batch_worker_crashes_total")
+                emit("batch_worker_crashed", "💥 Worker {worker} exited with code {exitcode}; {unfinished} unfinished queries",
+                     WARNING, worker=worker_id, exitcode=process.exitcode, unfinished=len(unfinished))
+                retry = [index for index in unfinished if attempts[index] < self.max_attempts]
+                for index in unfinished:
+                    if attempts[index] >= self.max_attempts:
+                        customer_query, user_id, _ = queries[index]
+                        results[index] = {
+                            "success": False,
+                            "error": f"Worker process crashed (exit code {process.exitcode}) "
+                                     f"on all {attempts[index]} attempts",
+                            "customer_query": customer_query,
+                            "user_id": user_id,
+                            "timestamp": datetime.now().isoformat(),
+                            "processing_time": 0.0,
+                        }
+                if retry:
+                    self.requeued += len(retry)
+                    self.metrics.inc("batch_items_requeued_total", len(retry))
+                    launch(retry)
+
+        shard_count = min(self.workers, len(queries))
+        for shard in range(shard_count):
+            launch(list(range(shard, len(queries), shard_count)))
+
+        last_check = time.monotonic()
+        while processes:
+            try:
+                kind, worker_id, index, payload = messages.get(timeout=0.5)
+            except queue.Empty:
+                reap(queue_drained=True)
+                last_check = time.monotonic()
+                continue
+
+            if kind == "result":
+                # A crashed worker's late result still counts if the query is unanswered
+                if results[index] is None:
+                    results[index] = payload
+                    pending.get(owner[index], set()).discard(index)
+                    if self.analytics is not None and payload.get("success"):
+                        self.analytics.record(payload)
+            elif kind == "ready":
+                emit("batch_worker_ready", "🔥 Worker {worker} ready with {crews} warm crew(s)",
+                     worker=worker_id, crews=payload)
+            elif kind == "log":
+                if self.log_writer is not None:
+                    self.log_writer.write(payload)
+            elif kind == "cache":
+                if self.response_cache is not None:
+                    self.response_cache.merge(payload)
+            elif kind == "metrics":
+                self.metrics.merge(payload)
+            elif kind == "done" and worker_id in processes:
+                processes.pop(worker_id).join()
+                pending.pop(worker_id, None)
+
+            if time.monotonic() - last_check >= 1.0:
+                reap(queue_drained=False)
+                last_check = time.monotonic()
+
+        messages.close()
+        return [result if result is not None else {} for result in results]
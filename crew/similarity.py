@@ -0,0 +1,141 @@
+import re
+import hashlib
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+# Order-specific details that should not make two questions look different. Other
+# numbers ("3 items", "5 days ago") are part of the question and stay in it.
+MASK_PATTERNS = [
+    ("email", re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")),
+    ("order_number", re.compile(r"#\s*[A-Za-z]{0,4}\d{3,}|\b[A-Za-z]{1,4}-?\d{4,}\b")),
+    ("date", re.compile(r"\b\d{1,4}[/-]\d{1,2}[/-]\d{1,4}\b")),
+]
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does for from has have how i i'm i've if in is it "
+    "it's me my of on or our please so that the this to was we what what's when where where's which "
+    "will with would you your".split()
+)
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:[.,]\d+)?\b")
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def normalize_query(text: str) -> str:
+    """
+    Lowercase a query and drop emails, order numbers and dates
+    """
+    for _, pattern in MASK_PATTERNS:
+        text = pattern.sub(" ", text)
+    return " ".join(text.lower().split())
+
+def find_masked_fields(text: str) -> List[Tuple[int, int, str, str]]:
+    """
+    (start, end, kind, value) of every span normalize_query would mask, in text order
+    """
+    fields = []
+    for kind, pattern in MASK_PATTERNS:
+        fields.extend((found.start(), found.end(), kind, found.group()) for found in pattern.finditer(text))
+        # Blank out matches without shifting offsets so later patterns can't re-match them
+        text = pattern.sub(lambda found: " " * len(found.group()), text)
+    return sorted(fields)
+
+def extract_masked_fields(text: str) -> List[Tuple[str, str]]:
+    """
+    (kind, value) of every span normalize_query would mask, in text order
+    """
+    return [(kind, value) for _, _, kind, value in find_masked_fields(text)]
+
+def query_tokens(text: str) -> FrozenSet[str]:
+    """
+    Content-word and number token set of a normalized query
+    """
+    text = normalize_query(text)
+    words = (token.strip("'") for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS)
+    return frozenset(words).union(NUMBER_PATTERN.findall(text))
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    """
+    Jaccard similarity of two token sets
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'big')
+
+class MinHasher:
+    """
+    MinHash signatures over token sets using universal hashing
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        """
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            seed: Seed for the permutation parameters
+        """
+        self.num_perm = num_perm
+        params = []
+        state = seed
+        for _ in range(num_perm):
+            # Small deterministic LCG so signatures are stable across runs
+            state = (state * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+            a = (state >> 3) % (MERSENNE_PRIME - 1) + 1
+            state = (state * 6364136223846793005 + 1442695040888963407) & ((1 << 64) - 1)
+            b = (state >> 3) % MERSENNE_PRIME
+            params.append((a, b))
+        self._params = params
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """
+        MinHash signature of a token set (all-max signature for an empty set)
+        """
+        hashes = [_token_hash(token) for token in tokens]
+        if not hashes:
+            return tuple([MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self._params
+        )
+
+class LSHIndex:
+    """
+    Banded locality-sensitive hash index over MinHash signatures
+
+    Keys whose signatures agree on every row of at least one band become
+    candidates; callers verify candidates with an exact similarity check.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def add(self, key: str, signature: Tuple[int, ...]) -> None:
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str, signature: Tuple[int, ...]) -> None:
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def candidates(self, signature: Tuple[int, ...]) -> Set[str]:
+        found: Set[str] = set()
+        for band_key in self._band_keys(signature):
+            found.update(self._buckets.get(band_key, ()))
+        return found
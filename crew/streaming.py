@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from crew.batch import BatchAggregates, _process_with_pool
+from crew.output import emit
+from crew.pool import CrewPool
+
+class QueryReader:
+    """
+    Lazily read queries from a file or stdin ("-"), one per line
+
+    Lines may be plain text or JSON objects with "query" (or
+    "customer_query"), "user_id" and "session_id". The reader tracks the
+    byte offset after each line so a run can resume without rescanning.
+    """
+
+    def __init__(self, source: str, offset: int = 0, line_number: int = 0):
+        """
+        Args:
+            source: Path to the queries file, or "-" for stdin
+            offset: Byte offset to resume from (files only)
+            line_number: Number of input lines already consumed
+        """
+        self.source = source
+        self.offset = offset
+        self.line_number = line_number
+
+        if source == "-":
+            self._file = sys.stdin.buffer
+            # stdin cannot seek, so replay the already processed lines
+            for _ in range(line_number):
+                if not self._file.readline():
+                    break
+            self._owns_file = False
+        else:
+            self._file = open(source, 'rb')
+            self._file.seek(offset)
+            self._owns_file = True
+
+    def next_item(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the next non-blank query, or None at end of input
+        """
+        while True:
+            raw = self._file.readline()
+            if not raw:
+                return None
+            self.offset += len(raw)
+            self.line_number += 1
+
+            line = raw.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+
+            item = {
+                "query": line,
+                "user_id": f"batch_user_{self.line_number:03d}",
+                "session_id": "",
+            }
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if isinstance(record, dict):
+                    query = record.get("query") or record.get("customer_query")
+                    if not query:
+                        continue
+                    item["query"] = str(query)
+                    item["user_id"] = str(record.get("user_id") or item["user_id"])
+                    item["session_id"] = str(record.get("session_id") or "")
+
+            item["input_line"] = self.line_number
+            item["offset"] = self.offset
+            return item
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+def checkpoint_path_for(output_path: str) -> str:
+    """
+    Location of the checkpoint file that accompanies a results file
+    """
+    return output_path + ".checkpoint"
+
+def load_checkpoint(output_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the checkpoint for a results file, if one exists
+    """
+    path = checkpoint_path_for(output_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_checkpoint(output_path: str, state: Dict[str, Any]) -> None:
+    """
+    Atomically replace the checkpoint so a crash never leaves it half written
+    """
+    path = checkpoint_path_for(output_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+async def stream_queries_async(source: str, output_path: str, concurrency: int = 1, resume: bool = False,
+                               checkpoint_every: int = 1) -> Dict[str, Any]:
+    """
+    Stream queries through the crew and append each result as a JSONL line
+
+    Results are written in input order through a sliding window of at most
+    2 * concurrency pending queries, so memory stays flat however large the
+    input is. After every `checkpoint_every` results the input offset,
+    output size and running aggregates are checkpointed; with resume=True
+    the run continues from the last checkpoint.
+
+    Returns:
+        Batch summary covering the whole run (including resumed progress)
+    """
+    state = load_checkpoint(output_path) if resume else None
+    if state and state.get("source") != source:
+        raise ValueError(f"Checkpoint belongs to {state.get('source')}, not {source}")
+
+    aggregates = BatchAggregates(**(state or {}).get("aggregates", {}))
+    reader = QueryReader(
+        source,
+        offset=(state or {}).get("offset", 0),
+        line_number=(state or {}).get("line_number", 0),
+    )
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if state:
+        emit("stream_resumed", "⏩ Resuming after input line {line}", line=state.get("line_number", 0))
+        # Drop any results written after the last checkpoint to avoid duplicates
+        if os.path.exists(output_path):
+            with open(output_path, 'r+b') as f:
+                f.truncate(state.get("output_size", 0))
+        output = open(output_path, 'ab')
+    else:
+        output = open(output_path, 'wb')
+
+    loop = asyncio.get_running_loop()
+    pool = CrewPool(concurrency)
+    pending: deque = deque()
+    written_since_checkpoint = 0
+
+    def checkpoint(item: Dict[str, Any], completed: bool = False) -> None:
+        save_checkpoint(output_path, {
+            "source": source,
+            "offset": item["offset"],
+            "line_number": item["input_line"],
+            "output_size": output.tell(),
+            "aggregates": aggregates.to_dict(),
+            "completed": completed,
+        })
+
+    last_item = {"offset": reader.offset, "input_line": reader.line_number}
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crew") as executor:
+            async def drain_one() -> None:
+                nonlocal written_since_checkpoint, last_item
+                item, future = pending.popleft()
+                result = await future
+                result["input_line"] = item["input_line"]
+                output.write((json.dumps(result, default=str) + "\n").encode('utf-8'))
+                output.flush()
+                aggregates.add(result)
+                last_item = item
+                written_since_checkpoint += 1
+                if written_since_checkpoint >= checkpoint_every:
+                    checkpoint(item)
+                    written_since_checkpoint = 0
+
+            while True:
+                # Reading may block on stdin, keep it off the event loop
+                item = await loop.run_in_executor(None, reader.next_item)
+                if item is None:
+                    break
+                emit("stream_query_started", "\n🔄 Processing line {line}: {query:.50}...",
+                     line=item["input_line"], query=item["query"])
+                future = loop.run_in_executor(
+                    executor, _process_with_pool, pool, item["query"], item["user_id"], item["session_id"]
+                )
+                pending.append((item, future))
+                if len(pending) >= 2 * concurrency:
+                    await drain_one()
+
+            while pending:
+                await drain_one()
+
+        checkpoint(last_item, completed=True)
+    finally:
+        output.close()
+        reader.close()
+
+    return aggregates.summary()
+
+def run_stream(source: str, output_path: str, concurrency: int = 1, resume: bool = False,
+               checkpoint_every: int = 1) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around stream_queries_async
+    """
+    start_time = time.time()
+    summary = asyncio.run(stream_queries_async(source, output_path, concurrency, resume, checkpoint_every))
+    summary["elapsed_time"] = time.time() - start_time
+    return summary
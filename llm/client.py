@@ -0,0 +1,287 @@
+import atexit
+import importlib.util
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union
+
+import httpx
+import openai
+from crewai import BaseLLM
+
+from config.settings import get_setting
+from crew.deadline import DeadlineExceeded, current_deadline
+from crew.metrics import get_metrics
+from llm.tokens import count_tokens
+
+# Transient failures worth retrying; other API errors (400, 401, ...) are raised at once
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` tokens per minute
+
+    A rate of 0 disables the bucket. acquire() blocks until the tokens are
+    available; adjust() settles the difference once the real cost is known
+    (e.g. actual vs estimated tokens), and may leave the bucket in debt.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_second = per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.per_second)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0, max_wait: Optional[float] = None) -> float:
+        """
+        Take `amount` tokens, waiting for the refill if needed
+
+        Args:
+            amount: Tokens to take
+            max_wait: Raise DeadlineExceeded instead of waiting longer than this
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.per_second <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.per_second
+            if max_wait is not None and waited + delay > max_wait:
+                raise DeadlineExceeded("rate limit wait exceeds the time budget")
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charge (positive) or refund (negative) tokens after the fact
+        """
+        if self.per_second <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+class RetryBudget:
+    """
+    Process-wide cap on retries as a fraction of requests
+
+    Every request deposits `ratio` retry tokens (up to `minimum`, which is
+    also the starting balance) and every retry spends one. A burst of
+    failures can therefore retry at most `minimum` times before retries are
+    limited to `ratio` per request, which stops retry storms.
+    """
+
+    def __init__(self, ratio: float = 0.2, minimum: int = 10):
+        self.ratio = ratio
+        self.maximum = float(minimum)
+        self.balance = float(minimum)
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.balance = min(self.maximum, self.balance + self.ratio)
+
+    def try_spend(self) -> bool:
+        """
+        Take one retry token; False when the budget is exhausted
+        """
+        with self._lock:
+            if self.balance >= 1.0:
+                self.balance -= 1.0
+                return True
+            return False
+
+class SharedOpenAIClient:
+    """
+    One OpenAI client per process with a pooled keep-alive HTTP connection pool
+
+    Every completion first takes a request from the requests-per-minute
+    bucket and its estimated tokens (prompt + max_tokens) from the
+    tokens-per-minute bucket; the estimate is settled against the reported
+    usage afterwards. Rate limits, connection errors and 5xx responses are
+    retried with full-jitter exponential backoff (honouring Retry-After) as
+    long as the shared retry budget allows. The SDK's own retries are off.
+
+    When the calling thread has a query deadline, each request's timeout is
+    cut to the stage's remaining time, so a hung call is cancelled when the
+    budget runs out, and throttling or backoff that would overrun the budget
+    raises DeadlineExceeded instead of sleeping.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 settings: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            api_key: OpenAI API key (default: OPENAI_API_KEY)
+            base_url: API base URL (default: OPENAI_API_BASE or api.openai.base_url)
+            settings: Overrides for api.openai.client
+        """
+        settings = {**(get_setting("api.openai.client", {}) or {}), **(settings or {})}
+        self.max_retries = int(settings.get("max_retries", 4))
+        self.backoff_base = float(settings.get("backoff_base_seconds", 0.5))
+        self.backoff_max = float(settings.get("backoff_max_seconds", 20))
+        self.requests = TokenBucket(float(settings.get("requests_per_minute", 500)))
+        self.tokens = TokenBucket(float(settings.get("tokens_per_minute", 30000)))
+        self.retry_budget = RetryBudget(float(settings.get("retry_budget_ratio", 0.2)),
+                                        int(settings.get("retry_budget_min", 10)))
+        self.metrics = get_metrics()
+        self._random = random.Random()
+
+        max_connections = int(settings.get("max_connections", 20))
+        timeout = float(settings.get("timeout_seconds", 60))
+        self.timeout = timeout
+        # HTTP/2 needs the optional h2 package; plain keep-alive HTTP/1.1 otherwise
+        self.http2 = bool(settings.get("http2", True)) and importlib.util.find_spec("h2") is not None
+        self._http_client = openai.DefaultHttpxClient(
+            http2=self.http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=float(settings.get("keepalive_seconds", 30)),
+            ),
+        )
+        self._client = openai.OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_API_BASE") or get_setting("api.openai.base_url") or None,
+            max_retries=0,
+            timeout=timeout,
+            http_client=self._http_client,
+        )
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """
+        Full-jitter exponential delay, never shorter than the server's Retry-After
+        """
+        delay = self._random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+    def complete(self, model: str, messages: List[Dict[str, str]], **params: Any) -> Any:
+        """
+        Create a chat completion under the rate limits and retry policy
+
+        Returns:
+            The OpenAI ChatCompletion
+        """
+        deadline = current_deadline()
+
+        def time_left() -> Optional[float]:
+            if deadline is None:
+                return None
+            deadline.check()
+            return deadline.stage_remaining()
+
+        estimated = count_tokens(model, messages) + int(params.get("max_tokens") or 0)
+        waited = self.requests.acquire(max_wait=time_left())
+        waited += self.tokens.acquire(estimated, max_wait=time_left())
+        if waited:
+            self.metrics.observe("llm_client_throttle_seconds", waited)
+        self.retry_budget.record_request()
+
+        attempt = 0
+        while True:
+            left = time_left()
+            timeout = self.timeout if left is None else min(self.timeout, left)
+            start = time.perf_counter()
+            try:
+                response = self._client.chat.completions.create(model=model, messages=messages,
+                                                                timeout=timeout, **params)
+            except RETRYABLE_ERRORS as e:
+                reason = str(getattr(e, "status_code", None) or type(e).__name__)
+                self.metrics.inc("llm_client_requests_total", status=reason)
+                if deadline is not None and deadline.stage_remaining() <= 0:
+                    self.metrics.inc("llm_client_giveups_total", reason="deadline")
+                    raise DeadlineExceeded(f"{deadline.stage or 'query'} stage timed out waiting for {model}",
+                                           deadline.stage) from e
+                if attempt >= self.max_retries or not self.retry_budget.try_spend():
+                    self.metrics.inc("llm_client_giveups_total", reason=reason)
+                    raise
+                delay = self._backoff(attempt, e)
+                left = time_left()
+                if left is not None and delay >= left:
+                    self.metrics.inc("llm_client_giveups_total", reason="deadline")
+                    raise DeadlineExceeded(f"retry backoff for {model} exceeds the time budget",
+                                           deadline.stage) from e
+                self.metrics.inc("llm_client_retries_total", reason=reason)
+                time.sleep(delay)
+                attempt += 1
+                # A retry is another request against the per-minute limit
+                self.requests.acquire(max_wait=time_left())
+                continue
+
+            self.metrics.inc("llm_client_requests_total", status="200")
+            self.metrics.observe("llm_client_request_seconds", time.perf_counter() - start, model=model)
+            usage = getattr(response, "usage", None)
+            if usage is not None and usage.total_tokens:
+                self.tokens.adjust(usage.total_tokens - estimated)
+            return response
+
+    def close(self) -> None:
+        self._client.close()
+
+@lru_cache(maxsize=None)
+def get_openai_client() -> SharedOpenAIClient:
+    """
+    Process-wide OpenAI client shared by every agent
+    """
+    client = SharedOpenAIClient()
+    atexit.register(client.close)
+    return client
+
+class PooledOpenAILLM(BaseLLM):
+    """
+    CrewAI LLM that sends every call through the shared OpenAI client
+    """
+
+    def __init__(self, model: str, temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                 client: Optional[SharedOpenAIClient] = None):
+        super().__init__(model=model, temperature=temperature)
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.client = client or get_openai_client()
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools=None, callbacks=None,
+             available_functions=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        params: Dict[str, Any] = {}
+        if self.temperature is not None:
+            params["temperature"] = self.temperature
+        if self.max_tokens:
+            params["max_tokens"] = self.max_tokens
+        if getattr(self, "stop", None):
+            params["stop"] = self.stop[:4]  # the API accepts at most four stop sequences
+        response = self.client.complete(self.model, messages, **params)
+        return response.choices[0].message.content or ""
+
+    def supports_function_calling(self) -> bool:
+        # Agents use CrewAI's text (ReAct) tool format
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 128000
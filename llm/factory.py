@@ -0,0 +1,106 @@
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
+
+from config.settings import get_setting
+
+# The LLM backends import CrewAI (and openai/litellm), so they are loaded by
+# create_llm() on first use; is_mock_mode() stays cheap for the CLI
+if TYPE_CHECKING:
+    from llm.mock_llm import MockResponder
+
+def is_mock_mode() -> bool:
+    """
+    Whether agents should use the local mock LLM instead of OpenAI
+
+    MOCK_MODE in the environment wins; otherwise mock mode is used when no
+    OPENAI_API_KEY is configured and api.mock_mode.enabled_by_default is on.
+    """
+    env_value = os.getenv("MOCK_MODE")
+    if env_value is not None:
+        return env_value.strip().lower() == "true"
+    if os.getenv("OPENAI_API_KEY"):
+        return False
+    return bool(get_setting("api.mock_mode.enabled_by_default", True))
+
+def transcript_mode() -> str:
+    """
+    "off", "record" or "replay" (LLM_TRANSCRIPTS in the environment wins over api.transcripts.mode)
+    """
+    mode = os.getenv("LLM_TRANSCRIPTS") or get_setting("api.transcripts.mode", "off")
+    return str(mode).strip().lower()
+
+def stage_max_tokens(stage: str) -> int:
+    """
+    Completion token limit of a pipeline stage (api.openai.stage_max_tokens, capped at api.openai.max_tokens)
+    """
+    limit = int(get_setting("api.openai.max_tokens", 500))
+    stage_limit = (get_setting("api.openai.stage_max_tokens", {}) or {}).get(stage)
+    return min(limit, int(stage_limit)) if stage_limit else limit
+
+@lru_cache(maxsize=None)
+def get_mock_responder() -> "MockResponder":
+    """
+    Process-wide mock responder configured from api.mock_mode
+    """
+    from llm.mock_llm import MockResponder
+
+    return MockResponder(
+        latency_ms=float(os.getenv("MOCK_LATENCY_MS", get_setting("api.mock_mode.latency_ms", 50))),
+        jitter_ms=float(os.getenv("MOCK_JITTER_MS", get_setting("api.mock_mode.jitter_ms", 20))),
+        seed=int(get_setting("api.mock_mode.seed", 42)),
+    )
+
+def create_llm(model: Optional[str] = None, max_tokens: Optional[int] = None) -> Any:
+    """
+    Build an LLM for the crew's agents
+
+    Args:
+        model: Model name (default: api.openai.model)
+        max_tokens: Completion token limit (default: api.openai.max_tokens)
+
+    Returns:
+        MockLLM in mock mode, a PooledOpenAILLM on the shared rate-limited
+        client, or CrewAI's own LLM when api.openai.client.pooled is off;
+        wrapped in a TranscriptLLM when calls are recorded or replayed
+    """
+    model = model or get_setting("api.openai.model", "gpt-4o")
+    max_tokens = max_tokens or get_setting("api.openai.max_tokens", 500)
+    mode = transcript_mode()
+    if mode != "off":
+        from llm.transcripts import TranscriptLLM, get_transcript_store
+        return TranscriptLLM(
+            model=model,
+            store=get_transcript_store(),
+            backend_factory=lambda: _create_backend(model, max_tokens),
+            mode=mode,
+            on_miss=get_setting("api.transcripts.on_miss", "fail"),
+            replay_latency=bool(get_setting("api.transcripts.replay_latency", False)),
+            latency_scale=float(get_setting("api.transcripts.latency_scale", 1.0)),
+            params={
+                "temperature": get_setting("api.openai.temperature", 0.7),
+                "max_tokens": max_tokens,
+            },
+        )
+    return _create_backend(model, max_tokens)
+
+def _create_backend(model: str, max_tokens: int) -> Any:
+    if is_mock_mode():
+        from llm.mock_llm import MockLLM
+        return MockLLM(get_mock_responder(), model=f"mock-{model}")
+
+    if get_setting("api.openai.client.pooled", True):
+        from llm.client import PooledOpenAILLM
+        return PooledOpenAILLM(
+            model=model,
+            temperature=get_setting("api.openai.temperature", 0.7),
+            max_tokens=max_tokens,
+        )
+
+    from crewai import LLM
+    return LLM(
+        model=model,
+        temperature=get_setting("api.openai.temperature", 0.7),
+        max_tokens=max_tokens,
+        base_url=os.getenv("OPENAI_API_BASE") or get_setting("api.openai.base_url") or None,
+    )
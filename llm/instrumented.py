@@ -0,0 +1,91 @@
+import threading
+import time
+from typing import Any, Optional
+
+from crewai import BaseLLM
+
+from llm.tokens import count_tokens
+
+try:
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:  # older CrewAI without the event bus: TTFT falls back to full latency
+    crewai_event_bus = None
+    LLMStreamChunkEvent = None
+
+_stream_state = threading.local()
+_stream_listener_lock = threading.Lock()
+_stream_listener_registered = False
+
+def _register_stream_listener() -> None:
+    """
+    Note the first streamed chunk of the call running on this thread
+    """
+    global _stream_listener_registered
+    if crewai_event_bus is None or _stream_listener_registered:
+        return
+    with _stream_listener_lock:
+        if _stream_listener_registered:
+            return
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _on_chunk(source, event):
+            if getattr(_stream_state, "first_chunk_at", 0.0) is None:
+                _stream_state.first_chunk_at = time.perf_counter()
+
+        _stream_listener_registered = True
+
+class InstrumentedLLM(BaseLLM):
+    """
+    Wrap an agent's LLM to time each call and count its tokens
+
+    One wrapper is built per agent so every call is attributed to that
+    agent's stage. Measurements go to `recorder` (a StageRecorder); time to
+    first token is taken from CrewAI stream events when streaming is on and
+    equals the full call latency otherwise.
+    """
+
+    def __init__(self, inner: Any, stage: str, recorder: Any = None):
+        super().__init__(model=getattr(inner, "model", "unknown"))
+        self.inner = inner
+        self.stage = stage
+        self.recorder = recorder
+        if getattr(inner, "stream", False):
+            _register_stream_listener()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> Any:
+        if getattr(self, "stop", None) and hasattr(self.inner, "stop"):
+            self.inner.stop = self.stop
+
+        _stream_state.first_chunk_at = None
+        start = time.perf_counter()
+        failed = False
+        response: Optional[Any] = None
+        try:
+            response = self.inner.call(messages, tools=tools, callbacks=callbacks,
+                                       available_functions=available_functions)
+            return response
+        except Exception:
+            failed = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            first_chunk_at = getattr(_stream_state, "first_chunk_at", None)
+            ttft = first_chunk_at - start if first_chunk_at else duration
+            if self.recorder is not None:
+                self.recorder.record_llm_call(
+                    self.stage,
+                    duration,
+                    ttft,
+                    count_tokens(self.model, messages),
+                    count_tokens(self.model, text=str(response)) if response is not None else 0,
+                    failed=failed,
+                )
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the OpenAI chat API
+
+MockResponder turns a chat prompt built by CrewAI into a valid JSON answer
+for the FAQ, escalation, logging or fused support stage, with seeded
+artificial latency. It is exposed two ways:
+
+- MockLLM: an in-process CrewAI LLM (no network at all)
+- MockOpenAIServer: a local OpenAI-compatible HTTP server, useful when the
+  real litellm/OpenAI client path should be exercised
+
+Run the server with:
+    python -m llm.mock_llm --port 8000 --latency-ms 50 --jitter-ms 20
+    python -m llm.mock_llm --port 8000 --error-rate 0.2   # inject 429s
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Union
+
+from crewai import BaseLLM
+
+from crew.deadline import DeadlineExceeded, current_deadline
+from crew.microbatch import BATCH_MARKER
+from crew.rules import get_rule_engine
+from llm.tokens import estimate_tokens
+
+# Agent roles (from agents/*.py) mapped to the pipeline stage they serve
+STAGE_ROLES = {
+    "FAQ Customer Service Agent": "faq",
+    "Escalation Decision Specialist": "escalation",
+    "Customer Interaction Data Analyst": "logging",
+    "Customer Support Triage Agent": "support",
+}
+
+CANNED_ANSWERS = {
+    "order_status": "You can track your order from the Orders page in your account. If tracking has not updated within 48 hours, we will open a trace with the carrier.",
+    "returns": "Items can be returned within 30 days of delivery. Start a return from the Orders page and we will email a prepaid label; refunds post 3-5 business days after we receive the item.",
+    "shipping": "Standard shipping takes 5-7 business days and express shipping 1-2 business days from dispatch.",
+    "account": "You can reset your password from the login page using 'Forgot password'. A reset link is sent to the email on your account.",
+    "billing": "Charges appear on your statement when the order ships. For billing questions we can resend your invoice or review the charge with you.",
+    "unknown": "Thanks for reaching out. I want to make sure you get the right help, so I am passing your question to our support team.",
+}
+
+CUSTOMER_QUERY_PATTERN = re.compile(r"Customer Query:\s*(.+)")
+
+def _prompt_text(messages: Union[str, List[Dict[str, str]]]) -> str:
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+class MockResponder:
+    """
+    Build deterministic stage responses and latencies from a prompt
+    """
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, seed: int = 42):
+        """
+        Args:
+            latency_ms: Base artificial latency per call
+            jitter_ms: Maximum extra latency added per call
+            seed: Seed mixed into the per-prompt jitter
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.seed = seed
+        self.rule_engine = get_rule_engine()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def detect_stage(self, prompt: str) -> str:
+        if BATCH_MARKER in prompt:
+            return "faq_batch"
+        for role, stage in STAGE_ROLES.items():
+            if role in prompt:
+                return stage
+        return "faq"
+
+    def latency(self, prompt: str) -> float:
+        """
+        Seconds to wait for this prompt (same prompt, same latency)
+        """
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode('utf-8')).digest()
+        rng = random.Random(digest)
+        return (self.latency_ms + rng.uniform(0, self.jitter_ms)) / 1000.0
+
+    def _faq(self, customer_query: str) -> Dict[str, Any]:
+        matched = self.rule_engine.match(customer_query)
+        category = self.rule_engine.classify_category(matched["categories"])
+        return {
+            "answer": CANNED_ANSWERS.get(category, CANNED_ANSWERS["unknown"]),
+            "confidence": 0.85 if category != "unknown" else 0.4,
+            "category": category,
+        }
+
+    def _escalation(self, customer_query: str) -> Dict[str, Any]:
+        faq = self._faq(customer_query)
+        decision = self.rule_engine.decide(customer_query)
+        if decision is None:
+            escalate = faq["confidence"] < self.rule_engine.low_confidence_threshold
+            decision = {
+                "escalate": escalate,
+                "reason": "Low confidence FAQ response" if escalate else "FAQ response addresses the question",
+                "priority": "normal" if escalate else "low",
+                "human_agent_suggestion": "general_support",
+            }
+        return {
+            "escalate": decision["escalate"],
+            "reason": decision["reason"],
+            "priority": decision["priority"],
+            "confidence_score": faq["confidence"],
+            "category": faq["category"],
+            "human_agent_suggestion": decision["human_agent_suggestion"],
+        }
+
+    def _logging(self, customer_query: str) -> Dict[str, Any]:
+        digest = hashlib.sha256(customer_query.encode('utf-8')).hexdigest()[:8]
+        return {
+            "logged": True,
+            "interaction_id": f"MOCK-{digest}",
+            "timestamp": datetime.now().isoformat(),
+            "analytics": {"category": self._faq(customer_query)["category"]},
+            "log_location": "mock",
+        }
+
+    def respond(self, messages: Union[str, List[Dict[str, str]]]) -> Dict[str, Any]:
+        """
+        Produce the response text for a prompt without sleeping
+
+        Returns:
+            Dict with stage, content, latency and estimated token counts
+        """
+        prompt = _prompt_text(messages)
+        stage = self.detect_stage(prompt)
+        match = CUSTOMER_QUERY_PATTERN.search(prompt)
+        customer_query = match.group(1).strip() if match else prompt[-500:]
+        latency = self.latency(prompt)
+
+        if stage == "faq_batch":
+            items = json.loads(prompt[prompt.index(BATCH_MARKER) + len(BATCH_MARKER):])
+            payload = {"results": [{"id": item["id"], **self._faq(item["query"])} for item in items]}
+            # Each extra answer adds completion time
+            latency *= 1 + 0.2 * (len(items) - 1)
+        elif stage == "escalation":
+            payload = self._escalation(customer_query)
+        elif stage == "logging":
+            payload = self._logging(customer_query)
+        elif stage == "support":
+            payload = {**self._escalation(customer_query), **self._faq(customer_query)}
+            payload.pop("confidence_score", None)
+        else:
+            payload = self._faq(customer_query)
+
+        # CrewAI's agent executor expects the ReAct "Final Answer:" format
+        content = "Thought: I now can give a great answer\nFinal Answer: " + json.dumps(payload)
+        return {
+            "stage": stage,
+            "content": content,
+            "latency": latency,
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": estimate_tokens(content),
+        }
+
+    def record(self, response: Dict[str, Any]) -> None:
+        """
+        Accumulate per-stage call counts, latency and tokens
+        """
+        with self._lock:
+            stage = self.stats.setdefault(response["stage"], {
+                "calls": 0, "latencies": [], "prompt_tokens": 0, "completion_tokens": 0
+            })
+            stage["calls"] += 1
+            stage["latencies"].append(response["latency"])
+            stage["prompt_tokens"] += response["prompt_tokens"]
+            stage["completion_tokens"] += response["completion_tokens"]
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+class MockLLM(BaseLLM):
+    """
+    In-process CrewAI LLM backed by MockResponder
+    """
+
+    def __init__(self, responder: Optional[MockResponder] = None, model: str = "mock-gpt"):
+        super().__init__(model=model)
+        self.responder = responder or MockResponder()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        response = self.responder.respond(messages)
+        deadline = current_deadline()
+        if deadline is not None:
+            # Behave like a client timeout: give up once the stage budget is spent
+            deadline.check()
+            left = deadline.stage_remaining()
+            if response["latency"] > left:
+                time.sleep(left)
+                raise DeadlineExceeded(f"{deadline.stage or 'query'} stage timed out waiting for {self.model}",
+                                       deadline.stage)
+        time.sleep(response["latency"])
+        self.responder.record(response)
+        return response["content"]
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    server: "MockOpenAIServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-gpt", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self) -> None:
+        # Always consume the body so the kept-alive connection stays in sync
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        if self.server.should_rate_limit():
+            self._send_json(429, {"error": {
+                "message": "Rate limit reached (injected by mock server)",
+                "type": "rate_limit_error",
+                "code": "rate_limit_exceeded",
+            }}, headers={"Retry-After": f"{self.server.retry_after:g}"})
+            return
+
+        responder = self.server.responder
+        response = responder.respond(request.get("messages", []))
+        time.sleep(response["latency"])
+        responder.record(response)
+
+        self._send_json(200, {
+            "id": "chatcmpl-mock-" + hashlib.sha256(response["content"].encode('utf-8')).hexdigest()[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock-gpt"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response["content"]},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": response["prompt_tokens"],
+                "completion_tokens": response["completion_tokens"],
+                "total_tokens": response["prompt_tokens"] + response["completion_tokens"],
+            },
+        })
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """
+    Local OpenAI-compatible /v1/chat/completions server
+
+    Point the OpenAI client at it with OPENAI_API_BASE=http://host:port/v1.
+    With error_rate > 0 a seeded fraction of completions is answered with
+    429 and Retry-After, to exercise client-side rate limiting and retries.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, responder: Optional[MockResponder] = None,
+                 error_rate: float = 0.0, retry_after: float = 0.0, seed: int = 42):
+        super().__init__((host, port), _MockRequestHandler)
+        self.responder = responder or MockResponder()
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def should_rate_limit(self) -> bool:
+        """
+        Count a completion request and decide whether to inject a 429
+        """
+        with self._lock:
+            self.requests += 1
+            limited = self.error_rate > 0 and self._random.random() < self.error_rate
+            if limited:
+                self.rate_limited += 1
+            return limited
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        """
+        Serve in a background thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of completions answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with injected 429s")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.host, args.port, MockResponder(args.latency_ms, args.jitter_ms, args.seed),
+                              error_rate=args.error_rate, retry_after=args.retry_after, seed=args.seed)
+    print(f"🧪 Mock OpenAI server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
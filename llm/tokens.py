@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional, Union
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token) where the exact tokenizer isn't worth it
+    """
+    return max(1, len(text) // 4)
+
+def count_tokens(model: str, messages: Optional[Union[str, List[Dict[str, str]]]] = None,
+                 text: Optional[str] = None) -> int:
+    """
+    Count tokens with the model's tokenizer (estimate_tokens if unknown)
+
+    Args:
+        model: Model name used to pick the tokenizer
+        messages: Chat messages (or a plain prompt string)
+        text: Plain text, e.g. a completion
+    """
+    # litellm is slow to import; modules that only estimate shouldn't pay for it
+    import litellm
+
+    if isinstance(messages, str):
+        text, messages = messages, None
+    try:
+        if messages is not None:
+            return litellm.token_counter(model=model, messages=messages)
+        return litellm.token_counter(model=model, text=text or "")
+    except Exception:
+        if messages is not None:
+            text = "\n".join(str(message.get("content", "")) for message in messages)
+        return estimate_tokens(text or "")
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Record and replay LLM calls
+
+In record mode every model call goes to the real backend and the
+request/response pair is stored in a local SQLite file, keyed by a hash of
+the model, the prompt messages and the sampling parameters. In replay mode
+calls are answered from that store with no network at all; a request that
+was never recorded either fails or falls through to the backend (and is
+recorded), per api.transcripts.on_miss. Recorded latencies can optionally
+be replayed to reproduce production timing.
+
+Show what a store holds with:
+    python -m llm.transcripts cache/llm_transcripts.sqlite3
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
+
+from crewai import BaseLLM
+
+from config.settings import get_setting
+from crew.deadline import DeadlineExceeded, current_deadline
+from crew.metrics import get_metrics
+
+class TranscriptMiss(LookupError):
+    """
+    Replay mode found no recorded response for a request
+    """
+
+def _normalize_messages(messages: Union[str, List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    return [{"role": str(message.get("role", "user")), "content": str(message.get("content", ""))}
+            for message in messages]
+
+def transcript_key(model: str, messages: Union[str, List[Dict[str, str]]], params: Dict[str, Any]) -> str:
+    """
+    Stable hash of a model request (model, messages and sampling parameters)
+    """
+    payload = json.dumps(
+        {"model": model, "messages": _normalize_messages(messages), "params": params},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class TranscriptStore:
+    """
+    SQLite table of recorded model calls, one row per request key
+
+    Requests are stored zlib-compressed, since they are only kept for
+    inspection; lookups touch the primary-key index and the response only.
+    WAL mode lets batch worker processes record into the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, backend TEXT, request BLOB,"
+                " response TEXT NOT NULL, latency REAL NOT NULL, recorded_at REAL NOT NULL)"
+            )
+            self._connection.commit()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """
+        Recorded (response, latency seconds) for a request key
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, latency FROM transcripts WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def put(self, key: str, model: str, backend: str, request: Dict[str, Any], response: str,
+            latency: float) -> None:
+        """
+        Record a call, replacing an earlier recording of the same request
+        """
+        blob = zlib.compress(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO transcripts (key, model, backend, request, response, latency, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, backend, blob, response, latency, time.time()),
+            )
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Recorded calls and mean latency per model
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT model, backend, COUNT(*), AVG(latency) FROM transcripts GROUP BY model, backend"
+            ).fetchall()
+        return {
+            "path": self.path,
+            "calls": sum(row[2] for row in rows),
+            "models": [
+                {"model": model, "backend": backend, "calls": calls, "avg_latency": avg_latency}
+                for model, backend, calls, avg_latency in rows
+            ],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+class TranscriptLLM(BaseLLM):
+    """
+    CrewAI LLM that records calls to, or replays them instead of, a backend LLM
+
+    The backend is built on first use, so a replay that never misses never
+    creates an API client. Requests are keyed on the configured model name
+    rather than the backend's, so calls recorded against OpenAI replay the
+    same way in mock mode.
+    """
+
+    def __init__(self, model: str, store: TranscriptStore, backend_factory: Callable[[], Any],
+                 mode: str = "replay", on_miss: str = "fail", replay_latency: bool = False,
+                 latency_scale: float = 1.0, params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            model: Model name requests are keyed on
+            store: Where calls are recorded
+            backend_factory: Builds the LLM that serves recorded and fall-through calls
+            mode: "record" or "replay"
+            on_miss: In replay mode, "fail" (raise TranscriptMiss) or "fallthrough"
+            replay_latency: Sleep for each replayed call's recorded latency
+            latency_scale: Multiplier for replayed latencies
+            params: Sampling parameters that are part of the key (temperature, max_tokens)
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown transcript mode: {mode}")
+        if on_miss not in ("fail", "fallthrough"):
+            raise ValueError(f"Unknown transcript miss policy: {on_miss}")
+        super().__init__(model=model)
+        self.store = store
+        self.backend_factory = backend_factory
+        self.mode = mode
+        self.on_miss = on_miss
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.params = dict(params or {})
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self.metrics = get_metrics()
+
+    def _get_backend(self) -> Any:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self.backend_factory()
+        return self._backend
+
+    def _request_params(self) -> Dict[str, Any]:
+        params = {name: value for name, value in self.params.items() if value is not None}
+        if getattr(self, "stop", None):
+            params["stop"] = list(self.stop)
+        return params
+
+    def _sleep(self, seconds: float) -> None:
+        """
+        Wait out a replayed latency, timing out like a client would at the stage deadline
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+            left = deadline.stage_remaining()
+            if seconds > left:
+                time.sleep(left)
+                raise DeadlineExceeded(f"{deadline.stage or 'query'} stage timed out waiting for {self.model}",
+                                       deadline.stage)
+        time.sleep(seconds)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        params = self._request_params()
+        key = transcript_key(self.model, messages, params)
+
+        if self.mode == "replay":
+            recorded = self.store.get(key)
+            if recorded is not None:
+                self.metrics.inc("llm_transcript_lookups_total", outcome="hit")
+                response, latency = recorded
+                if self.replay_latency:
+                    self._sleep(latency * self.latency_scale)
+                return response
+            self.metrics.inc("llm_transcript_lookups_total", outcome="miss")
+            if self.on_miss == "fail":
+                raise TranscriptMiss(f"No recorded {self.model} response for request {key[:16]} "
+                                     f"in {self.store.path}")
+
+        backend = self._get_backend()
+        if getattr(self, "stop", None) and hasattr(backend, "stop"):
+            backend.stop = self.stop
+        start = time.perf_counter()
+        response = backend.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        latency = time.perf_counter() - start
+        if isinstance(response, str):
+            request = {"model": self.model, "messages": _normalize_messages(messages), "params": params}
+            self.store.put(key, self.model, getattr(backend, "model", "unknown"), request, response, latency)
+            self.metrics.inc("llm_transcript_recorded_total")
+        return response
+
+    def supports_function_calling(self) -> bool:
+        # Agents use CrewAI's text (ReAct) tool format
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+@lru_cache(maxsize=None)
+def get_transcript_store(path: Optional[str] = None) -> TranscriptStore:
+    """
+    Process-wide transcript store (default path: LLM_TRANSCRIPTS_PATH, else api.transcripts.path)
+    """
+    store = TranscriptStore(path or os.getenv("LLM_TRANSCRIPTS_PATH")
+                            or get_setting("api.transcripts.path", "cache/llm_transcripts.sqlite3"))
+    atexit.register(store.close)
+    return store
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Show what an LLM transcript store holds")
+    parser.add_argument("path", nargs="?", default=None, help="Store file (default: api.transcripts.path)")
+    args = parser.parse_args(argv)
+    print(json.dumps(get_transcript_store(args.path).stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,30 @@ A CrewAI-based customer support automation system that handles FAQ responses,
 escalation decisions, and interaction logging.
 
 Compatible with CrewAI Marketplace requirements.
+
+Importing this module must stay cheap: CrewAI, openai and the agents are
+only loaded once a mode builds its first crew, so --help, argument errors
+and service health checks never pay for them (see benchmarks/bench_startup.py).
 """
 
 import os
 import sys
 import time
+import argparse
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 
-# Import CrewAI customer support crew
-from crew.crew import create_customer_support_crew
+# Mode entry points; crews (and CrewAI itself) are imported lazily by CrewPool
+from crew.batch import run_batch, summarize_batch, print_batch_summary
+from crew.sharding import ShardedBatchRunner
+from crew.streaming import run_stream
+from crew.metrics import dump_metrics
+from crew.analytics import get_analytics
+from crew.output import OUTPUT_LEVELS, get_output
+from crew.service import serve
+from config.settings import get_setting
+from llm.factory import is_mock_mode, transcript_mode
 
 def load_environment():
     """
@@ -29,13 +43,16 @@ def load_environment():
     
     # Display current configuration
     has_openai_key = bool(os.getenv("OPENAI_API_KEY"))
-    mock_mode = os.getenv("MOCK_MODE", "false" if has_openai_key else "true").lower() == "true"
+    mock_mode = is_mock_mode()
     
     print(f"🔧 Configuration:")
-    print(f"   AI Mode: {'Disabled (Mock Mode)' if mock_mode else 'Enabled (OpenAI)'}")
+    print(f"   AI Mode: {'Disabled (Mock Mode, local mock LLM)' if mock_mode else 'Enabled (OpenAI)'}")
     print(f"   OpenAI API: {'Available' if has_openai_key else 'Not configured'}")
     if not mock_mode and has_openai_key:
         print("   🤖 Running with AI-powered responses")
+    if transcript_mode() != "off":
+        print(f"   LLM Transcripts: {transcript_mode()} "
+              f"({os.getenv('LLM_TRANSCRIPTS_PATH') or get_setting('api.transcripts.path', 'cache/llm_transcripts.sqlite3')})")
 
 def load_sample_query():
     """
@@ -85,6 +102,10 @@ def run_interactive_mode():
     """
     print("\n🚀 Starting Customer Support Agent Crew...")
     
+    # Build the agents once and reuse the warm crew for every query
+    from crew.crew import create_customer_support_crew
+    crew = create_customer_support_crew()
+    
     while True:
         try:
             # Get customer input
@@ -96,8 +117,9 @@ def run_interactive_mode():
             
             # Process the query
             print(f"\n🔄 Processing query for user: {user_id}")
-            crew = create_customer_support_crew()
             result = crew.process_customer_query(customer_query, user_id)
+            # Status lines are written in the background; let them land before the results
+            get_output().flush()
             
             # Display results
             if result.get("success"):
@@ -139,48 +161,173 @@ def run_interactive_mode():
             print(f"\n❌ Unexpected error: {e}")
             continue
 
-def run_batch_mode(queries_file: str):
+def report_metrics():
+    """
+    Dump per-stage latency/token histograms when performance logging is enabled
+    """
+    metrics_path = dump_metrics()
+    if metrics_path:
+        print(f"📈 Stage metrics written to: {metrics_path}")
+
+def run_batch_mode(queries_file: str, concurrency: int = 1, workers: int = 1):
     """
     Run the crew in batch mode processing multiple queries from a file
+    
+    Args:
+        queries_file: Text file with one customer query per line
+        concurrency: Maximum number of queries in flight at once (per worker process)
+        workers: Worker processes to shard the queries across
     """
     if not os.path.exists(queries_file):
         print(f"❌ Queries file not found: {queries_file}")
         return
     
     print(f"\n📁 Running batch processing from: {queries_file}")
-    crew = create_customer_support_crew()
+    print(f"⚙️  Concurrency: {concurrency}")
+    if workers > 1:
+        print(f"⚙️  Worker processes: {workers}")
     
     try:
         with open(queries_file, 'r') as f:
             queries = [line.strip() for line in f if line.strip()]
         
-        results = []
-        for i, query in enumerate(queries, 1):
-            print(f"\n🔄 Processing query {i}/{len(queries)}: {query[:50]}...")
-            result = crew.process_customer_query(query, f"batch_user_{i:03d}")
-            results.append(result)
+        items = [(query, f"batch_user_{i:03d}", "") for i, query in enumerate(queries, 1)]
         
-        # Generate batch summary
-        print(f"\n📊 BATCH PROCESSING SUMMARY")
-        print("="*40)
-        total_queries = len(results)
-        successful = sum(1 for r in results if r.get("success"))
-        escalated = sum(1 for r in results if r.get("escalation_decision", {}).get("escalate"))
+        runner = ShardedBatchRunner(workers, concurrency) if workers > 1 else None
+        start_time = time.time()
+        results = run_batch(items, concurrency, runner=runner)
         
-        print(f"Total Queries: {total_queries}")
-        print(f"Successful: {successful}")
-        print(f"Failed: {total_queries - successful}")
-        print(f"Escalated: {escalated}")
-        print(f"Resolution Rate: {(successful - escalated) / total_queries * 100:.1f}%")
-        print("="*40)
+        # Generate batch summary
+        summary = summarize_batch(results)
+        summary["elapsed_time"] = time.time() - start_time
+        if runner is not None:
+            summary.update(runner.summary())
+        analytics = get_analytics()
+        if analytics is not None:
+            summary["analytics"] = analytics.summary()
+        get_output().flush()
+        print_batch_summary(summary)
+        report_metrics()
         
     except Exception as e:
         print(f"❌ Error in batch processing: {e}")
 
+def run_stream_mode(source: str, output_path: str, concurrency: int = 1, resume: bool = False,
+                    checkpoint_every: int = 1):
+    """
+    Stream queries from a file or stdin ("-") and write results as JSONL
+    
+    Args:
+        source: Queries file (plain text or JSONL), or "-" for stdin
+        output_path: JSONL file receiving one result per query
+        concurrency: Maximum number of queries in flight at once
+        resume: Continue from the checkpoint next to output_path
+        checkpoint_every: Results written between checkpoints
+    """
+    if source != "-" and not os.path.exists(source):
+        print(f"❌ Queries file not found: {source}")
+        return
+    
+    print(f"\n📡 Streaming queries from: {'stdin' if source == '-' else source}")
+    print(f"💾 Writing results to: {output_path}")
+    print(f"⚙️  Concurrency: {concurrency}")
+    
+    try:
+        summary = run_stream(source, output_path, concurrency, resume, checkpoint_every)
+        analytics = get_analytics()
+        if analytics is not None:
+            summary["analytics"] = analytics.summary()
+        get_output().flush()
+        print_batch_summary(summary)
+        report_metrics()
+    except Exception as e:
+        print(f"❌ Error in stream processing: {e}")
+
+def run_service_mode(host: str, port: int, prewarm: bool = True):
+    """
+    Run the long-lived HTTP service with warm crews
+    
+    Args:
+        host: Interface to bind
+        port: TCP port to listen on
+        prewarm: Build the crews in the background as soon as the service listens
+    """
+    print("\n🚀 Starting Customer Support service...")
+    try:
+        asyncio.run(serve(
+            host=host,
+            port=port,
+            workers=get_setting("service.workers", 4),
+            queue_size=get_setting("service.queue_size", 64),
+            request_timeout=get_setting("workflow.max_execution_time", 30),
+            prewarm=prewarm,
+        ))
+    except KeyboardInterrupt:
+        print("\n👋 Service stopped.")
+        report_metrics()
+
+def positive_int(value: str) -> int:
+    """
+    argparse type for options that must be >= 1
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def parse_arguments(argv=None) -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Customer Support Agent Crew - CrewAI customer support automation",
+        epilog="Run without arguments for interactive mode."
+    )
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Batch process queries from file (one query per line)")
+    parser.add_argument("--concurrency", metavar="N", type=positive_int,
+                        default=get_setting("workflow.batch_concurrency", 1),
+                        help="Queries processed concurrently in batch/stream mode (default: %(default)s)")
+    parser.add_argument("--workers", metavar="N", type=positive_int,
+                        default=get_setting("batch_workers.workers", 1),
+                        help="Worker processes for batch mode, each with its own crews (default: %(default)s)")
+    parser.add_argument("--stream", metavar="SOURCE",
+                        help="Stream queries from a file or '-' for stdin (plain text or JSONL with user_id/session_id)")
+    parser.add_argument("--output", metavar="FILE",
+                        default=get_setting("workflow.stream_output", "logs/batch_results.jsonl"),
+                        help="JSONL results file for stream mode (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume stream mode from the checkpoint next to --output")
+    parser.add_argument("--checkpoint-every", metavar="N", type=positive_int, default=1,
+                        help="Results written between checkpoints in stream mode (default: %(default)s)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a long-lived HTTP service (POST /query, GET /health, GET /metrics)")
+    parser.add_argument("--host", default=get_setting("service.host", "127.0.0.1"),
+                        help="Service bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=get_setting("service.port", 8080),
+                        help="Service port (default: %(default)s)")
+    parser.add_argument("--transcripts", choices=["off", "record", "replay"], default=None,
+                        help="Record model calls to, or replay them from, api.transcripts.path (default: api.transcripts.mode)")
+    parser.add_argument("--no-prewarm", dest="prewarm", action="store_false",
+                        default=get_setting("service.prewarm", True),
+                        help="Build service crews on first request instead of right after startup")
+    parser.add_argument("--verbosity", choices=list(OUTPUT_LEVELS), default=None,
+                        help="Status output: 'verbose' adds CrewAI agent traces, 'quiet' shows warnings only "
+                             "(default: workflow.verbose_output)")
+    return parser.parse_args(argv)
+
 def main():
     """
     Main entry point for the Customer Support Agent Crew
     """
+    args = parse_arguments()
+    if args.transcripts:
+        # Read by create_llm() in this process and in batch worker processes
+        os.environ["LLM_TRANSCRIPTS"] = args.transcripts
+    if args.verbosity:
+        # Read by get_output() in this process and in batch worker processes
+        os.environ["CREW_OUTPUT"] = args.verbosity
+    
     print("🎯 Customer Support Agent Crew v1.0.0")
     print("   CrewAI Marketplace Compatible")
     print("   https://marketplace.crewai.com")
@@ -188,18 +335,12 @@ def main():
     # Load environment configuration
     load_environment()
     
-    # Check command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--batch" and len(sys.argv) > 2:
-            run_batch_mode(sys.argv[2])
-        elif sys.argv[1] == "--help":
-            print("\nUsage:")
-            print("  python main.py                    # Interactive mode")
-            print("  python main.py --batch <file>     # Batch process queries from file")
-            print("  python main.py --help             # Show this help")
-        else:
-            print(f"❌ Unknown argument: {sys.argv[1]}")
-            print("Use --help for usage information")
+    if args.serve:
+        run_service_mode(args.host, args.port, args.prewarm)
+    elif args.stream:
+        run_stream_mode(args.stream, args.output, args.concurrency, args.resume, args.checkpoint_every)
+    elif args.batch:
+        run_batch_mode(args.batch, args.concurrency, args.workers)
     else:
         # Run in interactive mode
         run_interactive_mode()
@@ -0,0 +1,146 @@
+import json
+from functools import lru_cache
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from config.settings import get_setting
+from crew.metrics import get_metrics
+from llm.tokens import estimate_tokens
+
+# Starts the per-query part of every task description; everything before it is identical across queries
+QUERY_HEADING = "Details of this request:"
+
+TRIM_MARKER = " …[trimmed]… "
+
+DEFAULT_STAGE_BUDGETS = {"faq": 1200, "escalation": 900, "logging": 900, "support": 1400}
+DEFAULT_SECTION_BUDGETS = {
+    "customer_query": 400,
+    "faq_response": 250,
+    "escalation_decision": 200,
+    "conversation": 350,
+    "kb_entries": 450,
+}
+
+# Sections that keep their budget first when a stage's total is tight
+SECTION_PRIORITY = ("customer_query", "faq_response", "escalation_decision", "conversation", "kb_entries")
+
+def trim_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """
+    Cut text to about max_tokens estimated tokens, keeping its beginning and end
+
+    Returns:
+        (text, whether it was trimmed)
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    if max_tokens <= 0:
+        return "", True
+    chars = max(0, max_tokens * 4 - len(TRIM_MARKER))
+    head = chars * 2 // 3
+    return text[:head].rstrip() + TRIM_MARKER + text[len(text) - (chars - head):].lstrip(), True
+
+def compact_json(text: str, fields: Sequence[str]) -> str:
+    """
+    A prior stage's JSON output reduced to the fields the next stage needs
+
+    Anything that is not a JSON object (e.g. a "{faq_response}" placeholder
+    filled from task context) is returned unchanged.
+    """
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    if not isinstance(value, dict):
+        return text
+    return json.dumps({name: value[name] for name in fields if name in value}, ensure_ascii=False)
+
+class PromptBuilder:
+    """
+    Lay out task descriptions as a static prefix plus a budgeted per-query tail
+
+    The stage's instructions and output schema come first and never contain
+    per-query text, so together with the agent's role and backstory (CrewAI's
+    system message) they form a byte-identical prefix that provider-side
+    prompt caching can reuse. The per-query sections follow under
+    QUERY_HEADING, with the customer query last. Each section is trimmed to
+    its own budget and, in SECTION_PRIORITY order, to what is left of the
+    stage's budget; a section with no budget left is dropped.
+    """
+
+    def __init__(self, stage_budgets: Optional[Dict[str, int]] = None,
+                 section_budgets: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            stage_budgets: Estimated tokens for all per-query sections of a stage's prompt
+            section_budgets: Estimated tokens per section
+        """
+        self.stage_budgets = {**DEFAULT_STAGE_BUDGETS, **(stage_budgets or {})}
+        self.section_budgets = {**DEFAULT_SECTION_BUDGETS, **(section_budgets or {})}
+        self.metrics = get_metrics()
+
+    def trim(self, stage: str, section: str, text: str, budget: Optional[int] = None) -> str:
+        """
+        One section cut to its budget (counted in crew_prompt_trimmed_total)
+        """
+        if budget is None:
+            budget = self.section_budgets.get(section, self.stage_budgets.get(stage, 1000))
+        text, trimmed = trim_to_tokens(text, budget)
+        if trimmed:
+            self.metrics.inc("crew_prompt_trimmed_total", stage=stage, section=section)
+        return text
+
+    def build(self, stage: str, instructions: str, sections: Sequence[Tuple[str, str, str]]) -> str:
+        """
+        Task description for one stage
+
+        Args:
+            stage: "faq", "escalation", "logging" or "support"
+            instructions: Static instructions and output schema (no per-query text)
+            sections: (name, label, text) per-query sections in the order they
+                appear; empty texts are left out
+
+        Returns:
+            The instructions, QUERY_HEADING and the trimmed sections
+        """
+        remaining = self.stage_budgets.get(stage, 1000)
+        fitted: Dict[str, str] = {}
+        for name, _, text in sorted(sections, key=lambda section: _priority(section[0])):
+            if not text:
+                continue
+            budget = min(self.section_budgets.get(name, remaining), remaining)
+            fitted[name] = self.trim(stage, name, text, budget)
+            remaining = max(0, remaining - estimate_tokens(fitted[name]))
+
+        lines = [instructions.strip(), "", QUERY_HEADING]
+        for name, label, _ in sections:
+            if fitted.get(name):
+                lines.append(f"{label}: {fitted[name]}" if label else fitted[name])
+        return "\n".join(lines)
+
+def _priority(name: str) -> int:
+    return SECTION_PRIORITY.index(name) if name in SECTION_PRIORITY else len(SECTION_PRIORITY)
+
+def prompt_estimate(agent: Any, task: Any) -> Dict[str, int]:
+    """
+    Estimated input tokens of a task's prompt: the cacheable prefix and the per-query tail
+
+    The prefix is the agent's role, goal and backstory plus the description
+    up to QUERY_HEADING; the tail is the rest, including the expected output
+    CrewAI appends after it.
+    """
+    description = task.description
+    split = description.find(QUERY_HEADING)
+    static = description if split < 0 else description[:split]
+    prefix = estimate_tokens(f"{agent.role}{agent.goal}{agent.backstory}{static}")
+    tail = estimate_tokens(description[len(static):] + task.expected_output)
+    return {"prefix": prefix, "tail": tail, "total": prefix + tail}
+
+@lru_cache(maxsize=None)
+def get_prompt_builder() -> PromptBuilder:
+    """
+    Shared prompt builder with budgets from the prompts section of config.yaml
+    """
+    return PromptBuilder(
+        stage_budgets={stage: int(tokens) for stage, tokens in (get_setting("prompts.stage_budgets", {}) or {}).items()},
+        section_budgets={name: int(tokens) for name, tokens in
+                         (get_setting("prompts.section_budgets", {}) or {}).items()},
+    )
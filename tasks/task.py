@@ -1,48 +1,126 @@
 from crewai import Task
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from tasks.prompts import compact_json, get_prompt_builder
 
-def create_faq_task(agent, customer_query: str) -> Task:
+def format_kb_entries(kb_entries: Optional[List[Dict[str, Any]]]) -> str:
+    """
+    Knowledge base entries as a prompt block ("" when there are none)
+    """
+    if not kb_entries:
+        return ""
+    lines = ["Relevant knowledge base entries (answer from these when they cover the question):"]
+    for entry in kb_entries:
+        lines.append(f"- [{entry['category']}] Q: {entry['question']} A: {entry['answer']}")
+    return "\n".join(lines)
+
+def format_conversation(history: Optional[Dict[str, Any]]) -> str:
+    """
+    Earlier turns of the customer's session as a prompt block ("" for a new session)
+    """
+    if not history:
+        return ""
+    lines = ["Earlier in this conversation (use it to resolve follow-up questions):"]
+    if history.get("summary"):
+        lines.append("Summary of older messages:")
+        lines.extend(f"  {line}" for line in history["summary"].split("\n"))
+    for turn in history.get("turns", []):
+        escalated = " (escalated)" if turn.get("escalated") else ""
+        lines.append(f"- Customer: {turn['query']}")
+        lines.append(f"  Answer [{turn.get('category', 'unknown')}]{escalated}: {turn['answer']}")
+    return "\n".join(lines)
+
+# Static parts of the task descriptions: no per-query text, so every prompt of a stage
+# starts with the same bytes (see tasks/prompts.py)
+FAQ_INSTRUCTIONS = """
+Process the customer query given at the end and provide a helpful response.
+
+Analyze the customer's question and provide a response in JSON format with:
+- answer: A clear, helpful response to the customer's question
+- confidence: Your confidence level (0-1) in this response
+- category: The type of question (order_status, returns, shipping, account, billing, or unknown)
+
+Be helpful and professional in your response.
+"""
+
+ESCALATION_INSTRUCTIONS = """
+Analyze the FAQ response and customer query given at the end to determine if escalation is needed.
+
+Determine if this interaction should be escalated to a human agent and provide your analysis in JSON format with:
+- escalate: true or false
+- reason: explanation for your decision
+- priority: "low", "normal", "high", or "urgent"
+- confidence_score: the FAQ confidence score from the response
+- category: the FAQ category from the response
+- human_agent_suggestion: "general_support", "technical", "billing", or "manager"
+
+Consider response confidence, emotional tone, complexity, urgency indicators, and whether
+the customer is contacting us again about an unresolved issue.
+"""
+
+LOGGING_INSTRUCTIONS = """
+Log the complete customer service interaction given at the end for tracking and analysis.
+
+Create a comprehensive log entry in JSON format with:
+- logged: true or false
+- interaction_id: unique identifier with timestamp
+- timestamp: current timestamp in ISO format
+- analytics: summary of key metrics (escalated, confidence_score, category, etc.)
+- log_location: where the data was stored (e.g., "logs/customer_interactions.jsonl")
+
+Generate analytics and provide confirmation of successful logging.
+"""
+
+SUPPORT_INSTRUCTIONS = """
+Process the customer query given at the end, answer it, and decide whether it needs a human agent.
+
+Respond with a single JSON object with:
+- answer: A clear, helpful response to the customer's question
+- confidence: Your confidence level (0-1) in this response
+- category: The type of question (order_status, returns, shipping, account, billing, or unknown)
+- escalate: true or false
+- reason: explanation for the escalation decision
+- priority: "low", "normal", "high", or "urgent"
+- human_agent_suggestion: "general_support", "technical", "billing", or "manager"
+
+Consider response confidence, emotional tone, complexity, and urgency indicators.
+"""
+
+FAQ_FIELDS = ("answer", "confidence", "category")
+ESCALATION_FIELDS = ("escalate", "reason", "priority", "human_agent_suggestion")
+
+def create_faq_task(agent, customer_query: str, kb_entries: Optional[List[Dict[str, Any]]] = None,
+                    history: Optional[Dict[str, Any]] = None) -> Task:
     """
     Create task for FAQ Agent to process customer query
+    
+    kb_entries are knowledge base matches (see crew/knowledge_base.py) that
+    ground the answer; history is the session's earlier turns (see
+    crew/sessions.py).
     """
     return Task(
-        description=f"""
-        Process the following customer query and provide a helpful response:
-        
-        Customer Query: {customer_query}
-        
-        Analyze the customer's question and provide a response in JSON format with:
-        - answer: A clear, helpful response to the customer's question
-        - confidence: Your confidence level (0-1) in this response
-        - category: The type of question (order_status, returns, shipping, account, billing, or unknown)
-        
-        Be helpful and professional in your response.
-        """,
+        description=get_prompt_builder().build("faq", FAQ_INSTRUCTIONS, [
+            ("kb_entries", "", format_kb_entries(kb_entries)),
+            ("conversation", "", format_conversation(history)),
+            ("customer_query", "Customer Query", customer_query),
+        ]),
         agent=agent,
         expected_output="JSON response with answer, confidence score, and category"
     )
 
-def create_escalation_task(agent, faq_response: str, customer_query: str) -> Task:
+def create_escalation_task(agent, faq_response: str, customer_query: str,
+                           history: Optional[Dict[str, Any]] = None) -> Task:
     """
     Create task for Escalation Agent to determine if human intervention is needed
+    
+    history is the session's earlier turns, so repeated contacts about the
+    same issue can be taken into account.
     """
     return Task(
-        description=f"""
-        Analyze the FAQ response and customer query to determine if escalation is needed:
-        
-        Customer Query: {customer_query}
-        FAQ Response: {faq_response}
-        
-        Determine if this interaction should be escalated to a human agent and provide your analysis in JSON format with:
-        - escalate: true or false
-        - reason: explanation for your decision
-        - priority: "low", "normal", "high", or "urgent"
-        - confidence_score: the FAQ confidence score from the response
-        - category: the FAQ category from the response
-        - human_agent_suggestion: "general_support", "technical", "billing", or "manager"
-        
-        Consider response confidence, emotional tone, complexity, and urgency indicators.
-        """,
+        description=get_prompt_builder().build("escalation", ESCALATION_INSTRUCTIONS, [
+            ("conversation", "", format_conversation(history)),
+            ("faq_response", "FAQ Response", compact_json(faq_response, FAQ_FIELDS)),
+            ("customer_query", "Customer Query", customer_query),
+        ]),
         agent=agent,
         expected_output="JSON escalation decision with reasoning, priority, and agent suggestion"
     )
@@ -52,26 +130,30 @@ def create_logging_task(agent, customer_query: str, faq_response: str, escalatio
     Create task for Logging Agent to record the interaction
     """
     return Task(
-        description=f"""
-        Log the complete customer service interaction for tracking and analysis:
-        
-        Customer Query: {customer_query}
-        FAQ Response: {faq_response}
-        Escalation Decision: {escalation_decision}
-        
-        Create a comprehensive log entry in JSON format with:
-        - logged: true or false
-        - interaction_id: unique identifier with timestamp
-        - timestamp: current timestamp in ISO format
-        - analytics: summary of key metrics (escalated, confidence_score, category, etc.)
-        - log_location: where the data was stored (e.g., "logs/customer_interactions.json")
-        
-        Generate analytics and provide confirmation of successful logging.
-        """,
+        description=get_prompt_builder().build("logging", LOGGING_INSTRUCTIONS, [
+            ("faq_response", "FAQ Response", compact_json(faq_response, FAQ_FIELDS)),
+            ("escalation_decision", "Escalation Decision", compact_json(escalation_decision, ESCALATION_FIELDS)),
+            ("customer_query", "Customer Query", customer_query),
+        ]),
         agent=agent,
         expected_output="JSON confirmation of successful logging with interaction ID and analytics"
     )
 
+def create_support_task(agent, customer_query: str, kb_entries: Optional[List[Dict[str, Any]]] = None,
+                        history: Optional[Dict[str, Any]] = None) -> Task:
+    """
+    Create a single task that answers the query and makes the escalation decision
+    """
+    return Task(
+        description=get_prompt_builder().build("support", SUPPORT_INSTRUCTIONS, [
+            ("kb_entries", "", format_kb_entries(kb_entries)),
+            ("conversation", "", format_conversation(history)),
+            ("customer_query", "Customer Query", customer_query),
+        ]),
+        agent=agent,
+        expected_output="JSON response with answer, confidence, category and escalation decision"
+    )
+
 def create_customer_support_workflow_task(faq_agent, escalation_agent, logging_agent, customer_query: str, user_id: str = "anonymous") -> list:
     """
     Create the complete workflow of tasks for processing a customer support request
@@ -0,0 +1,53 @@
+import unittest
+
+from crew.dedup import fan_out
+
+REPRESENTATIVE = ("Where is my order #CS12345?", "u1", "")
+MEMBER = ("Where is my order #CS99999?", "u2", "")
+
+def _result(answer: str) -> dict:
+    return {
+        "success": True,
+        "customer_query": REPRESENTATIVE[0],
+        "user_id": REPRESENTATIVE[1],
+        "faq_response": {"answer": answer, "confidence": 0.9, "category": "order_status"},
+        "processing_time": 1.5,
+    }
+
+class FanOutTest(unittest.TestCase):
+    def answer(self, text: str):
+        member_result = fan_out(_result(text), REPRESENTATIVE, MEMBER, 1)
+        return None if member_result is None else member_result["faq_response"]["answer"]
+
+    def test_rewrites_order_number_in_the_query_format(self):
+        self.assertEqual(self.answer("Your order #CS12345 ships soon"), "Your order #CS99999 ships soon")
+
+    def test_rewrites_order_number_without_hash(self):
+        self.assertEqual(self.answer("Your order CS12345 ships soon"), "Your order CS99999 ships soon")
+
+    def test_rewrites_order_number_in_other_case_and_spacing(self):
+        self.assertEqual(self.answer("Your order # cs12345 ships soon"), "Your order #CS99999 ships soon")
+
+    def test_bare_digits_are_not_shared(self):
+        self.assertIsNone(self.answer("Order number 12345 ships soon"))
+
+    def test_digits_with_other_prefix_are_not_shared(self):
+        self.assertIsNone(self.answer("Order CS-12345 ships soon"))
+
+    def test_unrelated_numbers_are_kept(self):
+        self.assertEqual(self.answer("Standard shipping takes 5-7 business days"),
+                         "Standard shipping takes 5-7 business days")
+
+    def test_member_fields_are_its_own(self):
+        member_result = fan_out(_result("Your order #CS12345 ships soon"), REPRESENTATIVE, MEMBER, 1)
+        self.assertEqual(member_result["customer_query"], MEMBER[0])
+        self.assertEqual(member_result["user_id"], "u2")
+        self.assertEqual(member_result["duplicate_of"], 1)
+
+    def test_email_without_member_counterpart_is_not_shared(self):
+        representative = ("Where is my order #CS12345? I'm a@example.com", "u1", "")
+        member_result = fan_out(_result("We emailed A@Example.com about #CS12345"), representative, MEMBER, 1)
+        self.assertIsNone(member_result)
+
+if __name__ == "__main__":
+    unittest.main()